@@ -7,15 +7,25 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QPushButton, QLabel, QLineEdit, QComboBox, QFileDialog, QMessageBox,
-    QListWidget, QListWidgetItem, QAbstractItemView, QGroupBox, QSplitter,
-    QCheckBox, QSizePolicy
+    QListView, QAbstractItemView, QGroupBox, QSplitter,
+    QCheckBox, QSizePolicy, QStackedWidget, QTabWidget, QShortcut
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QSignalBlocker
+from PyQt5.QtGui import QKeySequence
 import xlrd
 from matplotlib import font_manager, rcParams
 from matplotlib.font_manager import FontProperties
 import src.module.read_files as read_files
+import src.module.data_cache as data_cache
 import src.module.handle_datas as handle_datas
+import src.module.incremental as incremental
+import src.module.pipeline as pipeline
+import src.module.quality as quality
+import src.module.grid as grid
+import src.module.render as render
+import src.module.session as session
+from src.main.file_list_model import FileListModel
+from src.main.live_view import LiveHeatmapView
 import warnings
 
 # 忽略特定的字体警告
@@ -33,15 +43,71 @@ for file in font_files:
     if os.path.exists(file):
         font_manager.fontManager.addfont(file)
 
+# 对比视图：显示名称 -> (视图键, 颜色条中心)；差值与对数比以0为中心，比值以1为中心
+COMPARE_VIEWS = [
+    ("A", "a", None),
+    ("B", "b", None),
+    ("A−B", "diff", 0),
+    ("A/B", "ratio", 1),
+    ("log10(A/B)", "log_ratio", 0),
+]
+# 对比视图使用的发散型颜色条
+COMPARE_CMAP = "RdBu_r"
+
+# 已渲染热图缓存的容量上限：200 MB
+RENDER_CACHE_BYTES = 200 * 1024 * 1024
+
+# 应用名称（窗口标题）
+APP_TITLE = "热图数据分析工具"
+
+# 决定热图外观的控件，用于渲染缓存键和历史记录恢复
+STATE_LINE_EDITS = [
+    "column_edit", "row_edit", "col_edit", "start_row_edit", "end_row_edit",
+    "cbar_title_edit", "font_size_edit", "array_row_edit", "array_cols_edit", "time_column_edit"
+]
+STATE_COMBOS = [
+    "process_combo", "align_combo", "cmap_combo", "view_combo",
+    "array_reduce_combo", "array_layout_combo", "file_reduce_combo"
+]
+STATE_CHECKBOXES = [
+    "show_x_label_cb", "show_y_label_cb", "show_ticks_cb", "array_mode_cb", "exclude_outliers_cb",
+    "fast_view_cb"
+]
+
+
+class RenderEntry:
+    """一次渲染的结果：画布位图、热图矩阵及恢复时所需的控件状态"""
+    __slots__ = ("label", "state", "matrices", "data", "style", "bitmap")
+
+    def __init__(self, label, state, matrices, data, style, bitmap):
+        self.label = label
+        self.state = state
+        self.matrices = matrices
+        self.data = data
+        self.style = style
+        self.bitmap = bitmap
+
+    @property
+    def nbytes(self):
+        matrices = sum(matrix.nbytes for _, matrix in self.matrices.values())
+        return self.bitmap.nbytes + self.data.nbytes + matrices
+
+
 # 设置支持中文的字体
 plt.rcParams['font.sans-serif'] = ['SimSun', 'Times New Roman']  # 使用宋体作为中文字体
 plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
 
 
 class HeatmapApp(QMainWindow):
-    def __init__(self):
+    """一个数据集的分析界面，可单独作为窗口，也可作为工作区的一个标签页
+
+    Args:
+        render_cache (LRUCache): 已渲染热图的缓存，多个标签页共用同一个；默认单独创建
+    """
+
+    def __init__(self, render_cache=None):
         super().__init__()
-        self.setWindowTitle("热图数据分析工具")
+        self.setWindowTitle(APP_TITLE)
         self.setGeometry(100, 100, 1400, 800)
 
         # 初始化变量
@@ -50,8 +116,31 @@ class HeatmapApp(QMainWindow):
         self.data_matrix = None
         self.selected_folder = ""
         self.current_heatmap_data = None
-        self.current_file_row_counts = {}
         self.min_row_count = 0
+        self.current_heatmap_style = {}
+
+        # 对比模式：B组文件及两组热图矩阵的缓存 {"a"/"b": (缓存键, 矩阵)}
+        self.compare_folder = ""
+        self.compare_files = []
+        self.matrix_cache = {}
+
+        # A组热图按文件保存处理后的行，增删文件时只处理变化的文件
+        self.incremental = incremental.IncrementalMatrix()
+
+        # 探测器阵列模式的布局CSV
+        self.layout_csv_path = ""
+
+        # 已渲染热图的LRU缓存（按内存大小限制），键为完整的参数组合（含文件指纹），可在标签页之间共用
+        if render_cache is None:
+            render_cache = create_render_cache()
+        self.render_cache = render_cache
+        self.pending_render_key = None
+
+        # 选择文件夹后在后台预读数据列
+        self.prefetcher = data_cache.Prefetcher()
+
+        # 网格视图：当前显示的 {axes: GridPanel}，为空表示显示的是单个热图
+        self.grid_axes = {}
 
         # 创建主控件和布局
         main_widget = QWidget()
@@ -73,7 +162,15 @@ class HeatmapApp(QMainWindow):
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setMinimumSize(800, 600)
         self.canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        left_layout.addWidget(self.canvas)
+        self.canvas.mpl_connect("motion_notify_event", self.on_canvas_hover)
+
+        # 快速显示：颜色查找表直接着色，与matplotlib画布切换显示
+        self.live_view = LiveHeatmapView()
+        self.live_view.setMinimumSize(800, 600)
+        self.plot_stack = QStackedWidget()
+        self.plot_stack.addWidget(self.canvas)
+        self.plot_stack.addWidget(self.live_view)
+        left_layout.addWidget(self.plot_stack)
 
         self.splitter.addWidget(left_widget)
 
@@ -86,6 +183,18 @@ class HeatmapApp(QMainWindow):
         control_panel = self.create_control_panel()
         right_layout.addWidget(control_panel)
 
+        # 创建对比模式区域
+        compare_group = self.create_compare_group()
+        right_layout.addWidget(compare_group)
+
+        # 创建探测器阵列模式区域
+        array_group = self.create_array_group()
+        right_layout.addWidget(array_group)
+
+        # 创建网格视图区域
+        grid_group = self.create_grid_group()
+        right_layout.addWidget(grid_group)
+
         # 创建文件列表区域
         file_group = self.create_file_list_group()
         right_layout.addWidget(file_group)
@@ -143,7 +252,7 @@ class HeatmapApp(QMainWindow):
             QPushButton:disabled {
                 background-color: #cccccc;
             }
-            QListWidget {
+            QListView {
                 background-color: white;
                 border: 1px solid #cccccc;
                 border-radius: 3px;
@@ -195,8 +304,16 @@ class HeatmapApp(QMainWindow):
         self.column_edit = QLineEdit()
         self.column_edit.setFixedWidth(50)
         self.column_edit.setToolTip("要读取的数据列索引（0-based）")
+        self.column_edit.editingFinished.connect(self.start_prefetch)
         layout.addWidget(self.column_edit, 1, 1)
 
+        layout.addWidget(QLabel("时间列号:"), 1, 2)
+        self.time_column_edit = QLineEdit()
+        self.time_column_edit.setFixedWidth(50)
+        self.time_column_edit.setToolTip("填写时间列索引（0-based）时，热图每一点对应相同的时间间隔"
+                                         "（仅支持均值缩减、最大值缩减和RMS降采样）；留空则按样本序号等分")
+        layout.addWidget(self.time_column_edit, 1, 3)
+
         # 行 2: 热图行列设置
         layout.addWidget(QLabel("热图行数:"), 2, 0)
         self.row_edit = QLineEdit()
@@ -210,6 +327,15 @@ class HeatmapApp(QMainWindow):
         self.col_edit.setToolTip("生成热图的列数")
         layout.addWidget(self.col_edit, 2, 3)
 
+        self.file_reduce_combo = QComboBox()
+        self.file_reduce_combo.addItem("取前N个文件", "first")
+        self.file_reduce_combo.addItem("分组均值", "mean")
+        self.file_reduce_combo.addItem("分组最大值", "max")
+        self.file_reduce_combo.addItem("分组RMS", "rms")
+        self.file_reduce_combo.setToolTip("文件数多于热图列数时：只使用前N个文件，"
+                                          "或把所有文件依次分为N组，每组归约为热图的一列")
+        layout.addWidget(self.file_reduce_combo, 2, 4, 1, 2)
+
         # 行 3: 数据范围设置
         layout.addWidget(QLabel("数据起始行:"), 3, 0)
         self.start_row_edit = QLineEdit()
@@ -234,15 +360,30 @@ class HeatmapApp(QMainWindow):
         self.auto_end_row_btn.setEnabled(False)
         layout.addWidget(self.auto_end_row_btn, 4, 4, 1, 2)
 
+        # 行 4: 文件长度不一致时的对齐方式
+        layout.addWidget(QLabel("长度对齐:"), 4, 0)
+        self.align_combo = QComboBox()
+        self.align_combo.addItem("截断到最短文件", "cut")
+        self.align_combo.addItem("插值到统一长度", "resample")
+        self.align_combo.setToolTip("截断会丢弃较长文件末尾的数据；插值把每个文件重采样到最长文件的长度")
+        layout.addWidget(self.align_combo, 4, 1, 1, 3)
+
         # 行 5: 数据处理方法
         layout.addWidget(QLabel("数据处理方法:"), 5, 0)
         self.process_combo = QComboBox()
-        self.process_combo.addItems([
-            "标准处理",
-            "数据采样",
-            "RMS降采样",
-            "均值缩减"
-        ])
+        for text, method in [
+            ("标准处理", "standard"),
+            ("数据采样", "sampling"),
+            ("RMS降采样", "rms"),
+            ("均值缩减", "mean"),
+            ("中值缩减", "median"),
+            ("指数移动平均", "ema"),
+            ("小波降噪", "wavelet"),
+            ("Savitzky-Golay平滑", "savgol"),
+            ("PCA降维", "pca"),
+            ("最大值缩减", "max")
+        ]:
+            self.process_combo.addItem(text, method)
         self.process_combo.setToolTip("选择数据处理方法")
         layout.addWidget(self.process_combo, 5, 1, 1, 5)
 
@@ -259,6 +400,12 @@ class HeatmapApp(QMainWindow):
         self.cmap_combo.setToolTip("选择热图颜色方案")
         layout.addWidget(self.cmap_combo, 6, 1, 1, 3)
 
+        self.fast_view_cb = QCheckBox("快速显示")
+        self.fast_view_cb.setChecked(False)
+        self.fast_view_cb.setToolTip("用颜色查找表直接着色显示（无坐标轴和颜色条），适合实时刷新；保存图片时仍完整绘制")
+        self.fast_view_cb.toggled.connect(self.show_current_view)
+        layout.addWidget(self.fast_view_cb, 6, 4, 1, 2)
+
         # 行 7: 坐标显示控制
         self.show_x_label_cb = QCheckBox("显示X轴标题")
         self.show_x_label_cb.setChecked(False)
@@ -288,6 +435,11 @@ class HeatmapApp(QMainWindow):
         self.font_size_edit.setToolTip("设置基础字体大小")
         layout.addWidget(self.font_size_edit, 9, 1)
 
+        self.exclude_outliers_cb = QCheckBox("自动排除异常文件")
+        self.exclude_outliers_cb.setChecked(False)
+        self.exclude_outliers_cb.setToolTip("对齐前排除过短、含非数值、饱和或噪声异常的文件（在文件列表中以⚠标记）")
+        layout.addWidget(self.exclude_outliers_cb, 9, 2, 1, 4)
+
         # 行 10: 绘图按钮和保存按钮
         btn_layout = QHBoxLayout()
 
@@ -305,6 +457,19 @@ class HeatmapApp(QMainWindow):
         self.save_btn.setMinimumHeight(40)
         btn_layout.addWidget(self.save_btn)
 
+        # 会话按钮
+        self.save_session_btn = QPushButton("保存会话")
+        self.save_session_btn.setToolTip("保存文件列表、全部参数和文件指纹，可选嵌入已读取的数据")
+        self.save_session_btn.clicked.connect(self.save_session)
+        self.save_session_btn.setMinimumHeight(40)
+        btn_layout.addWidget(self.save_session_btn)
+
+        self.open_session_btn = QPushButton("打开会话")
+        self.open_session_btn.setToolTip("恢复保存的会话，只重新读取改动过的文件")
+        self.open_session_btn.clicked.connect(self.open_session)
+        self.open_session_btn.setMinimumHeight(40)
+        btn_layout.addWidget(self.open_session_btn)
+
         layout.addLayout(btn_layout, 10, 0, 1, 6)
 
         # 行 11: 状态标签
@@ -312,8 +477,107 @@ class HeatmapApp(QMainWindow):
         self.status_label.setStyleSheet("color: #666666; font-style: italic; font-family: 'Times New Roman';")
         layout.addWidget(self.status_label, 11, 0, 1, 6)
 
+        # 行 12: 最近绘制的热图
+        layout.addWidget(QLabel("历史记录:"), 12, 0)
+        self.history_combo = QComboBox()
+        self.history_combo.setToolTip("最近绘制的热图参数组合，选择后直接从缓存恢复")
+        self.history_combo.setEnabled(False)
+        self.history_combo.activated.connect(self.restore_history)
+        layout.addWidget(self.history_combo, 12, 1, 1, 5)
+
         return panel
 
+    def create_compare_group(self):
+        """创建对比模式区域"""
+        group = QGroupBox("对比模式")
+        layout = QGridLayout(group)
+        layout.setSpacing(10)
+
+        self.compare_btn = QPushButton("选择对比文件夹(B)")
+        self.compare_btn.setToolTip("B组使用与当前文件列表(A)相同的处理参数")
+        self.compare_btn.clicked.connect(self.select_compare_folder)
+        layout.addWidget(self.compare_btn, 0, 0, 1, 2)
+
+        self.compare_label = QLabel("未选择对比文件夹")
+        self.compare_label.setStyleSheet("color: gray; font-size: 10px; font-family: 'Times New Roman';")
+        layout.addWidget(self.compare_label, 0, 2, 1, 2)
+
+        self.compare_clear_btn = QPushButton("取消对比")
+        self.compare_clear_btn.clicked.connect(self.clear_compare_folder)
+        self.compare_clear_btn.setEnabled(False)
+        layout.addWidget(self.compare_clear_btn, 0, 4, 1, 2)
+
+        layout.addWidget(QLabel("显示:"), 1, 0)
+        self.view_combo = QComboBox()
+        for text, view, _ in COMPARE_VIEWS:
+            self.view_combo.addItem(text, view)
+        self.view_combo.setToolTip("在A、B及其差值/比值之间切换，使用已缓存的矩阵，无需重新读取")
+        self.view_combo.setEnabled(False)
+        self.view_combo.currentIndexChanged.connect(self.show_current_view)
+        layout.addWidget(self.view_combo, 1, 1, 1, 5)
+
+        return group
+
+    def create_array_group(self):
+        """创建探测器阵列模式区域"""
+        group = QGroupBox("探测器阵列模式")
+        layout = QGridLayout(group)
+        layout.setSpacing(10)
+
+        self.array_mode_cb = QCheckBox("启用阵列模式")
+        self.array_mode_cb.setChecked(False)
+        self.array_mode_cb.setToolTip("每个文件对应一个像素：把文件数据归约为一个值并按布局放到像素网格上")
+        layout.addWidget(self.array_mode_cb, 0, 0, 1, 2)
+
+        layout.addWidget(QLabel("像素值:"), 0, 2)
+        self.array_reduce_combo = QComboBox()
+        self.array_reduce_combo.addItem("均值", "mean")
+        self.array_reduce_combo.addItem("峰值", "peak")
+        self.array_reduce_combo.addItem("指定行的值", "value")
+        layout.addWidget(self.array_reduce_combo, 0, 3, 1, 2)
+
+        self.array_row_edit = QLineEdit("1")
+        self.array_row_edit.setFixedWidth(50)
+        self.array_row_edit.setToolTip("像素值为“指定行的值”时读取的行号")
+        layout.addWidget(self.array_row_edit, 0, 5)
+
+        layout.addWidget(QLabel("像素布局:"), 1, 0)
+        self.array_layout_combo = QComboBox()
+        self.array_layout_combo.addItem("文件名(R行C列)", "name")
+        self.array_layout_combo.addItem("文件顺序", "order")
+        self.array_layout_combo.addItem("布局CSV", "csv")
+        self.array_layout_combo.setToolTip("文件名如 R3C12.xls；按顺序时逐行排布；CSV需包含 file,row,col 三列")
+        layout.addWidget(self.array_layout_combo, 1, 1, 1, 2)
+
+        self.array_cols_edit = QLineEdit("64")
+        self.array_cols_edit.setFixedWidth(50)
+        self.array_cols_edit.setToolTip("按文件顺序排布时每行的像素数")
+        layout.addWidget(self.array_cols_edit, 1, 3)
+
+        self.layout_csv_btn = QPushButton("选择布局CSV")
+        self.layout_csv_btn.clicked.connect(self.select_layout_csv)
+        layout.addWidget(self.layout_csv_btn, 1, 4, 1, 2)
+
+        return group
+
+    def create_grid_group(self):
+        """创建多文件夹网格视图区域"""
+        group = QGroupBox("网格视图")
+        layout = QGridLayout(group)
+        layout.setSpacing(10)
+
+        self.grid_btn = QPushButton("选择父文件夹并绘制网格")
+        self.grid_btn.setToolTip("父文件夹下每个包含Excel文件的子文件夹绘制为一个小图，使用当前处理参数")
+        self.grid_btn.clicked.connect(self.plot_folder_grid)
+        layout.addWidget(self.grid_btn, 0, 0, 1, 3)
+
+        self.grid_shared_cb = QCheckBox("统一颜色范围")
+        self.grid_shared_cb.setChecked(True)
+        self.grid_shared_cb.setToolTip("所有小图使用相同的颜色范围和一个共用的颜色条")
+        layout.addWidget(self.grid_shared_cb, 0, 3, 1, 3)
+
+        return group
+
     def get_font_sizes(self):
         """根据基础字体大小计算各元素的字体大小"""
         try:
@@ -349,12 +613,23 @@ class HeatmapApp(QMainWindow):
         self.min_row_label.setStyleSheet("color: #e84a4a; font-weight: bold; font-family: 'Times New Roman';")
         file_count_layout.addWidget(self.min_row_label)
 
+        # 异常文件标签
+        file_count_layout.addSpacing(20)
+        file_count_layout.addWidget(QLabel("异常文件:"))
+        self.quality_label = QLabel("-")
+        self.quality_label.setStyleSheet("color: #e84a4a; font-weight: bold; font-family: 'Times New Roman';")
+        self.quality_label.setToolTip("最近一次绘制时按统计量判定的异常文件数，悬停文件可查看统计量")
+        file_count_layout.addWidget(self.quality_label)
+
         file_count_layout.addStretch()
         layout.addLayout(file_count_layout)
 
         # 文件列表
-        self.file_list = QListWidget()
+        self.file_model = FileListModel(self)
+        self.file_list = QListView()
+        self.file_list.setModel(self.file_model)
         self.file_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.file_list.setUniformItemSizes(True)
         self.file_list.setMinimumHeight(300)
         layout.addWidget(self.file_list)
 
@@ -376,29 +651,86 @@ class HeatmapApp(QMainWindow):
         layout.addLayout(btn_layout)
 
         # 连接选择变化信号
-        self.file_list.itemSelectionChanged.connect(self.update_button_state)
-        self.file_list.itemSelectionChanged.connect(self.update_row_info)
+        self.file_list.selectionModel().selectionChanged.connect(self.update_button_state)
+        self.file_list.selectionModel().selectionChanged.connect(self.update_row_info)
 
         return group
 
+    def select_compare_folder(self):
+        """选择对比文件夹(B)"""
+        folder = QFileDialog.getExistingDirectory(
+            self, "选择对比用的Excel文件夹", ""
+        )
+
+        if not folder:
+            return
+
+        files_info = read_files.get_excel_files_info(folder)
+        if not files_info:
+            QMessageBox.warning(self, "对比文件夹", "对比文件夹中未找到Excel文件")
+            return
+
+        self.compare_folder = folder
+        self.compare_files = [file_path for _, file_path, _ in files_info]
+        self.matrix_cache.pop("b", None)
+        self.compare_label.setText(f"{os.path.basename(folder)} ({len(self.compare_files)} 个)")
+        self.compare_clear_btn.setEnabled(True)
+        self.status_label.setText("已选择对比文件夹，请重新绘制热图")
+
+    def clear_compare_folder(self):
+        """退出对比模式"""
+        self.compare_folder = ""
+        self.compare_files = []
+        self.matrix_cache.pop("b", None)
+        self.compare_label.setText("未选择对比文件夹")
+        self.compare_clear_btn.setEnabled(False)
+        self.view_combo.setCurrentIndex(0)
+        self.view_combo.setEnabled(False)
+
+    def select_layout_csv(self):
+        """选择探测器阵列的布局CSV"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择布局CSV", "", "CSV 文件 (*.csv);;所有文件 (*)"
+        )
+
+        if not file_path:
+            return
+
+        self.layout_csv_path = file_path
+        self.array_layout_combo.setCurrentIndex(self.array_layout_combo.findData("csv"))
+        self.layout_csv_btn.setToolTip(file_path)
+        self.status_label.setText(f"已选择布局CSV: {os.path.basename(file_path)}")
+
     def update_button_state(self):
         """根据选择状态更新按钮状态"""
-        has_selection = len(self.file_list.selectedItems()) > 0
+        has_selection = self.file_list.selectionModel().hasSelection()
         self.remove_btn.setEnabled(has_selection)
 
     def update_row_info(self):
         """更新行数信息"""
-        selected_items = self.file_list.selectedItems()
-        if not selected_items:
-            return
+        selection = self.file_list.selectionModel()
+        current = selection.currentIndex()
+        if not selection.isSelected(current):
+            selected_rows = selection.selectedRows()
+            if not selected_rows:
+                return
+            current = selected_rows[0]
 
-        # 只取第一个选中的文件
-        item = selected_items[0]
-        file_name = item.data(Qt.UserRole)
+        # 只取一个选中的文件
+        row_count = self.file_model.row_count_at(current.row())
+        self.row_info_label.setText(f"文件行数: {row_count}")
 
-        if file_name in self.current_file_row_counts:
-            row_count = self.current_file_row_counts[file_name]
-            self.row_info_label.setText(f"文件行数: {row_count}")
+    def start_prefetch(self):
+        """在后台预读当前文件列表的数据列（整列），点击绘制时多数文件已在缓存中"""
+        files = self.get_selected_files()
+        try:
+            column_index = int(self.column_edit.text())
+        except ValueError:
+            return
+        if files:
+            self.prefetcher.start(files, column_index)
+        else:
+            self.prefetcher.cancel()
 
     def set_min_end_row(self):
         """设置结束行为最小行数"""
@@ -406,6 +738,11 @@ class HeatmapApp(QMainWindow):
             self.end_row_edit.setText(str(self.min_row_count))
             self.status_label.setText(f"已设置结束行为最小行数: {self.min_row_count}")
 
+    def update_window_title(self):
+        """窗口标题显示当前文件夹名（作为标签页时即标签名）"""
+        name = os.path.basename(self.selected_folder)
+        self.setWindowTitle(f"{name} - {APP_TITLE}" if name else APP_TITLE)
+
     def select_folder(self):
         """选择文件夹"""
         folder = QFileDialog.getExistingDirectory(
@@ -417,6 +754,7 @@ class HeatmapApp(QMainWindow):
 
         self.selected_folder = folder
         self.folder_label.setText(os.path.basename(folder))
+        self.update_window_title()
         self.status_label.setText("正在扫描文件夹中的Excel文件...")
 
         # 扫描文件夹中的Excel文件
@@ -428,10 +766,10 @@ class HeatmapApp(QMainWindow):
             return
 
         # 清空文件列表
-        self.file_list.clear()
-        self.current_file_row_counts = {}
+        self.file_model.clear()
         self.min_row_count = 0
         self.min_row_label.setText("-")
+        self.quality_label.setText("-")
 
         try:
             # 获取文件信息
@@ -444,17 +782,11 @@ class HeatmapApp(QMainWindow):
                 self.auto_end_row_btn.setEnabled(False)
                 return
 
-            # 用于计算最小行数的列表
-            row_counts = []
-
             # 添加到文件列表
-            for file_name, file_path, row_count in files_info:
-                self.current_file_row_counts[file_path] = row_count
-                row_counts.append(row_count)
-
-                item = QListWidgetItem(f"{file_name} ({row_count}行)")
-                item.setData(Qt.UserRole, file_path)  # 存储文件路径
-                self.file_list.addItem(item)
+            self.file_model.set_files(
+                [file_path for _, file_path, _ in files_info],
+                [row_count for _, _, row_count in files_info]
+            )
 
             file_count = len(files_info)
             self.file_count_label.setText(f"{file_count} 个")
@@ -463,10 +795,9 @@ class HeatmapApp(QMainWindow):
             self.clear_btn.setEnabled(True)
             self.auto_end_row_btn.setEnabled(True)
 
-            # 计算最小行数
-            if row_counts:
-                self.min_row_count = min(row_counts)
-                self.min_row_label.setText(str(self.min_row_count))
+            # 最小行数
+            self.min_row_count = self.file_model.min_row_count
+            self.min_row_label.setText(str(self.min_row_count))
 
             # 设置起始行和结束行的默认值
             self.start_row_edit.setText("1")
@@ -475,48 +806,48 @@ class HeatmapApp(QMainWindow):
             else:
                 self.end_row_edit.setText("50")
 
+            # 开始后台预读
+            self.start_prefetch()
+
         except Exception as e:
             QMessageBox.critical(self, "扫描错误", f"扫描文件夹时出错:\n{str(e)}")
             self.status_label.setText("扫描失败")
 
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_items = self.file_list.selectedItems()
-        if not selected_items:
+        selected_rows = [index.row() for index in self.file_list.selectionModel().selectedRows()]
+        if not selected_rows:
             return
 
-        # 更新最小行数
-        remaining_row_counts = []
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            if item not in selected_items:
-                file_name = item.data(Qt.UserRole)
-                if file_name in self.current_file_row_counts:
-                    remaining_row_counts.append(self.current_file_row_counts[file_name])
-
-        # 移除选中的文件
-        for item in selected_items:
-            row = self.file_list.row(item)
-            self.file_list.takeItem(row)
+        # 一次性移除选中的文件，模型同时增量更新最小行数
+        removed = self.file_model.remove_rows(selected_rows)
 
         # 更新文件计数和最小行数
-        file_count = self.file_list.count()
+        self.update_file_count_labels()
+
+        self.update_button_state()
+        self.status_label.setText(f"已移除 {removed} 个文件")
+        self.start_prefetch()
+
+    def update_file_count_labels(self):
+        """根据文件列表更新文件计数和最小行数"""
+        file_count = self.file_model.file_count()
         self.file_count_label.setText(f"{file_count} 个")
 
-        if remaining_row_counts:
-            self.min_row_count = min(remaining_row_counts)
+        if file_count:
+            self.min_row_count = self.file_model.min_row_count
             self.min_row_label.setText(str(self.min_row_count))
         else:
             self.min_row_count = 0
             self.min_row_label.setText("-")
 
-        self.status_label.setText(f"已移除 {len(selected_items)} 个文件")
-
     def clear_file_list(self):
         """清除所有文件"""
-        self.file_list.clear()
+        self.prefetcher.cancel()
+        self.file_model.clear()
         self.file_count_label.setText("0 个")
         self.min_row_label.setText("-")
+        self.quality_label.setText("-")
         self.min_row_count = 0
         self.status_label.setText("文件列表已清空")
         self.plot_btn.setEnabled(False)
@@ -525,13 +856,35 @@ class HeatmapApp(QMainWindow):
 
     def get_selected_files(self):
         """获取选择的文件列表（完整路径）"""
-        files = []
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            file_name = item.data(Qt.UserRole)
-            file_path = os.path.join(self.selected_folder, file_name)
-            files.append(file_path)
-        return files
+        return self.file_model.paths()
+
+    def get_pipeline_params(self):
+        """从控制面板读取处理参数（输入无效时抛出ValueError）"""
+        return pipeline.PipelineParams(
+            column_index=int(self.column_edit.text()),
+            start_row=int(self.start_row_edit.text()),
+            end_row=int(self.end_row_edit.text()),
+            length=int(self.row_edit.text()),
+            data_groups=int(self.col_edit.text()),
+            method=self.process_combo.currentData(),
+            align=self.align_combo.currentData(),
+            exclude=self.exclude_outliers_cb.isChecked(),
+            time_column=int(self.time_column_edit.text()) if self.time_column_edit.text().strip() else None,
+            file_reduce=self.file_reduce_combo.currentData()
+        )
+
+    def get_pixel_map_params(self):
+        """从控制面板读取探测器阵列模式的参数（输入无效时抛出ValueError）"""
+        return pipeline.PixelMapParams(
+            column_index=int(self.column_edit.text()),
+            start_row=int(self.start_row_edit.text()),
+            end_row=int(self.end_row_edit.text()),
+            reduce=self.array_reduce_combo.currentData(),
+            value_row=int(self.array_row_edit.text()),
+            layout=self.array_layout_combo.currentData(),
+            grid_cols=int(self.array_cols_edit.text()),
+            layout_csv=self.layout_csv_path
+        )
 
     def prepare_data(self):
         """准备热图数据，返回处理后的矩阵"""
@@ -542,68 +895,26 @@ class HeatmapApp(QMainWindow):
 
         try:
             # 获取参数
-            length = int(self.row_edit.text())
-            data_groups = int(self.col_edit.text())
-            column_index = int(self.column_edit.text())
-            start_row = int(self.start_row_edit.text())
-            end_row = int(self.end_row_edit.text())
-
-            if start_row >= end_row:
-                QMessageBox.warning(self, "参数错误", "起始行必须小于结束行")
-                return None
-
-            # 读取数据
-            self.raw_data = read_files.read_column_from_xls(
-                files,
-                column_index,
-                start_row=start_row,
-                end_row=end_row
-            )
+            if self.array_mode_cb.isChecked():
+                params = self.get_pixel_map_params()
+            else:
+                params = self.get_pipeline_params()
 
-            if not self.raw_data:
-                QMessageBox.warning(self, "数据错误", "未能从文件中读取有效数据")
-                return None
-
-            # 处理数据
-            self.cut_current_data = handle_datas.cut_data(self.raw_data)
-            self.cut_current_data = handle_datas.Normalized_data(self.cut_current_data)
-
-            # 检查数据组数是否足够
-            if len(self.cut_current_data) < data_groups:
-                QMessageBox.warning(
-                    self, "数据不足",
-                    f"需要 {data_groups} 组数据，但只有 {len(self.cut_current_data)} 组可用"
-                )
-                return None
-
-            # 根据选择的方法处理数据
-            method_index = self.process_combo.currentIndex()
-            processed_data = []
-
-            if method_index == 0:  # 标准处理
-                processed_data = [handle_datas.process_data(data, length) for data in self.cut_current_data]
-            elif method_index == 1:  # 数据采样
-                processed_data = [handle_datas.data_sampling(data, length) for data in self.cut_current_data]
-            elif method_index == 2:  # RMS降采样
-                processed_data = [handle_datas.rms_downsample(data, length) for data in self.cut_current_data]
-            elif method_index == 3:  # 均值缩减
-                processed_data = [handle_datas.reduce_data(data, length, method='mean') for data in
-                                  self.cut_current_data]
-
-            # 更新数据矩阵
-            self.data_matrix = np.zeros((0, length))  # 初始化为空矩阵
-
-            # 使用修改后的update_heatmap函数
-            for data in processed_data[:data_groups]:
-                self.data_matrix = handle_datas.update_heatmap(
-                    self.data_matrix,
-                    data,
-                    length,
-                    data_groups
-                )
+            # 读取并处理数据（普通热图增量更新，只处理新加入的文件）
+            if isinstance(params, pipeline.PipelineParams):
+                result = self.incremental.update(files, params)
+            else:
+                result = pipeline.build_matrix(files, params)
+            self.raw_data = result.raw
+            self.cut_current_data = result.aligned
+            self.data_matrix = result.matrix
+            self.matrix_cache["a"] = ((params, tuple(files)), self.data_matrix)
+            self.update_file_quality(files, result)
 
             return self.data_matrix
 
+        except pipeline.PipelineError as e:
+            QMessageBox.warning(self, e.title, e.message)
         except ValueError:
             QMessageBox.warning(self, "输入错误", "请输入有效的数值")
         except Exception as e:
@@ -613,11 +924,122 @@ class HeatmapApp(QMainWindow):
 
         return None
 
-    def draw_heatmap(self, ax, data, title="Hot Image", is_save=False):
+    def update_file_quality(self, files, result):
+        """在文件列表中显示本次读取的统计量和异常标记"""
+        paths = result.paths
+        loaded = set(paths)
+        errors = result.errors or {}
+        failed = {f: errors.get(f, "") for f in files if f not in loaded}
+        self.file_model.set_quality(paths, result.stats, quality.find_outliers(result.stats), failed)
+
+        flagged = self.file_model.flagged_count()
+        if result.excluded:
+            self.quality_label.setText(f"{flagged} 个（已排除 {len(result.excluded)} 个）")
+        else:
+            self.quality_label.setText(f"{flagged} 个")
+
+    def prepare_compare_data(self):
+        """用与A相同的参数处理对比文件夹(B)，结果存入缓存"""
+        self.matrix_cache.pop("b", None)
+        if not self.compare_files:
+            return None
+
+        params, _ = self.matrix_cache["a"][0]
+        try:
+            result = pipeline.build_matrix(self.compare_files, params)
+        except pipeline.PipelineError as e:
+            QMessageBox.warning(self, f"对比数据: {e.title}", e.message)
+            return None
+        except Exception as e:
+            QMessageBox.critical(self, "数据处理错误", f"处理对比数据时出错:\n{str(e)}")
+            return None
+
+        self.matrix_cache["b"] = ((params, tuple(self.compare_files)), result.matrix)
+        return result.matrix
+
+    def get_view_data(self):
+        """根据对比视图选择，从缓存中取出要显示的矩阵和绘图样式"""
+        view = self.view_combo.currentData()
+        matrix_a = self.matrix_cache["a"][1]
+        if view == "a" or "b" not in self.matrix_cache:
+            return matrix_a, {}
+
+        matrix_b = self.matrix_cache["b"][1]
+        if view == "b":
+            return matrix_b, {}
+
+        center = next(c for _, v, c in COMPARE_VIEWS if v == view)
+        data = handle_datas.compare_matrices(matrix_a, matrix_b, view)
+        return data, {"cmap": COMPARE_CMAP, "center": center}
+
+    def plot_folder_grid(self):
+        """选择父文件夹，把各子文件夹并行处理后以小图网格显示"""
+        parent = QFileDialog.getExistingDirectory(self, "选择包含多个数据文件夹的父文件夹", "")
+        if not parent:
+            return
+
+        folders = grid.list_data_folders(parent)
+        if not folders:
+            QMessageBox.warning(self, "数据缺失", "该文件夹下没有包含Excel文件的子文件夹")
+            return
+        self.draw_folder_grid(folders)
+
+    def draw_folder_grid(self, folders):
+        """处理并绘制多个文件夹的网格视图"""
+        try:
+            if self.array_mode_cb.isChecked():
+                params = self.get_pixel_map_params()
+            else:
+                params = self.get_pipeline_params()
+        except ValueError:
+            QMessageBox.warning(self, "输入错误", "请输入有效的数值")
+            return
+
+        self.status_label.setText(f"正在处理 {len(folders)} 个文件夹...")
+        QApplication.processEvents()
+        panels = grid.prepare_panels(grid.folder_panels(folders, params))
+
+        try:
+            axes = render.draw_heatmap_grid(
+                self.figure,
+                [panel.matrix for panel in panels],
+                [panel.label for panel in panels],
+                cmap=self.cmap_combo.currentText(),
+                shared_scale=self.grid_shared_cb.isChecked(),
+                cbar_title=self.cbar_title_edit.text(),
+                font_size=self.get_font_sizes()["tick_label"]
+            )
+            self.plot_stack.setCurrentWidget(self.canvas)
+            self.canvas.draw()
+        except Exception as e:
+            QMessageBox.critical(self, "绘图错误", f"绘制网格视图时出错:\n{str(e)}")
+            return
+
+        self.grid_axes = dict(zip(axes, panels))
+        self.save_btn.setEnabled(True)
+        failed = sum(1 for panel in panels if panel.error)
+        message = f"已绘制网格视图: {len(panels)} 个文件夹"
+        if failed:
+            message += f"，{failed} 个处理失败（悬停查看原因）"
+        self.status_label.setText(message)
+
+    def on_canvas_hover(self, event):
+        """网格视图中鼠标悬停在小图上时显示其来源文件夹"""
+        if not self.grid_axes:
+            return
+        panel = self.grid_axes.get(event.inaxes)
+        if panel is None:
+            self.canvas.setToolTip("")
+            return
+        tip = panel.source if panel.error is None else f"{panel.source}\n{panel.error}"
+        self.canvas.setToolTip(tip)
+        self.status_label.setText(panel.source)
+
+    def draw_heatmap(self, ax, data, title="Hot Image", is_save=False, cmap=None, center=None):
         """在给定的axes上绘制热图（通用绘图函数）"""
         # 获取配置参数
         font_sizes = self.get_font_sizes()
-        cmap = self.cmap_combo.currentText()
+        cmap = cmap or self.cmap_combo.currentText()
         cbar_title = self.cbar_title_edit.text()
         show_ticks = self.show_ticks_cb.isChecked()
 
@@ -648,6 +1070,7 @@ class HeatmapApp(QMainWindow):
             data,
             ax=ax,
             cmap=cmap,
+            center=center,
             annot=False,
             fmt=".2f",
             xticklabels=show_ticks,
@@ -719,21 +1142,189 @@ class HeatmapApp(QMainWindow):
 
         return heatmap
 
+    def get_control_state(self):
+        """记录决定热图外观的全部控件状态"""
+        return {
+            "texts": {name: getattr(self, name).text() for name in STATE_LINE_EDITS},
+            "combos": {name: getattr(self, name).currentIndex() for name in STATE_COMBOS},
+            "checks": {name: getattr(self, name).isChecked() for name in STATE_CHECKBOXES},
+            "layout_csv_path": self.layout_csv_path,
+        }
+
+    def set_control_state(self, state):
+        """恢复控件状态（不触发信号）"""
+        blockers = [QSignalBlocker(getattr(self, name))
+                    for name in STATE_LINE_EDITS + STATE_COMBOS + STATE_CHECKBOXES]
+        for name, text in state["texts"].items():
+            getattr(self, name).setText(text)
+        for name, index in state["combos"].items():
+            getattr(self, name).setCurrentIndex(index)
+        for name, checked in state["checks"].items():
+            getattr(self, name).setChecked(checked)
+        for blocker in blockers:
+            blocker.unblock()
+        self.layout_csv_path = state["layout_csv_path"]
+
+    def get_render_key(self):
+        """渲染缓存键：处理参数、A/B两组文件的指纹、当前视图及绘图选项
+
+        参数无效或文件无法访问时返回None
+        """
+        try:
+            if self.array_mode_cb.isChecked():
+                params = self.get_pixel_map_params()
+            else:
+                params = self.get_pipeline_params()
+            files = tuple(data_cache.file_fingerprint(f) for f in self.get_selected_files())
+            compare = tuple(data_cache.file_fingerprint(f) for f in self.compare_files)
+            # 布局CSV被修改后不能再使用缓存的位图
+            layout = None
+            if isinstance(params, pipeline.PixelMapParams) and params.layout == "csv":
+                layout = data_cache.file_fingerprint(self.layout_csv_path)
+        except (ValueError, OSError):
+            return None
+
+        state = self.get_control_state()
+        options = tuple(sorted(state["texts"].items())) + tuple(sorted(state["checks"].items()))
+        return (params, files, compare, layout, self.view_combo.currentData(),
+                self.cmap_combo.currentText(), options)
+
+    def restore_render(self, entry):
+        """从渲染缓存恢复热图：画布尺寸未变时直接贴位图，否则用缓存的矩阵重绘；勾选快速显示时用颜色查找表显示"""
+        self.matrix_cache = dict(entry.matrices)
+        self.current_heatmap_data = entry.data
+        self.current_heatmap_style = entry.style
+        self.view_combo.setEnabled("b" in self.matrix_cache)
+
+        if self.fast_view_cb.isChecked():
+            self.show_fast_view(entry.data, entry.style)
+            self.status_label.setText(f"已从缓存恢复热图: {entry.label}")
+            return
+
+        width, height = self.canvas.get_width_height(physical=True)
+        if entry.bitmap.shape[:2] != (height, width):
+            self.pending_render_key = self.get_render_key()
+            self.render_heatmap(entry.data, entry.style)
+            return
+
+        # 图形中放入同一位图，窗口缩放等后续重绘时保持一致；
+        # 当前显示则直接写入渲染缓冲区，省去一次完整的Agg重绘
+        self.grid_axes = {}
+        self.canvas.setToolTip("")
+        self.plot_stack.setCurrentWidget(self.canvas)
+        self.figure.clear()
+        self.figure.figimage(entry.bitmap, resize=False)
+        np.asarray(self.canvas.get_renderer().buffer_rgba())[...] = entry.bitmap
+        self.canvas.update()
+        self.save_btn.setEnabled(True)
+        self.status_label.setText(f"已从缓存恢复热图: {entry.label}")
+
+    def store_render(self):
+        """把当前画布位图存入渲染缓存，并刷新历史记录"""
+        key = self.pending_render_key
+        self.pending_render_key = None
+        if key is None or self.current_heatmap_data is None:
+            return
+
+        bitmap = np.asarray(self.canvas.buffer_rgba()).copy()
+        label = (f"{self.process_combo.currentText()} {self.row_edit.text()}x{self.col_edit.text()} "
+                 f"{self.cmap_combo.currentText()} [{self.view_combo.currentText()}]")
+        if self.array_mode_cb.isChecked():
+            label = f"阵列-{self.array_reduce_combo.currentText()} {self.cmap_combo.currentText()}"
+        entry = RenderEntry(label, self.get_control_state(), dict(self.matrix_cache),
+                            self.current_heatmap_data, self.current_heatmap_style, bitmap)
+        self.render_cache.put(key, entry)
+        self.update_history_combo()
+
+    def update_history_combo(self):
+        """按最近使用顺序列出渲染缓存中的热图"""
+        self.history_combo.clear()
+        for key, entry in reversed(self.render_cache.items()):
+            self.history_combo.addItem(entry.label, key)
+        self.history_combo.setEnabled(self.history_combo.count() > 0)
+
+    def restore_history(self, index):
+        """选择历史记录：恢复当时的参数并从缓存重绘"""
+        key = self.history_combo.itemData(index)
+        entry = self.render_cache.get(key) if key is not None else None
+        if entry is None:
+            return
+
+        self.set_control_state(entry.state)
+        self.restore_render(entry)
+
     def plot_heatmap(self):
         """在界面上绘制热图"""
+        # 参数组合已渲染过且文件未改动时直接从缓存恢复
+        entry = self.render_cache.get(self.get_render_key())
+        if entry is not None:
+            self.restore_render(entry)
+            return
+
         data = self.prepare_data()
         if data is None:
             return
 
+        # 对比模式下同时处理B组
+        has_compare = self.prepare_compare_data() is not None
+        self.view_combo.setEnabled(has_compare)
+        if not has_compare:
+            self.view_combo.setCurrentIndex(0)
+
+        self.show_current_view()
+
+    def show_current_view(self):
+        """绘制当前对比视图（直接使用缓存的矩阵）"""
+        if "a" not in self.matrix_cache:
+            return
+
+        try:
+            data, style = self.get_view_data()
+        except ValueError as e:
+            QMessageBox.warning(self, "对比错误", str(e))
+            return
+
+        if self.fast_view_cb.isChecked():
+            self.show_fast_view(data, style)
+            return
+
+        # 切换视图时也先查渲染缓存
+        key = self.get_render_key()
+        entry = self.render_cache.get(key)
+        if entry is not None:
+            self.restore_render(entry)
+            return
+
+        self.pending_render_key = key
+        self.render_heatmap(data, style)
+
+    def show_fast_view(self, data, style):
+        """通过颜色查找表快速显示热图（不经过matplotlib）"""
+        self.current_heatmap_data = data.copy()
+        self.current_heatmap_style = style
+        self.grid_axes = {}
+        self.live_view.set_data(data, cmap=style.get("cmap") or self.cmap_combo.currentText(),
+                                center=style.get("center"))
+        self.plot_stack.setCurrentWidget(self.live_view)
+        self.save_btn.setEnabled(True)
+        self.status_label.setText(
+            f"已快速显示热图: 方法={self.process_combo.currentText()}, 文件={len(self.get_selected_files())}个")
+
+    def render_heatmap(self, data, style):
+        """用seaborn完整绘制热图"""
         self.current_heatmap_data = data.copy()
+        self.current_heatmap_style = style
 
+        self.grid_axes = {}
+        self.canvas.setToolTip("")
+        self.plot_stack.setCurrentWidget(self.canvas)
         try:
             # 清除之前的绘图
             self.figure.clear()
             self.ax = self.figure.add_subplot(111)
 
             # 绘制热图
-            self.draw_heatmap(self.ax, data, "热图")
+            self.draw_heatmap(self.ax, data, "热图", **style)
 
             # 调整布局
             self.figure.tight_layout(pad=2.0)
@@ -763,6 +1354,9 @@ class HeatmapApp(QMainWindow):
             # 更新画布
             self.canvas.draw()
 
+            # 存入渲染缓存
+            self.store_render()
+
             # 启用保存按钮
             self.save_btn.setEnabled(True)
             self.status_label.setText(
@@ -771,9 +1365,116 @@ class HeatmapApp(QMainWindow):
         except Exception as e:
             print(f"最终更新错误: {str(e)}")
 
+    def save_session(self):
+        """保存当前会话"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "保存会话", "热图会话.npz", "会话文件 (*.npz);;所有文件 (*)"
+        )
+        if not file_path:
+            return
+
+        embed = QMessageBox.question(
+            self, "保存会话", "是否在会话文件中嵌入已读取的数据？\n（文件更大，打开时无需重新读取未改动的文件）",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+        ) == QMessageBox.Yes
+
+        # 只保存与当前参数和文件一致的热图矩阵
+        files = self.get_selected_files()
+        matrices = {}
+        try:
+            column_index = int(self.column_edit.text())
+            params = self.get_pixel_map_params() if self.array_mode_cb.isChecked() else self.get_pipeline_params()
+        except ValueError:
+            column_index = None
+        else:
+            current_keys = {"a": (params, tuple(files)), "b": (params, tuple(self.compare_files))}
+            matrices = {name: matrix for name, (key, matrix) in self.matrix_cache.items()
+                        if key == current_keys.get(name)}
+
+        state = {
+            "controls": self.get_control_state(),
+            "folder": self.selected_folder,
+            "compare_folder": self.compare_folder,
+        }
+        try:
+            session.save_session(file_path, state, files, self.file_model.row_counts(),
+                                 self.compare_files, column_index, matrices, embed_columns=embed)
+        except Exception as e:
+            QMessageBox.critical(self, "保存错误", f"保存会话时出错:\n{str(e)}")
+            return
+        self.status_label.setText(f"会话已保存到: {os.path.basename(file_path)}")
+
+    def open_session(self, file_path=None):
+        """打开会话：恢复文件列表和参数；文件都未改动且保存了矩阵时直接绘制，否则只重新读取改动过的文件"""
+        if not file_path:
+            file_path, _ = QFileDialog.getOpenFileName(
+                self, "打开会话", "", "会话文件 (*.npz);;所有文件 (*)"
+            )
+        if not file_path:
+            return
+
+        try:
+            restored = session.load_session(file_path)
+        except session.SessionError as e:
+            QMessageBox.warning(self, "会话错误", str(e))
+            return
+
+        self.prefetcher.cancel()
+        self.matrix_cache = {}
+        state = restored.state
+        self.set_control_state(state["controls"])
+
+        # 文件列表（改动过的文件重新统计行数）
+        self.selected_folder = state.get("folder", "")
+        self.folder_label.setText(os.path.basename(self.selected_folder) or "未选择文件夹")
+        self.update_window_title()
+        counts = [read_files.count_rows(f) if n is None else n
+                  for f, n in zip(restored.files, restored.row_counts)]
+        self.file_model.set_files(restored.files, counts)
+        self.update_file_count_labels()
+        self.quality_label.setText("-")
+        has_files = bool(restored.files)
+        self.plot_btn.setEnabled(has_files)
+        self.clear_btn.setEnabled(has_files)
+        self.auto_end_row_btn.setEnabled(has_files)
+
+        # 对比文件夹
+        self.compare_folder = state.get("compare_folder", "")
+        self.compare_files = restored.compare_files
+        if self.compare_files:
+            self.compare_label.setText(f"{os.path.basename(self.compare_folder)} ({len(self.compare_files)} 个)")
+        else:
+            self.compare_label.setText("未选择对比文件夹")
+        self.compare_clear_btn.setEnabled(bool(self.compare_files))
+
+        notes = []
+        if restored.changed:
+            notes.append(f"{len(restored.changed)} 个文件已改动")
+        if restored.missing:
+            notes.append(f"{len(restored.missing)} 个文件已不存在")
+
+        if has_files and "a" in restored.matrices:
+            # 直接使用保存的矩阵
+            try:
+                params = self.get_pixel_map_params() if self.array_mode_cb.isChecked() else self.get_pipeline_params()
+            except ValueError:
+                params = None
+            self.matrix_cache["a"] = ((params, tuple(restored.files)), restored.matrices["a"])
+            if "b" in restored.matrices and self.compare_files:
+                self.matrix_cache["b"] = ((params, tuple(self.compare_files)), restored.matrices["b"])
+            self.view_combo.setEnabled("b" in self.matrix_cache)
+            self.show_current_view()
+        elif has_files:
+            self.plot_heatmap()
+
+        message = f"已打开会话: {os.path.basename(file_path)}"
+        if notes:
+            message += "（" + "，".join(notes) + "，已重新读取）"
+        self.status_label.setText(message)
+
     def save_image(self):
         """保存当前热图为图片文件"""
-        if self.current_heatmap_data is None:
+        if self.current_heatmap_data is None and not self.grid_axes:
             QMessageBox.warning(self, "无数据", "没有可保存的热图数据")
             return
 
@@ -788,11 +1489,18 @@ class HeatmapApp(QMainWindow):
             return
 
         try:
+            # 网格视图直接保存当前图形
+            if self.grid_axes:
+                self.figure.savefig(file_path, bbox_inches='tight', dpi=300)
+                self.status_label.setText(f"网格视图已保存到: {os.path.basename(file_path)}")
+                return
+
             # 创建新图形
             fig, ax = plt.subplots(figsize=(12, 10))
 
             # 绘制热图
-            self.draw_heatmap(ax, self.current_heatmap_data, "热图", is_save=True)
+            self.draw_heatmap(ax, self.current_heatmap_data, "热图", is_save=True,
+                              **self.current_heatmap_style)
 
             # 调整布局
             fig.tight_layout(pad=3.0)
@@ -806,8 +1514,131 @@ class HeatmapApp(QMainWindow):
             QMessageBox.critical(self, "保存错误", f"保存图片时出错:\n{str(e)}")
 
 
+    def closeEvent(self, event):
+        """关闭时停止后台预读并释放图形（作为标签页关闭时同样调用）"""
+        self.prefetcher.cancel()
+        plt.close(self.figure)
+        super().closeEvent(event)
+
+
+def create_render_cache():
+    """已渲染热图的缓存（按内存大小限制）"""
+    return data_cache.LRUCache(RENDER_CACHE_BYTES, sizeof=lambda entry: entry.nbytes)
+
+
+class WorkspaceWindow(QMainWindow):
+    """多数据集工作区：每个标签页是一个 HeatmapApp
+
+    所有标签页在同一进程中运行：整列数据缓存（data_cache.DEFAULT_CACHE，同一文件以不同列号
+    打开时也只解析一次）和已渲染热图的缓存为所有标签页共用，各自有容量上限。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle(APP_TITLE)
+        self.setGeometry(100, 100, 1400, 850)
+        self.render_cache = create_render_cache()
+
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.setDocumentMode(True)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.setCentralWidget(self.tabs)
+
+        corner = QWidget()
+        corner_layout = QHBoxLayout(corner)
+        corner_layout.setContentsMargins(0, 0, 0, 0)
+        new_btn = QPushButton("新建标签页")
+        new_btn.setToolTip("新建一个数据集标签页 (Ctrl+T)")
+        new_btn.clicked.connect(lambda: self.new_tab())
+        corner_layout.addWidget(new_btn)
+        duplicate_btn = QPushButton("复制标签页")
+        duplicate_btn.setToolTip("以当前标签页的文件夹和参数新建标签页，例如换一个数据列号对比；已解析的文件直接复用")
+        duplicate_btn.clicked.connect(self.duplicate_tab)
+        corner_layout.addWidget(duplicate_btn)
+        self.tabs.setCornerWidget(corner, Qt.TopRightCorner)
+
+        QShortcut(QKeySequence("Ctrl+T"), self, activated=lambda: self.new_tab())
+        QShortcut(QKeySequence("Ctrl+W"), self, activated=lambda: self.close_tab(self.tabs.currentIndex()))
+
+        # 状态栏显示共用缓存的占用
+        self.cache_label = QLabel()
+        self.statusBar().addPermanentWidget(self.cache_label)
+        self.cache_timer = QTimer(self)
+        self.cache_timer.timeout.connect(self.update_cache_label)
+        self.cache_timer.start(2000)
+
+        self.new_tab()
+        self.update_cache_label()
+
+    def new_tab(self):
+        """新建一个空的数据集标签页"""
+        app = HeatmapApp(render_cache=self.render_cache)
+        index = self.tabs.addTab(app, "未命名")
+        app.windowTitleChanged.connect(lambda _, app=app: self.update_tab_title(app))
+        self.tabs.setCurrentIndex(index)
+        return app
+
+    def duplicate_tab(self):
+        """复制当前标签页的文件列表、对比文件和控件状态（不重新扫描文件夹，已移除的文件不会回到列表中）"""
+        source = self.tabs.currentWidget()
+        if source is None:
+            return
+        app = self.new_tab()
+        app.set_control_state(source.get_control_state())
+
+        app.selected_folder = source.selected_folder
+        app.folder_label.setText(os.path.basename(source.selected_folder) or "未选择文件夹")
+        app.update_window_title()
+        app.file_model.set_files(source.file_model.paths(), source.file_model.row_counts())
+        app.update_file_count_labels()
+        has_files = bool(app.file_model.file_count())
+        app.plot_btn.setEnabled(has_files)
+        app.clear_btn.setEnabled(has_files)
+        app.auto_end_row_btn.setEnabled(has_files)
+
+        app.compare_folder = source.compare_folder
+        app.compare_files = list(source.compare_files)
+        if app.compare_files:
+            app.compare_label.setText(f"{os.path.basename(app.compare_folder)} ({len(app.compare_files)} 个)")
+        app.compare_clear_btn.setEnabled(bool(app.compare_files))
+        app.start_prefetch()
+
+    def update_tab_title(self, app):
+        index = self.tabs.indexOf(app)
+        if index >= 0:
+            name = os.path.basename(app.selected_folder) or "未命名"
+            self.tabs.setTabText(index, name)
+            self.tabs.setTabToolTip(index, app.selected_folder)
+
+    def close_tab(self, index):
+        """关闭标签页；至少保留一个标签页"""
+        app = self.tabs.widget(index)
+        if app is None:
+            return
+        self.tabs.removeTab(index)
+        app.close()
+        app.deleteLater()
+        if not self.tabs.count():
+            self.new_tab()
+
+    def update_cache_label(self):
+        cache = data_cache.DEFAULT_CACHE
+        mb = 1024 * 1024
+        self.cache_label.setText(
+            f"数据缓存: {cache.nbytes / mb:.0f} / {cache.max_bytes / mb:.0f} MB ({len(cache)} 列)  "
+            f"渲染缓存: {self.render_cache.nbytes / mb:.0f} / {self.render_cache.max_bytes / mb:.0f} MB"
+        )
+
+    def closeEvent(self, event):
+        for i in range(self.tabs.count()):
+            self.tabs.widget(i).close()
+        super().closeEvent(event)
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = HeatmapApp()
+    window = WorkspaceWindow()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
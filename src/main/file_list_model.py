@@ -0,0 +1,163 @@
+# main/file_list_model.py
+import os
+from collections import Counter
+
+import numpy as np
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QBrush, QColor
+
+import src.module.quality as quality
+
+# 每次向视图追加显示的行数
+FETCH_BATCH = 1000
+
+
+class FileListModel(QAbstractListModel):
+    """文件列表模型：文件表保存在数组中，显示文本在视图需要时才生成
+
+    视图只按批次获取行（fetchMore），数万个文件时也不会一次创建全部条目；
+    移除文件一次性按掩码过滤，最小行数通过行数计数增量维护。
+    绘制后每个文件的统计量以提示和异常标记的形式显示（见 set_quality）。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths = np.empty(0, dtype=object)
+        self._row_counts = np.empty(0, dtype=np.int64)
+        self._loaded = 0
+        self._count_histogram = Counter()
+        self._min_row_count = 0
+        self._quality = {}
+
+    # ---- Qt 模型接口 ----
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._paths)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self._paths) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._paths):
+            return None
+        row = index.row()
+        path = self._paths[row]
+        if role == Qt.DisplayRole:
+            text = f"{os.path.basename(path)} ({self._row_counts[row]}行)"
+            badge = self._quality.get(path, ("", None))[0]
+            return f"{text}  ⚠{badge}" if badge else text
+        if role == Qt.ToolTipRole:
+            info = self._quality.get(path)
+            return info[1] if info else None
+        if role == Qt.ForegroundRole:
+            if self._quality.get(path, ("", None))[0]:
+                return QBrush(QColor("#e84a4a"))
+            return None
+        if role == Qt.UserRole:
+            return path
+        return None
+
+    # ---- 文件表操作 ----
+    def set_files(self, paths, row_counts):
+        """替换全部文件
+
+        Args:
+            paths (list): 文件路径列表
+            row_counts (list): 每个文件的行数
+        """
+        self.beginResetModel()
+        self._paths = np.array(paths, dtype=object)
+        self._row_counts = np.asarray(row_counts, dtype=np.int64)
+        self._loaded = min(FETCH_BATCH, len(self._paths))
+        self._count_histogram = Counter(self._row_counts.tolist())
+        self._min_row_count = min(self._count_histogram) if self._count_histogram else 0
+        self._quality = {}
+        self.endResetModel()
+
+    def clear(self):
+        self.set_files([], [])
+
+    def remove_rows(self, rows):
+        """一次性移除多行（O(n)），并增量更新最小行数
+
+        Args:
+            rows (list): 要移除的行号
+
+        Returns:
+            int: 实际移除的行数
+        """
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        rows = rows[(rows >= 0) & (rows < len(self._paths))]
+        if not len(rows):
+            return 0
+
+        # 只有被移除的计数归零且恰好是最小值时，才需要在（很少的）不同行数中重新找最小值
+        self._count_histogram.subtract(Counter(self._row_counts[rows].tolist()))
+        self._count_histogram = +self._count_histogram
+        if self._min_row_count not in self._count_histogram:
+            self._min_row_count = min(self._count_histogram) if self._count_histogram else 0
+
+        keep = np.ones(len(self._paths), dtype=bool)
+        keep[rows] = False
+        removed_loaded = int(np.count_nonzero(rows < self._loaded))
+
+        self.beginResetModel()
+        self._paths = self._paths[keep]
+        self._row_counts = self._row_counts[keep]
+        self._loaded = min(len(self._paths), max(self._loaded - removed_loaded, FETCH_BATCH))
+        self.endResetModel()
+        return len(rows)
+
+    def set_quality(self, paths, stats, reasons, failed=None):
+        """记录文件统计量和异常标记（按路径保存，移除文件后仍然对应）
+
+        Args:
+            paths (list): 已读取的文件路径
+            stats (np.ndarray): 对应的统计量（quality.file_statistics 的结果）
+            reasons (list): 对应的异常原因列表（quality.find_outliers 的结果）
+            failed (dict): 读取失败的文件 {文件路径: 错误信息}
+        """
+        self._quality = {
+            path: (",".join(reason), quality.describe(stat))
+            for path, stat, reason in zip(paths, stats, reasons)
+        }
+        for path, error in (failed or {}).items():
+            self._quality[path] = ("读取失败", f"无法读取该文件的数据列: {error}" if error else "无法读取该文件的数据列")
+        if self._loaded:
+            self.dataChanged.emit(self.index(0), self.index(self._loaded - 1),
+                                  [Qt.DisplayRole, Qt.ToolTipRole, Qt.ForegroundRole])
+
+    def flagged_count(self):
+        """被标记为异常的文件数"""
+        return sum(1 for badge, _ in self._quality.values() if badge)
+
+    def file_count(self):
+        return len(self._paths)
+
+    def paths(self):
+        """全部文件路径（包括视图尚未显示的行）"""
+        return self._paths.tolist()
+
+    def row_counts(self):
+        """全部文件的行数"""
+        return self._row_counts.tolist()
+
+    def row_count_at(self, row):
+        return int(self._row_counts[row])
+
+    @property
+    def min_row_count(self):
+        return self._min_row_count
@@ -0,0 +1,62 @@
+# main/live_view.py
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QWidget
+
+import src.module.colormap_lut as colormap_lut
+
+
+class LiveHeatmapView(QWidget):
+    """快速热图显示：矩阵经颜色查找表直接写入RGBA缓冲区，由QImage零拷贝包装后按最近邻缩放绘制
+
+    不绘制坐标轴和颜色条，适合实时监测时逐帧刷新；矩阵形状不变时各帧复用同一缓冲区。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self._rgba = None
+        self._index = None
+        self._image = None
+
+    def set_data(self, matrix, cmap="viridis", vmin=None, vmax=None, center=None):
+        """
+        显示新的一帧
+
+        Args:
+            matrix (np.ndarray): 二维热图矩阵
+            cmap (str): 颜色条名称
+            vmin (float): 颜色范围下限，默认取矩阵的最小值
+            vmax (float): 颜色范围上限，默认取矩阵的最大值
+            center (float): 发散型颜色条的中心值（与seaborn的center一致）
+        """
+        matrix = np.asarray(matrix)
+        if vmin is None or vmax is None:
+            auto_min, auto_max = colormap_lut.color_range(matrix, center)
+            vmin = auto_min if vmin is None else vmin
+            vmax = auto_max if vmax is None else vmax
+
+        if self._rgba is None or self._rgba.shape[:2] != matrix.shape:
+            rows, cols = matrix.shape
+            self._rgba = np.empty((rows, cols, 4), dtype=np.uint8)
+            self._index = np.empty((rows, cols), dtype=np.float32)
+            # QImage 直接引用缓冲区内存（不拷贝），缓冲区需与图像同生命周期
+            self._image = QImage(self._rgba.data, cols, rows, cols * 4, QImage.Format_RGBA8888)
+
+        colormap_lut.apply_lut(matrix, colormap_lut.build_lut(cmap), vmin, vmax,
+                               out=self._rgba, index=self._index)
+        self.update()
+
+    def image(self):
+        """当前帧（与内部缓冲区共享内存）"""
+        return self._image
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().window())
+        if self._image is not None:
+            # 关闭平滑缩放：最近邻放大，每个矩阵元素保持为清晰的色块
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+            painter.drawImage(self.rect(), self._image)
+        painter.end()
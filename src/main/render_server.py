@@ -0,0 +1,291 @@
+# main/render_server.py
+"""本地热图渲染服务：不启动界面，通过HTTP按参数返回热图PNG或原始矩阵
+
+用法（在仓库根目录执行）:
+    python -m src.main.render_server --port 8765 --root /data/shared
+
+请求示例:
+    http://127.0.0.1:8765/heatmap.png?folder=/data/shared/run1&column=3&rows=20&cols=10
+    http://127.0.0.1:8765/matrix.npy?folder=/data/shared/run1&method=rms
+    http://127.0.0.1:8765/heatmap.png?folder=/data/shared/run1&column=3&time_column=0&method=max
+    http://127.0.0.1:8765/heatmap.png?folder=/data/shared/run1&cols=10&file_reduce=mean
+    http://127.0.0.1:8765/matrix.json?folder=/data/shared/array&mode=array&reduce=peak
+    http://127.0.0.1:8765/heatmap.png?folder=/data/shared/array&mode=array&layout=csv&layout_csv=layout.csv
+
+folder 与 layout_csv 都必须位于 --root（默认为启动服务时的工作目录）之内；layout_csv 为相对路径时
+相对于数据文件夹。各请求在各自的线程中处理，同时计算的热图矩阵数受 --jobs 限制，
+未命中缓存的文件由 data_cache 共用的进程池解析，并发请求不会各自启动一组进程。
+"""
+import argparse
+import io
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+import src.module.data_cache as data_cache
+import src.module.out_of_core as out_of_core
+import src.module.pipeline as pipeline
+import src.module.read_files as read_files
+import src.module.render as render
+
+# PNG分辨率范围，避免单个请求分配过大的图像
+MIN_DPI = 50
+MAX_DPI = 300
+
+
+def parse_params(query):
+    """把查询参数转换为处理参数（参数名与界面控制面板对应）
+
+    Args:
+        query (dict): parse_qs 得到的查询参数
+
+    Returns:
+        tuple: (文件夹路径, PipelineParams 或 PixelMapParams)
+    """
+    def get(name, default=None):
+        values = query.get(name)
+        return values[0] if values else default
+
+    folder = get("folder")
+    if not folder:
+        raise ValueError("缺少参数 folder")
+
+    end_row = get("end_row")
+    end_row = int(end_row) if end_row else None
+    time_column = get("time_column")
+    if get("mode", "heatmap") == "array":
+        value_row = get("value_row")
+        params = pipeline.PixelMapParams(
+            column_index=int(get("column", 3)),
+            start_row=int(get("start_row", 1)),
+            end_row=end_row,
+            reduce=get("reduce", "mean"),
+            value_row=int(value_row) if value_row else None,
+            layout=get("layout", "name"),
+            grid_cols=int(get("grid_cols", 64)),
+            layout_csv=get("layout_csv", "")
+        )
+    else:
+        params = pipeline.PipelineParams(
+            column_index=int(get("column", 3)),
+            start_row=int(get("start_row", 1)),
+            end_row=end_row,
+            length=int(get("rows", 20)),
+            data_groups=int(get("cols", 10)),
+            method=get("method", "standard"),
+            align=get("align", "cut"),
+            exclude=get("exclude", "0") in ("1", "true", "yes"),
+            time_column=int(time_column) if time_column else None,
+            file_reduce=get("file_reduce", "first")
+        )
+    return folder, params
+
+
+def parse_render_options(query):
+    """读取渲染参数，返回可哈希的元组 (cmap, cbar_title, show_ticks, dpi)"""
+    def get(name, default):
+        values = query.get(name)
+        return values[0] if values else default
+
+    return (
+        get("cmap", "viridis"),
+        get("cbar_title", "Normalized Current"),
+        get("show_ticks", "0") in ("1", "true", "yes"),
+        min(max(int(get("dpi", 100)), MIN_DPI), MAX_DPI),
+    )
+
+
+class RenderService:
+    """热图计算与渲染，带LRU缓存并合并并发的相同请求
+
+    Args:
+        root (str): 允许访问的数据根目录，None表示当前工作目录
+        matrix_cache_bytes (int): 热图矩阵缓存上限（字节）
+        image_cache_bytes (int): PNG缓存上限（字节）
+        jobs (int): 同时计算的热图矩阵数上限，其余未命中缓存的请求排队等待
+    """
+
+    def __init__(self, root=None, matrix_cache_bytes=256 * 1024 * 1024,
+                 image_cache_bytes=64 * 1024 * 1024, jobs=2):
+        self.root = os.path.realpath(root or os.getcwd())
+        self.matrix_cache = data_cache.LRUCache(matrix_cache_bytes)
+        self.image_cache = data_cache.LRUCache(image_cache_bytes, sizeof=len)
+        self.flight = data_cache.SingleFlight()
+        self.slots = threading.BoundedSemaphore(max(1, jobs))
+
+    def check_root(self, path):
+        """解析为真实路径并检查是否位于数据根目录内"""
+        path = os.path.realpath(path)
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise PermissionError(f"路径不在数据根目录内: {path}")
+        return path
+
+    def resolve_folder(self, folder):
+        """检查文件夹是否存在且位于数据根目录内"""
+        folder = self.check_root(folder)
+        if not os.path.isdir(folder):
+            raise FileNotFoundError(f"文件夹不存在: {folder}")
+        return folder
+
+    def resolve_layout_csv(self, folder, layout_csv):
+        """布局CSV路径：相对路径相对于数据文件夹，检查是否存在且位于数据根目录内"""
+        layout_csv = self.check_root(os.path.join(folder, layout_csv))
+        if not os.path.isfile(layout_csv):
+            raise FileNotFoundError(f"布局CSV不存在: {layout_csv}")
+        return layout_csv
+
+    def matrix_key(self, folder, params):
+        """
+        缓存键：文件夹内所有文件（及布局CSV）的指纹 + 处理参数，任一文件改写后自动失效
+
+        Returns:
+            tuple: (缓存键, 文件列表, 处理参数（布局CSV已替换为检查过的真实路径）)
+        """
+        folder = self.resolve_folder(folder)
+        files = read_files.list_excel_files(folder)
+        fingerprints = tuple(data_cache.file_fingerprint(f) for f in files)
+        layout = None
+        if isinstance(params, pipeline.PixelMapParams) and params.layout == "csv" and params.layout_csv:
+            params = params._replace(layout_csv=self.resolve_layout_csv(folder, params.layout_csv))
+            layout = data_cache.file_fingerprint(params.layout_csv)
+        return (fingerprints, layout, params), files, params
+
+    def get_matrix(self, folder, params):
+        """返回 (缓存键, 热图矩阵)"""
+        key, files, params = self.matrix_key(folder, params)
+
+        def compute():
+            # 读取和处理整个文件夹的数据占用较多内存和CPU，同时进行的计算数受 slots 限制
+            with self.slots:
+                matrix = self.matrix_cache.get(key)
+                if matrix is None:
+                    matrix = pipeline.build_matrix(files, params).matrix
+                    self.matrix_cache.put(key, matrix)
+            return matrix
+
+        matrix = self.matrix_cache.get(key)
+        if matrix is None:
+            matrix = self.flight.run(("matrix", key), compute)
+        return key, matrix
+
+    def get_png(self, folder, params, options):
+        """返回热图PNG数据"""
+        key, matrix = self.get_matrix(folder, params)
+        image_key = (key, options)
+
+        def compute():
+            image = self.image_cache.get(image_key)
+            if image is None:
+                cmap, cbar_title, show_ticks, dpi = options
+                image = render.render_heatmap_png(matrix, cmap=cmap, cbar_title=cbar_title,
+                                                  show_ticks=show_ticks, dpi=dpi)
+                self.image_cache.put(image_key, image)
+            return image
+
+        image = self.image_cache.get(image_key)
+        if image is None:
+            image = self.flight.run(("png", image_key), compute)
+        return image
+
+    def stats(self):
+        return {
+            "matrices": len(self.matrix_cache),
+            "matrix_bytes": self.matrix_cache.nbytes,
+            "images": len(self.image_cache),
+            "image_bytes": self.image_cache.nbytes,
+            "columns": len(data_cache.DEFAULT_CACHE),
+            "column_bytes": data_cache.DEFAULT_CACHE.nbytes,
+        }
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理：/heatmap.png、/matrix.npy、/matrix.json、/stats"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+        try:
+            if url.path == "/stats":
+                self.send_body(200, "application/json", json.dumps(service.stats()).encode())
+                return
+
+            folder, params = parse_params(query)
+            if url.path == "/heatmap.png":
+                body = service.get_png(folder, params, parse_render_options(query))
+                self.send_body(200, "image/png", body)
+            elif url.path == "/matrix.npy":
+                _, matrix = service.get_matrix(folder, params)
+                buffer = io.BytesIO()
+                np.save(buffer, matrix)
+                self.send_body(200, "application/octet-stream", buffer.getvalue())
+            elif url.path == "/matrix.json":
+                _, matrix = service.get_matrix(folder, params)
+                body = {"shape": matrix.shape,
+                        "data": np.where(np.isnan(matrix), None, matrix).tolist()}
+                self.send_body(200, "application/json", json.dumps(body).encode())
+            else:
+                self.send_error_json(404, "未知路径", url.path)
+        except pipeline.PipelineError as e:
+            self.send_error_json(400, e.title, e.message)
+        except PermissionError as e:
+            self.send_error_json(403, "禁止访问", str(e))
+        except FileNotFoundError as e:
+            self.send_error_json(404, "文件不存在", str(e))
+        except ValueError as e:
+            self.send_error_json(400, "参数错误", str(e))
+        except Exception as e:
+            self.send_error_json(500, "处理数据时出错", str(e))
+
+    def send_body(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, title, message):
+        body = json.dumps({"error": title, "message": message}, ensure_ascii=False).encode()
+        self.send_body(status, "application/json; charset=utf-8", body)
+
+
+def make_server(host="127.0.0.1", port=8765, service=None):
+    """创建（未启动的）渲染服务器"""
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.service = service or RenderService()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地热图渲染服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--root", default=os.getcwd(), help="只允许访问该目录下的数据文件夹（默认为当前工作目录）")
+    parser.add_argument("--jobs", type=int, default=2, help="同时计算的热图矩阵数上限")
+    parser.add_argument("--matrix-cache-mb", type=int, default=256, help="热图矩阵缓存上限(MB)")
+    parser.add_argument("--image-cache-mb", type=int, default=64, help="PNG缓存上限(MB)")
+    parser.add_argument("--memory-limit-mb", type=int, default=None,
+                        help="单次处理的内存上限(MB)，估算超过时改用磁盘暂存")
+    args = parser.parse_args()
+
+    if args.memory_limit_mb is not None:
+        out_of_core.set_memory_limit(args.memory_limit_mb * 1024 * 1024)
+
+    service = RenderService(args.root, args.matrix_cache_mb * 1024 * 1024,
+                            args.image_cache_mb * 1024 * 1024, args.jobs)
+    server = make_server(args.host, args.port, service)
+    print(f"热图渲染服务已启动: http://{args.host}:{args.port}/（数据根目录: {service.root}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
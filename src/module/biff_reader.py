@@ -0,0 +1,429 @@
+# module/biff_reader.py
+"""只读取一列（或一次读取所有列）数值的 BIFF8（.xls）快速解析
+
+xlrd 打开文件时会为所有工作表的所有单元格建立对象，而热图只需要第一个工作表中的一列数值。
+这里直接扫描第一个工作表的记录流：只解码目标列、目标行范围内的 NUMBER/RK/MULRK/FORMULA
+（及 BOOLERR）记录，写入预先分配的浮点数组；其余单元格记录只用于统计行数和列数。逐行重复的记录段
+（每行的记录类型和长度相同）按固定周期映射为 numpy 数组，整段一次处理。
+
+结果与 xlrd 一致：
+    - 行数、列数按非空单元格统计（与 xlrd 在 formatting_info=False 时相同，BLANK 不计）
+    - 数值按原值读取，日期、时间格式的数值为其序列值，布尔值为 0/1（与 xlrd 的 cell_value 相同）
+    - 文本、错误值均记为 NaN
+遇到加密文件、BIFF5 及更早版本、嵌入图表等不常见的情况时抛出 UnsupportedFormat，
+由调用方改用 xlrd 读取。
+"""
+import struct
+
+import numpy as np
+from xlrd.compdoc import SIGNATURE, CompDoc
+
+from src.module.dataset import DEFAULT_DTYPE
+
+# 记录类型
+BOF = 0x0809
+EOF = 0x000A
+FILEPASS = 0x002F
+XF = 0x00E0
+BOUNDSHEET = 0x0085
+NUMBER = 0x0203
+RK = 0x027E
+MULRK = 0x00BD
+FORMULA = 0x0006
+LABELSST = 0x00FD
+LABEL = 0x0204
+RSTRING = 0x00D6
+BOOLERR = 0x0205
+
+BIFF8_VERSION = 0x0600
+BOF_GLOBALS = 0x0005
+BOF_WORKSHEET = 0x0010
+BOUNDSHEET_WORKSHEET = 0
+
+# 除数值、布尔值外，这些单元格记录也计入行数/列数
+_OTHER_CELLS = frozenset((LABELSST, LABEL, RSTRING))
+
+_header = struct.Struct('<HH').unpack_from
+_cell = struct.Struct('<HHH').unpack_from
+_double = struct.Struct('<d').unpack_from
+_uint16 = struct.Struct('<H').unpack_from
+_int32 = struct.Struct('<i').unpack_from
+_rk_bits = struct.Struct('<Q')
+_xf_rk = struct.Struct('<Hi').unpack_from
+
+# 可以按整段向量化处理的定长记录（ROW 只用于格式信息，不计入行数）
+ROW = 0x0208
+_BLOCK_RECORDS = frozenset((ROW, NUMBER, RK, LABELSST))
+# 重复段最多包含的记录数
+MAX_BLOCK_RECORDS = 64
+# 重复次数少于此值时向量化处理得不偿失，按没有重复结构处理
+MIN_REPEATS = 8
+# 向量化检查重复次数时的窗口：从 BLOCK_WINDOW 次开始，每次扩大4倍
+BLOCK_WINDOW = 16
+# 连续找不到重复结构时，下一次尝试前最多跳过 2**MAX_BACKOFF 个周期
+MAX_BACKOFF = 10
+
+
+class UnsupportedFormat(Exception):
+    """文件不是本模块支持的普通 BIFF8 工作簿，需改用 xlrd 读取"""
+
+
+def _rk_value(rk):
+    """把RK编码（有符号32位整数）还原为浮点数，与 xlrd 的 unpack_RK 相同"""
+    if rk & 2:
+        value = float(rk >> 2)
+    else:
+        value = _double(_rk_bits.pack((rk & 0xFFFFFFFC) << 32 & 0xFFFFFFFFFFFFFFFF))[0]
+    if rk & 1:
+        value /= 100.0
+    return value
+
+
+def _rk_values(rk):
+    """_rk_value 的向量化版本（rk 为int32数组）"""
+    bits = rk.view(np.uint32)
+    values = ((bits & 0xFFFFFFFC).astype(np.uint64) << np.uint64(32)).view(np.float64)
+    is_int = (bits & 2) != 0
+    values[is_int] = rk[is_int] >> 2
+    scaled = (bits & 1) != 0
+    values[scaled] /= 100.0
+    return values
+
+
+def _repeating_block(mem, pos):
+    """
+    查找从 pos 开始按固定周期重复的记录段
+
+    xlwt 与 Excel 都按行依次写出单元格，每一行（或每个行块）的记录类型和长度完全相同，
+    例如 xlwt 的 [ROW, NUMBER x 列数]。找到第一段的结构后，后续各段只需向量化比较记录头。
+
+    Returns:
+        tuple: (段内记录 [(记录类型, 段内偏移)], 周期字节数, 重复次数)；
+               没有重复结构时返回 (None, 已检查的字节数, 0)
+    """
+    first = mem[pos:pos + 4]
+    records = []
+    offset = 0
+    for _ in range(MAX_BLOCK_RECORDS):
+        rc, length = _header(mem, pos + offset)
+        if rc not in _BLOCK_RECORDS:
+            return None, offset, 0
+        records.append((rc, offset))
+        offset += 4 + length
+        if mem[pos + offset:pos + offset + 4] == first:
+            break
+    else:
+        return None, offset, 0
+
+    # 记录头相同即记录长度相同，所以各段逐一匹配时记录链是连续的
+    period = offset
+    available = (len(mem) - pos) // period
+    # 先逐条比较第 MIN_REPEATS 段的记录头，不重复时省去向量化比较的开销
+    last = pos + (MIN_REPEATS - 1) * period
+    if available < MIN_REPEATS or any(mem[last + offset:last + offset + 4] != mem[pos + offset:pos + offset + 4]
+                                      for _, offset in records):
+        return None, period, 0
+    window = BLOCK_WINDOW
+    while True:
+        count = min(window, available)
+        repeats = count
+        for rc, offset in records:
+            headers = _block_field(mem, pos + offset, count, period, 0, '<u4')
+            mismatch = np.flatnonzero(headers != _header_value(mem, pos + offset))
+            if mismatch.size:
+                repeats = min(repeats, int(mismatch[0]))
+        if repeats < count or count == available:
+            break
+        window *= 4
+    if repeats < MIN_REPEATS:
+        return None, period, 0
+    return records, period, repeats
+
+
+def _header_value(mem, pos):
+    return struct.unpack_from('<I', mem, pos)[0]
+
+
+def _block_field(mem, pos, count, period, offset, dtype):
+    """各段中同一字段按固定周期映射为数组（不拷贝）"""
+    return np.ndarray((count,), dtype=dtype, buffer=mem, offset=pos + offset, strides=(period,))
+
+
+def _workbook_stream(file_path):
+    """读取文件，返回 (数据, 工作簿流起点)"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if data[:8] != SIGNATURE:
+        raise UnsupportedFormat("不是OLE复合文档")
+    try:
+        mem, base, _ = CompDoc(data).locate_named_stream('Workbook')
+    except Exception as e:
+        raise UnsupportedFormat(f"复合文档结构异常: {e}") from e
+    if mem is None:
+        # 只有 BIFF5 的 "Book" 流
+        raise UnsupportedFormat("没有 Workbook 流")
+    return mem, base
+
+
+def _records(mem, pos):
+    """从 pos 处的 BOF 开始依次给出 (记录类型, 数据起点, 数据长度)，到 EOF 为止（不含）"""
+    size = len(mem)
+    while pos + 4 <= size:
+        rc, length = _header(mem, pos)
+        pos += 4
+        if rc == EOF:
+            return
+        yield rc, pos, length
+        pos += length
+    raise UnsupportedFormat("记录流意外结束")
+
+
+def _check_bof(mem, pos, substream):
+    if pos + 8 > len(mem):
+        raise UnsupportedFormat("记录流意外结束")
+    rc, length = _header(mem, pos)
+    version, kind = struct.unpack_from('<HH', mem, pos + 4)
+    if rc != BOF or version != BIFF8_VERSION or kind != substream:
+        raise UnsupportedFormat("不是BIFF8工作簿")
+    return pos + 4 + length
+
+
+def _parse_globals(mem, base):
+    """
+    解析工作簿全局记录
+
+    数值单元格不论格式（常规、日期、文本格式等）都按数值读取，只需XF记录数检查单元格的XF索引。
+
+    Returns:
+        tuple: (第一个工作表的BOF位置, XF记录数)
+    """
+    pos = _check_bof(mem, base, BOF_GLOBALS)
+    xf_count = 0
+    sheet_pos = None
+    for rc, start, length in _records(mem, pos):
+        if rc == XF:
+            xf_count += 1
+        elif rc == BOUNDSHEET:
+            offset, _, sheet_type = struct.unpack_from('<iBB', mem, start)
+            if sheet_pos is None and sheet_type == BOUNDSHEET_WORKSHEET:
+                sheet_pos = base + offset
+        elif rc == FILEPASS:
+            raise UnsupportedFormat("文件已加密")
+    if sheet_pos is None:
+        raise UnsupportedFormat("没有工作表")
+    # xlrd 没有XF记录时也认可XF 0
+    return sheet_pos, max(xf_count, 1)
+
+
+def _scan_sheet(mem, sheet_pos, xf_count, column_index, start_row, end_row):
+    """
+    扫描工作表记录，统计行数、列数，并取出目标列在 [start_row, end_row) 内的数值
+
+    column_index 为None时取出所有列的数值，同时返回各数值单元格的列号。
+
+    Returns:
+        tuple: (行数, 列数, 数值单元格的行号数组, 对应数值数组, 列号数组（只取一列时为None）)，
+               按记录顺序排列（同一单元格重复出现时后者覆盖前者）
+    """
+    pos = _check_bof(mem, sheet_pos, BOF_WORKSHEET)
+    size = len(mem)
+    max_row = max_col = -1
+    rows, values = [], []
+    all_columns = column_index is None
+    cols = [] if all_columns else None
+    # 重复段的结果直接保留为数组；逐条处理的结果先存入列表，在每个重复段之前转为数组
+    chunks = []
+
+    def flush():
+        if rows:
+            chunks.append((np.asarray(rows, dtype=np.intp), np.asarray(values, dtype=np.float64),
+                           np.asarray(cols, dtype=np.intp) if all_columns else None))
+            del rows[:], values[:]
+            if all_columns:
+                del cols[:]
+
+    header, cell, double, xf_rk = _header, _cell, _double, _xf_rk
+    # 在此位置之前的记录逐条处理；连续找不到重复结构时逐次加倍跳过的距离，避免反复尝试
+    scalar_until = pos
+    failures = 0
+    while True:
+        if pos + 4 > size:
+            raise UnsupportedFormat("记录流意外结束")
+        rc, length = header(mem, pos)
+
+        if rc in _BLOCK_RECORDS and pos >= scalar_until:
+            records, period, repeats = _repeating_block(mem, pos)
+            if records is None:
+                scalar_until = pos + (period << min(failures, MAX_BACKOFF))
+                failures += 1
+            else:
+                failures = 0
+                for cell_rc, offset in records:
+                    if cell_rc == ROW:
+                        continue
+                    block_rows = _block_field(mem, pos + offset, repeats, period, 4, '<u2')
+                    block_cols = _block_field(mem, pos + offset, repeats, period, 6, '<u2')
+                    max_row = max(max_row, int(block_rows.max()))
+                    max_col = max(max_col, int(block_cols.max()))
+                    if cell_rc == LABELSST:
+                        continue
+                    in_range = (block_rows >= start_row) & (block_rows < end_row)
+                    hit = np.flatnonzero(in_range if all_columns else in_range & (block_cols == column_index))
+                    if not hit.size:
+                        continue
+                    if _block_field(mem, pos + offset, repeats, period, 8, '<u2')[hit].max() >= xf_count:
+                        raise UnsupportedFormat("XF索引越界")
+                    if cell_rc == NUMBER:
+                        hit_values = _block_field(mem, pos + offset, repeats, period, 10, '<f8')[hit]
+                    else:
+                        hit_values = _rk_values(_block_field(mem, pos + offset, repeats, period, 10, '<i4')[hit])
+                    flush()
+                    chunks.append((block_rows[hit].astype(np.intp), hit_values.astype(np.float64),
+                                   block_cols[hit].astype(np.intp) if all_columns else None))
+                pos += repeats * period
+                continue
+
+        start = pos + 4
+        pos = start + length
+
+        if rc == NUMBER or rc == RK or rc == FORMULA or rc == BOOLERR:
+            row, col, xf = cell(mem, start)
+            if row > max_row:
+                max_row = row
+            if col > max_col:
+                max_col = col
+            if (col != column_index and not all_columns) or not start_row <= row < end_row:
+                continue
+            if rc == BOOLERR:
+                # 值之后的标志字节为1时是错误值
+                if mem[start + 7]:
+                    continue
+                value = float(mem[start + 6])
+            elif rc == FORMULA and mem[start + 12:start + 14] == b'\xff\xff':
+                # FORMULA 的缓存结果：最后两个字节为 0xFFFF 时首字节为类型，1 为布尔值，其余为文本/错误值
+                if mem[start + 6] != 1:
+                    continue
+                value = float(mem[start + 8])
+            else:
+                # 与 xlrd 相同：数值单元格按XF查找单元格类型，XF不存在时出错
+                if xf >= xf_count:
+                    raise UnsupportedFormat("XF索引越界")
+                value = _rk_value(_int32(mem, start + 6)[0]) if rc == RK else double(mem, start + 6)[0]
+            rows.append(row)
+            values.append(value)
+            if all_columns:
+                cols.append(col)
+
+        elif rc == MULRK:
+            row, first = _uint16(mem, start)[0], _uint16(mem, start + 2)[0]
+            last = _uint16(mem, pos - 2)[0]
+            if row > max_row:
+                max_row = row
+            if last > max_col:
+                max_col = last
+            if not start_row <= row < end_row:
+                continue
+            if all_columns:
+                for col in range(first, last + 1):
+                    xf, rk = xf_rk(mem, start + 4 + 6 * (col - first))
+                    if xf >= xf_count:
+                        raise UnsupportedFormat("XF索引越界")
+                    rows.append(row)
+                    values.append(_rk_value(rk))
+                    cols.append(col)
+            elif first <= column_index <= last:
+                xf, rk = xf_rk(mem, start + 4 + 6 * (column_index - first))
+                if xf >= xf_count:
+                    raise UnsupportedFormat("XF索引越界")
+                rows.append(row)
+                values.append(_rk_value(rk))
+
+        elif rc in _OTHER_CELLS:
+            row, col, _ = cell(mem, start)
+            if row > max_row:
+                max_row = row
+            if col > max_col:
+                max_col = col
+
+        elif rc == EOF:
+            break
+        elif rc == BOF:
+            # 嵌入图表等子流
+            raise UnsupportedFormat("工作表中包含嵌套子流")
+
+    flush()
+    if not chunks:
+        chunks.append((np.empty(0, dtype=np.intp), np.empty(0), np.empty(0, dtype=np.intp)))
+    rows = np.concatenate([c[0] for c in chunks])
+    values = np.concatenate([c[1] for c in chunks])
+    cols = np.concatenate([c[2] for c in chunks]) if all_columns else None
+    return max_row + 1, max_col + 1, rows, values, cols
+
+
+def _scan_first_sheet(file_path, column_index, start_row, stop):
+    mem, base = _workbook_stream(file_path)
+    try:
+        sheet_pos, xf_count = _parse_globals(mem, base)
+        return _scan_sheet(mem, sheet_pos, xf_count, column_index, start_row, stop)
+    except (IndexError, ValueError, struct.error) as e:
+        # 记录长度不足等损坏情况交给 xlrd 处理（报错）
+        raise UnsupportedFormat(f"记录内容异常: {e}") from e
+
+
+def read_column(file_path, column_index, start_row=0, end_row=None, dtype=DEFAULT_DTYPE):
+    """
+    读取第一个工作表中某一列的数值
+
+    Args:
+        file_path (str): 文件路径
+        column_index (int): 列索引（0-based）
+        start_row (int): 起始行索引（0-based）
+        end_row (int): 结束行索引（0-based，不包括此行），超过行数时截断到行数
+        dtype: 样本精度
+
+    Returns:
+        tuple: (该列 [start_row, min(end_row, 行数)) 的数据（非数值单元格为 NaN；列不存在时为空数组）, 行数)
+
+    Raises:
+        UnsupportedFormat: 文件需改用 xlrd 读取
+    """
+    stop = (1 << 32) if end_row is None else end_row
+    nrows, ncols, rows, values, _ = _scan_first_sheet(file_path, column_index, start_row, stop)
+
+    stop = nrows if end_row is None else min(end_row, nrows)
+    if column_index >= ncols or start_row >= stop:
+        return np.empty(0, dtype=dtype), nrows
+    column = np.full(stop - start_row, np.nan, dtype=dtype)
+    column[rows - start_row] = values
+    return column, nrows
+
+
+def read_sheet(file_path, dtype=DEFAULT_DTYPE):
+    """
+    一次扫描读取第一个工作表所有列的数值
+
+    Args:
+        file_path (str): 文件路径
+        dtype: 样本精度
+
+    Returns:
+        np.ndarray: 形状为 (列数, 行数) 的数组，第 i 行为第 i 列的全部数据（非数值单元格为 NaN）
+
+    Raises:
+        UnsupportedFormat: 文件需改用 xlrd 读取
+    """
+    nrows, ncols, rows, values, cols = _scan_first_sheet(file_path, None, 0, 1 << 32)
+    sheet = np.full((max(ncols, 0), max(nrows, 0)), np.nan, dtype=dtype)
+    sheet[cols, rows] = values
+    return sheet
+
+
+def count_rows(file_path):
+    """
+    第一个工作表的行数（按非空单元格统计）
+
+    Raises:
+        UnsupportedFormat: 文件需改用 xlrd 读取
+    """
+    # 列号取一个不可能存在的值，只统计行数，不解码任何数值
+    return read_column(file_path, 1 << 16, 0, 0)[1]
@@ -0,0 +1,83 @@
+# module/colormap_lut.py
+"""颜色查找表（LUT）着色：不经过matplotlib绘图，直接把矩阵映射为RGBA像素"""
+from functools import lru_cache
+
+import numpy as np
+from matplotlib import colormaps
+
+# 查找表的颜色数；额外的最后一项用于NaN
+LUT_SIZE = 256
+
+# NaN 显示为透明
+NAN_COLOR = (0, 0, 0, 0)
+
+
+@lru_cache(maxsize=32)
+def build_lut(cmap_name, size=LUT_SIZE):
+    """
+    预先计算颜色查找表
+
+    Args:
+        cmap_name (str): matplotlib颜色条名称（与界面颜色条下拉框一致）
+        size (int): 颜色数
+
+    Returns:
+        np.ndarray: 形状为 (size + 1, 4) 的uint8数组，最后一行为NaN的颜色（只读）
+    """
+    lut = np.empty((size + 1, 4), dtype=np.uint8)
+    lut[:size] = colormaps[cmap_name](np.linspace(0, 1, size), bytes=True)
+    lut[size] = NAN_COLOR
+    lut.flags.writeable = False
+    return lut
+
+
+def color_range(matrix, center=None):
+    """
+    与seaborn一致的颜色范围：有限值的最小/最大值；给定center时关于center对称
+
+    Returns:
+        tuple: (vmin, vmax)
+    """
+    finite = matrix[np.isfinite(matrix)]
+    if not finite.size:
+        return 0.0, 1.0
+    vmin, vmax = float(finite.min()), float(finite.max())
+    if center is not None:
+        span = max(abs(vmax - center), abs(center - vmin))
+        vmin, vmax = center - span, center + span
+    return vmin, vmax
+
+
+def apply_lut(matrix, lut, vmin, vmax, out=None, index=None):
+    """
+    通过查找表把矩阵映射为RGBA像素
+
+    Args:
+        matrix (np.ndarray): 二维矩阵
+        lut (np.ndarray): build_lut 的结果
+        vmin (float): 对应查找表第一项的值
+        vmax (float): 对应查找表最后一个颜色的值
+        out (np.ndarray): 可选，形状为 (行, 列, 4) 的uint8输出缓冲区，逐帧复用可避免分配
+        index (np.ndarray): 可选，形状为 (行, 列) 的float32临时缓冲区
+
+    Returns:
+        np.ndarray: 形状为 (行, 列, 4) 的C连续uint8数组
+    """
+    size = len(lut) - 1
+    if index is None:
+        index = np.empty(matrix.shape, dtype=np.float32)
+    scale = size / (vmax - vmin) if vmax > vmin else 0.0
+
+    # 与matplotlib的分箱一致：index = clip(floor((x - vmin) / (vmax - vmin) * size), 0, size-1)，
+    # NaN 指向最后一项
+    np.subtract(matrix, vmin, out=index, casting='unsafe')
+    np.multiply(index, scale, out=index)
+    np.clip(index, 0, size - 1, out=index)
+    index[np.isnan(index)] = size
+    indices = index.astype(np.uint16)
+
+    if out is None:
+        out = np.empty(matrix.shape + (4,), dtype=np.uint8)
+    # 每个像素的4个字节作为一个uint32一次取出
+    np.take(lut.view(np.uint32).ravel(), indices, out=out.view(np.uint32).reshape(matrix.shape))
+    return out
@@ -0,0 +1,521 @@
+# module/data_cache.py
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+import src.module.out_of_core as out_of_core
+import src.module.quality as quality
+import src.module.read_files as read_files
+from src.module.dataset import DEFAULT_DTYPE, FileRecord, RaggedDataset
+
+# 缓存默认上限：512 MB
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 待解析文件数达到该值时才启用多进程（进程启动本身有开销）
+PARALLEL_THRESHOLD = 16
+
+# 磁盘暂存模式下每批读取的文件数，只有一批的列数据同时在内存中
+DISK_LOAD_BATCH = 64
+
+# 后台预读最多把缓存填充到容量的这一比例，避免挤掉前台正在使用的数据
+PREFETCH_FILL_RATIO = 0.9
+
+# 顺带缓存的其他列（未被请求过）最多占用缓存容量的这一比例
+SPECULATIVE_RATIO = 0.25
+
+# 每个文件统计量的缓存上限：8 MB；每项连同键按 STATS_ENTRY_BYTES 计，约3万个文件的行范围
+STATS_CACHE_BYTES = 8 * 1024 * 1024
+STATS_ENTRY_BYTES = 256
+
+
+def file_fingerprint(file_path):
+    """文件指纹：绝对路径、大小和修改时间，文件被改写后指纹随之变化
+
+    Args:
+        file_path (str): 文件路径
+
+    Returns:
+        tuple: (绝对路径, 字节数, 修改时间ns)
+    """
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+class LRUCache:
+    """按字节数限制容量的线程安全LRU缓存
+
+    默认用于列数据：键为 (文件指纹, 列号)，值为该列全部行的一维数组。
+    推测存入的项（speculative）只占用空闲容量、排在最先淘汰的位置，被取出一次后转为普通项。
+
+    Args:
+        max_bytes (int): 缓存容量上限（字节）
+        sizeof (callable): 计算缓存项字节数的函数，默认取 value.nbytes
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, sizeof=None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: value.nbytes)
+        self._items = OrderedDict()
+        self._nbytes = 0
+        # 推测存入且尚未被取出的项：键 -> 字节数
+        self._speculative = {}
+        self._speculative_nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """取出缓存项（未命中返回None），并标记为最近使用"""
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                self._speculative_nbytes -= self._speculative.pop(key, 0)
+            return value
+
+    def put(self, key, value, speculative=False):
+        """存入缓存项，超出容量时淘汰最久未使用的项
+
+        Args:
+            key: 键
+            value: 值
+            speculative (bool): 为True时只在空闲容量足够时存入，不淘汰其他项，
+                并排在最先淘汰的位置
+        """
+        with self._lock:
+            size = self.sizeof(value)
+            if speculative:
+                if key in self._items or self._nbytes + size > self.max_bytes:
+                    return
+                self._items[key] = value
+                self._items.move_to_end(key, last=False)
+                self._nbytes += size
+                self._speculative[key] = size
+                self._speculative_nbytes += size
+                return
+
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._items[key] = value
+            self._nbytes += size
+            while self._nbytes > self.max_bytes:
+                self._pop(next(iter(self._items)))
+
+    def _pop(self, key):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._nbytes -= self.sizeof(old)
+            self._speculative_nbytes -= self._speculative.pop(key, 0)
+
+    def items(self):
+        """所有缓存项的快照，按最近使用排序（最近的在最后），不改变使用顺序"""
+        with self._lock:
+            return list(self._items.items())
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+            self._speculative.clear()
+            self._speculative_nbytes = 0
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    @property
+    def speculative_nbytes(self):
+        """推测存入且尚未被取出的项的总字节数"""
+        return self._speculative_nbytes
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+# 进程内共享的默认缓存
+DEFAULT_CACHE = LRUCache()
+
+# 每个文件读取范围内的统计量：键为 (文件指纹, 列号, 起始行, 结束行)，值为 quality.STAT_DTYPE 的一项
+STATS_CACHE = LRUCache(STATS_CACHE_BYTES, sizeof=lambda stat: STATS_ENTRY_BYTES)
+
+
+class SingleFlight:
+    """合并并发的相同计算：同一键同时只计算一次，其余调用者等待并共享结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def run(self, key, func):
+        """执行 func()；若相同 key 的计算正在进行，则等待其结果（或异常）"""
+        with self._lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._pending[key]
+        return future.result()
+
+
+# 前台读取任务计数：大于0时后台预读暂停
+_foreground = threading.Condition()
+_foreground_jobs = 0
+
+
+@contextmanager
+def foreground_job():
+    """标记一次前台读取，期间后台预读让出CPU"""
+    global _foreground_jobs
+    with _foreground:
+        _foreground_jobs += 1
+    try:
+        yield
+    finally:
+        with _foreground:
+            _foreground_jobs -= 1
+            _foreground.notify_all()
+
+
+class Prefetcher:
+    """后台预读：在低优先级线程中逐个解析文件并存入缓存
+
+    每解析完一个文件都会检查是否有前台读取任务，有则等待其结束后再继续。
+
+    Args:
+        cache (LRUCache): 使用的缓存，默认为进程内共享缓存
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.done = 0
+        self.total = 0
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self, file_paths, column_index):
+        """取消正在进行的预读，开始预读新的文件列表"""
+        self.cancel()
+        self._cancel = threading.Event()
+        self.done = 0
+        self.total = len(file_paths)
+        self._thread = threading.Thread(
+            target=self._run, args=(list(file_paths), column_index, self._cancel),
+            name="prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, file_paths, column_index, cancel):
+        cache = DEFAULT_CACHE if self.cache is None else self.cache
+        for file_path in file_paths:
+            # 前台有读取任务时暂停
+            with _foreground:
+                while _foreground_jobs and not cancel.is_set():
+                    _foreground.wait(0.1)
+            if cancel.is_set() or cache.nbytes > PREFETCH_FILL_RATIO * cache.max_bytes:
+                return
+
+            try:
+                key = (file_fingerprint(file_path), column_index)
+            except OSError:
+                continue
+            if key not in cache:
+                _parse_and_store(cache, key, (file_path, column_index, DEFAULT_DTYPE, sheet_headroom(cache)))
+            self.done += 1
+
+            # 让出GIL，保证界面响应
+            time.sleep(0)
+
+
+# 正在解析的文件：整个工作表的键为文件指纹，单列的键为 (文件指纹, 列号)
+_parse_flight = SingleFlight()
+
+
+# 多进程解析共用的进程池：第一次需要时创建，之后各次读取（包括多个线程同时读取）都提交到同一个池，
+# 避免每次读取都重新启动进程、重新导入 numpy 和 xlrd（Windows 上子进程以 spawn 方式启动，开销尤其大）
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _process_pool(workers):
+    """取得共用的进程池；进程数改变或进程池损坏时重新创建"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool):
+    """丢弃损坏的进程池（子进程异常退出），下次读取时重新创建"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+@atexit.register
+def shutdown_pool():
+    """关闭共用的进程池（程序退出时自动调用）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def sheet_headroom(cache):
+    """缓存还能顺带存入其他列时才值得解析整个工作表，否则只解析所需的一列"""
+    return (cache.speculative_nbytes < SPECULATIVE_RATIO * cache.max_bytes
+            and cache.nbytes < PREFETCH_FILL_RATIO * cache.max_bytes)
+
+
+def _parse_file(task):
+    """子进程中解析单个文件（模块级函数，便于序列化）
+
+    task 为 (文件路径, 列号, 样本精度, 是否解析整个工作表)，返回 (数组, 错误信息)。
+    """
+    file_path, column_index, dtype, whole_sheet = task
+    try:
+        if whole_sheet:
+            return read_files.read_full_sheet(file_path, dtype), None
+        return read_files.read_full_column(file_path, column_index, dtype), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _store_result(cache, key, task, result):
+    """把 _parse_file 的结果存入缓存，返回 (所需列的整列数据, 错误信息)，读取失败时数据为None"""
+    array, error = result
+    if error is not None:
+        return None, error
+    if task[3]:
+        return store_sheet(cache, key[0], array, key[1]), None
+    cache.put(key, array)
+    return array, None
+
+
+def _parse_and_store(cache, key, task):
+    """在当前进程中解析并存入缓存；多个标签页同时读取同一文件时只解析一次"""
+    flight_key = key[0] if task[3] else key
+    return _store_result(cache, key, task, _parse_flight.run(flight_key, lambda: _parse_file(task)))
+
+
+def store_sheet(cache, fingerprint, sheet, column_index):
+    """
+    把解析得到的工作表按列存入缓存：所需的列总是存入，其余各列作为推测项顺带存入，
+    同一文件之后以其他列号读取（如另一个标签页、时间列）时无需重新解析
+
+    推测项最多占用缓存容量的 SPECULATIVE_RATIO，且排在最先淘汰的位置，不会挤掉其他标签页
+    正在使用的数据。每列单独拷贝，淘汰某一列即释放其内存，缓存的字节数与实际占用一致。
+
+    Args:
+        cache (LRUCache): 缓存
+        fingerprint (tuple): 文件指纹
+        sheet (np.ndarray): read_files.read_full_sheet 的结果 (列数, 行数)
+        column_index (int): 所需的列号
+
+    Returns:
+        np.ndarray: 所需列的整列数据（列号超出范围时为空数组）
+    """
+    limit = SPECULATIVE_RATIO * cache.max_bytes
+    for other in range(len(sheet)):
+        key = (fingerprint, other)
+        if other == column_index or key in cache:
+            continue
+        if cache.speculative_nbytes + sheet[other].nbytes > limit:
+            break
+        cache.put(key, sheet[other].copy(), speculative=True)
+
+    if column_index < len(sheet):
+        column = sheet[column_index].copy()
+    else:
+        column = np.empty(0, dtype=sheet.dtype)
+    cache.put((fingerprint, column_index), column)
+    return column
+
+
+def load_columns(file_paths, column_index, cache=None, workers=None, dtype=DEFAULT_DTYPE, errors=None):
+    """读取多个文件的整列数据，优先使用缓存，未命中的文件并行解析
+
+    Args:
+        file_paths (list): 文件路径列表
+        column_index (int): 要读取的列索引（0-based）
+        cache (LRUCache): 使用的缓存，默认为进程内共享缓存
+        workers (int): 并行进程数，默认为CPU核数；为1时在当前进程内解析
+        dtype: 样本精度
+        errors (dict): 给定时记录读取失败的文件 {文件路径: 错误信息}
+
+    Returns:
+        list: 与 file_paths 对应的整列数组，读取失败的文件为 None
+    """
+    with foreground_job():
+        return _load_columns(file_paths, column_index, cache, workers, dtype, errors)[0]
+
+
+def _load_columns(file_paths, column_index, cache, workers, dtype, errors):
+    """load_columns 的实现，返回 (整列数组列表, 文件指纹列表)"""
+    cache = DEFAULT_CACHE if cache is None else cache
+    errors = {} if errors is None else errors
+    columns = [None] * len(file_paths)
+    fingerprints = [None] * len(file_paths)
+    missing = []
+    for i, file_path in enumerate(file_paths):
+        # 确保文件存在
+        if not os.path.isfile(file_path):
+            errors.setdefault(file_path, "文件不存在")
+            continue
+        try:
+            key = (file_fingerprint(file_path), column_index)
+        except OSError:
+            # 文件在检查之后被删除
+            errors.setdefault(file_path, "文件不存在")
+            continue
+        fingerprints[i] = key[0]
+        column = cache.get(key)
+        if column is None:
+            missing.append((i, key))
+        else:
+            columns[i] = column
+
+    # 每个结果到达后立即存入缓存并释放，同一时刻只有少数工作表在内存中
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(missing) >= PARALLEL_THRESHOLD:
+        whole_sheet = sheet_headroom(cache)
+        tasks = [(file_paths[i], column_index, dtype, whole_sheet) for i, _ in missing]
+        chunksize = max(1, len(tasks) // (workers * 4))
+        pool = _process_pool(workers)
+        done = 0
+        try:
+            results = pool.map(_parse_file, tasks, chunksize=chunksize)
+            for (i, key), task, result in zip(missing, tasks, results):
+                columns[i], error = _store_result(cache, key, task, result)
+                if error is not None:
+                    errors.setdefault(file_paths[i], error)
+                done += 1
+        except BrokenProcessPool:
+            # 子进程异常退出：丢弃进程池，其余文件在当前进程内解析
+            _discard_pool(pool)
+        missing = missing[done:]
+
+    for i, key in missing:
+        task = (file_paths[i], column_index, dtype, sheet_headroom(cache))
+        columns[i], error = _parse_and_store(cache, key, task)
+        if error is not None:
+            errors.setdefault(file_paths[i], error)
+    return columns, fingerprints
+
+
+def load_dataset(file_paths, column_index, start_row=1, end_row=None, cache=None, workers=None,
+                 dtype=DEFAULT_DTYPE, disk=False, errors=None):
+    """带缓存、并行解析的 read_files.read_dataset_from_xls
+
+    每个文件读取范围内的统计量（quality.STAT_DTYPE）在截取时一并计算，按文件指纹和行范围缓存，
+    记录在 FileRecord.stats 中；再次读取时直接取出，quality.file_statistics 不再遍历样本。
+
+    Args:
+        file_paths (list): 文件路径列表
+        column_index (int): 要读取的列索引（0-based）
+        start_row (int): 起始行索引（0-based）
+        end_row (int): 结束行索引（0-based，不包括此行）
+        cache (LRUCache): 使用的缓存，默认为进程内共享缓存
+        workers (int): 并行进程数
+        dtype: 样本精度
+        disk (bool): 为True时分批读取，样本依次写入磁盘暂存数组（np.memmap）
+        errors (dict): 给定时记录读取失败的文件 {文件路径: 错误信息}
+
+    Returns:
+        RaggedDataset: 每个成功读取的文件按完整长度保存
+    """
+    if not disk:
+        with foreground_job():
+            columns, fingerprints = _load_columns(file_paths, column_index, cache, workers, dtype, errors)
+        arrays, records, fingerprints = _segments(file_paths, columns, fingerprints, column_index,
+                                                  start_row, end_row)
+        dataset = RaggedDataset.from_arrays(arrays, records, dtype=dtype)
+        _attach_statistics(dataset, fingerprints)
+        return dataset
+
+    records = []
+
+    def batches():
+        for i in range(0, len(file_paths), DISK_LOAD_BATCH):
+            batch = file_paths[i:i + DISK_LOAD_BATCH]
+            with foreground_job():
+                columns, fingerprints = _load_columns(batch, column_index, cache, workers, dtype, errors)
+            arrays, batch_records, fingerprints = _segments(batch, columns, fingerprints, column_index,
+                                                            start_row, end_row)
+            _attach_statistics(RaggedDataset.from_arrays(arrays, batch_records, dtype=dtype), fingerprints)
+            records.extend(batch_records)
+            yield from arrays
+
+    values = out_of_core.scratch_from_chunks(batches(), dtype)
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum([rec.length for rec in records], out=offsets[1:])
+    return RaggedDataset(values, offsets, records)
+
+
+def _segments(file_paths, columns, fingerprints, column_index, start_row, end_row):
+    """从整列数据中截取行范围，跳过读取失败的文件，返回 (数组列表, 元数据列表, 文件指纹列表)"""
+    arrays = []
+    records = []
+    kept = []
+    for file_path, column, fingerprint in zip(file_paths, columns, fingerprints):
+        if column is None:
+            continue
+        use_end_row = len(column) if end_row is None else min(end_row, len(column))
+        segment = column[start_row:use_end_row]
+        arrays.append(segment)
+        records.append(FileRecord(file_path, start_row, start_row + len(segment), column_index))
+        kept.append(fingerprint)
+    return arrays, records, kept
+
+
+def _attach_statistics(dataset, fingerprints):
+    """为每个文件记录统计量：已缓存的直接取出，其余一次向量化计算后存入缓存"""
+    records = dataset.records
+    keys = [(fingerprint, rec.column, rec.start_row, rec.end_row)
+            for fingerprint, rec in zip(fingerprints, records)]
+    pending = []
+    for i, (rec, key) in enumerate(zip(records, keys)):
+        rec.stats = STATS_CACHE.get(key)
+        if rec.stats is None:
+            pending.append(i)
+    if not pending:
+        return
+
+    part = dataset if len(pending) == len(records) else dataset.take(pending)
+    for i, stat in zip(pending, quality.file_statistics(part)):
+        records[i].stats = stat
+        STATS_CACHE.put(keys[i], stat)
@@ -0,0 +1,188 @@
+# module/dataset.py
+import numpy as np
+
+# 默认样本精度：float32 每个样本 4 字节，远小于 Python float 对象（约 24 字节 + 8 字节指针）
+DEFAULT_DTYPE = np.float32
+
+
+class FileRecord:
+    """单个文件的元数据（路径、读取的行范围、列号，以及读取时计算的统计量）
+
+    Args:
+        path (str): 文件路径
+        start_row (int): 起始行索引（0-based）
+        end_row (int): 结束行索引（0-based，不包括此行）
+        column (int): 读取的列索引（0-based）
+        stats (np.void): 读取的行范围内的统计量（字段见 quality.STAT_DTYPE），由 data_cache.load_dataset 给出
+    """
+    __slots__ = ("path", "start_row", "end_row", "column", "stats")
+
+    def __init__(self, path, start_row, end_row, column, stats=None):
+        self.path = path
+        self.start_row = start_row
+        self.end_row = end_row
+        self.column = column
+        self.stats = stats
+
+    @property
+    def length(self):
+        """该文件实际读取到的样本数"""
+        return self.end_row - self.start_row
+
+    def trimmed(self, length):
+        """返回截断到 length 个样本后的元数据（不保留统计量）"""
+        return FileRecord(self.path, self.start_row,
+                          self.start_row + min(length, self.length), self.column)
+
+    def __repr__(self):
+        return (f"FileRecord(path={self.path!r}, rows={self.start_row}:{self.end_row}, "
+                f"column={self.column})")
+
+
+class HeatDataset:
+    """紧凑的数据集容器
+
+    所有样本存放在一个连续的二维数组 values 中，形状为 (文件数, 样本数)，
+    第 i 行对应 records[i] 描述的文件。文件长度不足样本数时，行尾用 NaN 填充，
+    实际长度见 records[i].length。
+
+    Args:
+        values (np.ndarray): 样本矩阵
+        records (list): FileRecord 列表，长度与 values 的行数一致
+    """
+    __slots__ = ("values", "records")
+
+    def __init__(self, values, records):
+        records = list(records)
+        if values.ndim != 2 or values.shape[0] != len(records):
+            raise ValueError("values 的行数必须与 records 数量一致")
+        self.values = values
+        self.records = records
+
+    @classmethod
+    def from_arrays(cls, arrays, records, dtype=DEFAULT_DTYPE, width=None):
+        """将若干一维数组拷贝进一个预分配的连续矩阵
+
+        Args:
+            arrays (list): 每个文件的一维样本数组
+            records (list): 对应的 FileRecord 列表
+            dtype: 样本精度
+            width (int): 矩阵列数，默认取最长数组的长度
+
+        Returns:
+            HeatDataset: 新的数据集
+        """
+        if width is None:
+            width = max((len(a) for a in arrays), default=0)
+        values = np.full((len(arrays), width), np.nan, dtype=dtype)
+        for i, arr in enumerate(arrays):
+            n = min(len(arr), width)
+            values[i, :n] = arr[:n]
+        return cls(values, records)
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    @property
+    def n_samples(self):
+        """每行的样本数（矩阵列数）"""
+        return self.values.shape[1]
+
+    @property
+    def lengths(self):
+        """每个文件的实际样本数"""
+        return np.array([rec.length for rec in self.records], dtype=np.int64)
+
+    @property
+    def paths(self):
+        return [rec.path for rec in self.records]
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def replace(self, values, records=None):
+        """用新的样本矩阵构造数据集，默认沿用原有元数据"""
+        return HeatDataset(values, self.records if records is None else records)
+
+    def take(self, indices):
+        """按行索引选出部分文件"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return HeatDataset(self.values[indices], [self.records[i] for i in indices])
+
+    def __repr__(self):
+        return (f"HeatDataset(files={len(self)}, samples={self.n_samples}, "
+                f"dtype={self.values.dtype}, nbytes={self.nbytes})")
+
+
+class RaggedDataset:
+    """不等长数据集容器
+
+    所有文件的样本首尾相接存放在一个一维数组 values 中，第 i 个文件的样本为
+    values[offsets[i]:offsets[i + 1]]，因此每个文件都保留完整长度，读取后无需再拷贝。
+
+    Args:
+        values (np.ndarray): 一维样本缓冲区
+        offsets (np.ndarray): 长度为 文件数 + 1 的起始偏移量
+        records (list): FileRecord 列表
+    """
+    __slots__ = ("values", "offsets", "records")
+
+    def __init__(self, values, offsets, records):
+        records = list(records)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if values.ndim != 1 or len(offsets) != len(records) + 1:
+            raise ValueError("offsets 的长度必须为 records 数量加一")
+        self.values = values
+        self.offsets = offsets
+        self.records = records
+
+    @classmethod
+    def from_arrays(cls, arrays, records, dtype=DEFAULT_DTYPE):
+        """把若干一维数组拼接为一个缓冲区
+
+        Args:
+            arrays (list): 每个文件的一维样本数组
+            records (list): 对应的 FileRecord 列表
+            dtype: 样本精度
+
+        Returns:
+            RaggedDataset: 新的数据集
+        """
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([len(a) for a in arrays], out=offsets[1:])
+        values = np.empty(offsets[-1], dtype=dtype)
+        for i, arr in enumerate(arrays):
+            values[offsets[i]:offsets[i + 1]] = arr
+        return cls(values, offsets, records)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def lengths(self):
+        """每个文件的样本数"""
+        return np.diff(self.offsets)
+
+    @property
+    def paths(self):
+        return [rec.path for rec in self.records]
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.offsets.nbytes
+
+    def row(self, index):
+        """第 index 个文件的样本（视图）"""
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+    def take(self, indices):
+        """按文件索引选出部分文件（会拷贝所选样本）"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return RaggedDataset.from_arrays([self.row(i) for i in indices],
+                                         [self.records[i] for i in indices],
+                                         dtype=self.values.dtype)
+
+    def __repr__(self):
+        return (f"RaggedDataset(files={len(self)}, samples={len(self.values)}, "
+                f"dtype={self.values.dtype}, nbytes={self.nbytes})")
@@ -0,0 +1,89 @@
+# module/grid.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import src.module.data_cache as data_cache
+import src.module.pipeline as pipeline
+import src.module.read_files as read_files
+
+
+class GridPanel:
+    """网格视图中的一个面板：数据来源、处理参数及处理结果
+
+    Args:
+        label (str): 面板标题（如文件夹名）
+        source (str): 数据来源（如文件夹路径），鼠标悬停时显示
+        files (list): 文件路径列表
+        params (PipelineParams 或 PixelMapParams): 处理参数
+    """
+    __slots__ = ("label", "source", "files", "params", "matrix", "error")
+
+    def __init__(self, label, source, files, params):
+        self.label = label
+        self.source = source
+        self.files = files
+        self.params = params
+        self.matrix = None
+        self.error = None
+
+
+def list_data_folders(parent_folder):
+    """
+    列出包含xls文件的子文件夹（按名称排序）
+
+    Args:
+        parent_folder (str): 父文件夹路径
+
+    Returns:
+        list: 子文件夹路径列表
+    """
+    if not os.path.isdir(parent_folder):
+        return []
+    folders = []
+    for name in sorted(os.listdir(parent_folder)):
+        folder = os.path.join(parent_folder, name)
+        if os.path.isdir(folder) and any(f.endswith('.xls') for f in os.listdir(folder)):
+            folders.append(folder)
+    return folders
+
+
+def folder_panels(folders, params):
+    """每个文件夹一个面板，使用相同的处理参数"""
+    return [GridPanel(os.path.basename(folder), folder, read_files.list_excel_files(folder), params)
+            for folder in folders]
+
+
+def _prepare_panel(panel):
+    try:
+        panel.matrix = pipeline.build_matrix(panel.files, panel.params).matrix
+    except pipeline.PipelineError as e:
+        panel.error = f"{e.title}: {e.message}"
+    except Exception as e:
+        panel.error = str(e)
+    return panel
+
+
+def prepare_panels(panels, workers=None):
+    """
+    并行处理所有面板（结果写入各面板的 matrix 或 error）
+
+    先把所有面板用到的列一次性读入缓存（未命中的文件由同一个进程池解析），
+    再用线程并行执行各面板的对齐和降采样。
+
+    Args:
+        panels (list): GridPanel 列表
+        workers (int): 并行线程数，默认为CPU核数
+
+    Returns:
+        list: 同一个 GridPanel 列表
+    """
+    columns = {}
+    for panel in panels:
+        columns.setdefault(panel.params.column_index, []).extend(panel.files)
+    for column_index, files in columns.items():
+        data_cache.load_columns(list(dict.fromkeys(files)), column_index)
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_prepare_panel, panels))
+    return panels
@@ -1,49 +1,121 @@
-import math
 import numpy as np  # 导入numpy库，用于处理数组和矩阵
-from sklearn.preprocessing import MinMaxScaler
-from scipy.signal import savgol_filter
+from scipy.signal import lfilter, savgol_filter
 from sklearn.decomposition import PCA
+from src.module.dataset import HeatDataset
+import src.module.out_of_core as out_of_core
 
-def cut_data(raw_datas):
+try:
+    import pywt  # 可选依赖：仅小波降噪需要
+except ImportError:
+    pywt = None
+
+def cut_data(dataset, disk=False, length=None):
     """
-    找出二维数组中最短的子数组，并将所有子数组的长度修剪为最短子数组的长度。
+    找出数据集中最短的文件，并将所有文件的长度修剪为最短文件的长度。
     
     参数:
-    arr (list of list): 输入的二维数组
+    dataset (RaggedDataset 或 HeatDataset): 输入的数据集
+    disk (bool): 为True时结果写入磁盘暂存数组（np.memmap），按块拷贝
+    length (int): 修剪到的长度，默认取最短文件的长度（只处理部分文件时传入全部文件的公共长度）
     
     返回:
-    list of list: 修剪后的二维数组
+    HeatDataset: 修剪后的数据集；各文件原本等长时样本矩阵是原缓冲区的视图
     """
-    # 找出最短的子数组长度
-    min_length = min(len(sub_arr) for sub_arr in raw_datas)
+    # 找出最短的文件长度
+    lengths = dataset.lengths
+    if length is None:
+        min_length = int(lengths.min()) if len(dataset) else 0
+    elif len(dataset) and lengths.min() < length:
+        raise ValueError(f"文件长度不足 {length}，无法修剪")
+    else:
+        min_length = length
     
-    # 修剪所有子数组到最短长度
-    trimmed_datas = [sub_arr[:min_length] for sub_arr in raw_datas]
+    # 修剪所有文件到最短长度
+    records = [rec.trimmed(min_length) for rec in dataset.records]
+    if isinstance(dataset, HeatDataset):
+        return dataset.replace(dataset.values[:, :min_length], records)
+
+    if len(dataset) and np.all(lengths == min_length):
+        values = dataset.values.reshape(len(dataset), min_length)
+    elif disk:
+        values = out_of_core.scratch_empty((len(dataset), min_length), dataset.values.dtype)
+        for block in out_of_core.row_blocks(len(dataset), min_length):
+            index = dataset.offsets[block][:, None] + np.arange(min_length)
+            values[block] = dataset.values[index]
+    else:
+        index = dataset.offsets[:-1, None] + np.arange(min_length)
+        values = dataset.values[index]
+    return HeatDataset(values, records)
+
+#插值重采样
+def resample_data(dataset, length=None, disk=False):
+    """
+    通过线性插值把每个文件的数据重采样到统一长度，不丢弃任何样本。
     
-    return trimmed_datas
+    参数:
+    dataset (RaggedDataset): 输入的不等长数据集
+    length (int): 统一长度，默认取最长文件的长度
+    disk (bool): 为True时结果写入磁盘暂存数组（np.memmap），按块计算
+    
+    返回:
+    HeatDataset: 形状为 (文件数, length) 的数据集
+    """
+    lengths = dataset.lengths
+    if length is None:
+        length = int(lengths.max()) if len(dataset) else 0
+    if len(dataset) and lengths.min() <= 0:
+        raise ValueError("存在没有数据的文件，无法重采样")
+
+    records = list(dataset.records)
+    if disk:
+        values = out_of_core.scratch_empty((len(dataset), length), dataset.values.dtype)
+        for block in out_of_core.row_blocks(len(dataset), length):
+            part = _resample_rows(dataset.values, dataset.offsets[block], lengths[block], length)
+            values[block] = part
+        return HeatDataset(values, records)
+
+    resampled = _resample_rows(dataset.values, dataset.offsets[:-1], lengths, length)
+    return HeatDataset(resampled.astype(dataset.values.dtype, copy=False), records)
+
+def _resample_rows(buffer, starts, lengths, length):
+    """对缓冲区中起点为starts、长度为lengths的若干文件做线性插值"""
+    # 每个文件在自身的[0, n-1]区间上取length个等距位置，换算到缓冲区的绝对位置
+    position = np.linspace(0, 1, length)[None, :] * (lengths[:, None] - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, lengths[:, None] - 1)
+    fraction = position - lower
+    base = starts[:, None]
+
+    lower_values = buffer[base + lower].astype(np.float64)
+    upper_values = buffer[base + upper].astype(np.float64)
+    return lower_values * (1 - fraction) + upper_values * fraction
 
 #减去暗电流
-def Subtract_dark_current(column_data):
-        #这两个循环的作用是减去一组数据中的最小值，相当于减去暗电流，用于增加对比度    
-        min = 1   #定义一个大值用于存储一组数据中的最小值
-        for i in range(len(column_data)):
-            if column_data[i] < float(min):
-                min = column_data[i]
-        for j in range(len(column_data)):
-            column_data[j] = pow((column_data[j] - min)*10e9,1)
-        return column_data
+def Subtract_dark_current(dataset):
+        #减去每个文件数据中的最小值（不超过1），相当于减去暗电流，用于增加对比度
+        values = dataset.values
+        dark = np.minimum(np.nanmin(values, axis=1, keepdims=True), 1)
+        return dataset.replace(((values - dark) * 10e9).astype(values.dtype, copy=False))
 
 #归一化
-def Normalized_data(column_data):
-    for i in range(len(column_data)):
-        arr = np.array(column_data[i]).reshape(-1, 1)  # 转换为二维数组，每行一个样本，每列一个特征
- 
-        scaler = MinMaxScaler()
-        scaled_arr = scaler.fit_transform(arr)
-        scaled_arr = [math.pow(item,1.5) for item in scaled_arr]
-        column_data[i] = scaled_arr
+def Normalized_data(dataset, disk=False):
+    # 按文件（行）做最小-最大归一化，再做1.5次幂增强对比度
+    # disk为True时结果写入磁盘暂存数组，按块处理
+    values = dataset.values
+    if disk:
+        normalized = out_of_core.scratch_empty(values.shape, values.dtype)
+        for block in out_of_core.row_blocks(*values.shape):
+            normalized[block] = _normalize_rows(np.asarray(values[block]))
+        return dataset.replace(normalized)
+    return dataset.replace(_normalize_rows(values))
 
-    return column_data
+def _normalize_rows(values):
+    row_min = np.nanmin(values, axis=1, keepdims=True)
+    row_range = np.nanmax(values, axis=1, keepdims=True) - row_min
+    row_range[row_range == 0] = 1  # 与MinMaxScaler一致：常数序列归一化为0
+    scaled = (values - row_min) / row_range
+    np.power(scaled, 1.5, out=scaled)
+    return scaled.astype(values.dtype, copy=False)
 
 
 
@@ -159,75 +231,364 @@ def reduce_data(data, target_length, method):
     return np.array(reduced)
 
 
-# 新增方法
-def reduce_data_median(data, target_length):
-    """使用中值缩减数据长度"""
-    original_length = len(data)
-    step = max(1, original_length // target_length)
-    reduced = []
+# 对整个数据集按行降采样
+def reduce_dataset(dataset, length, method):
+    """
+    将数据集中每个文件的数据降采样到 length 个点，结果写入预分配的矩阵
     
-    for i in range(0, original_length, step):
-        segment = data[i:i+step]
-        if segment:
-            reduced.append(np.median(segment))
+    参数:
+    dataset (HeatDataset): 输入的数据集（各行等长）
+    length (int): 目标数据点数
+    method (str): 'standard'、'sampling'、'rms'、'mean'、'max'、'median'、'ema'、
+                  'wavelet'、'savgol' 或 'pca'
     
-    return reduced[:target_length]
+    返回:
+    HeatDataset: 形状为 (文件数, length) 的数据集
+    """
+    values = dataset.values
+    n_files, n = values.shape
 
-def exponential_moving_average(data, target_length, alpha=0.3):
-    """指数加权移动平均"""
-    if len(data) <= target_length:
-        return data
+    # 磁盘暂存的数据按块读入内存处理（各行互相独立；PCA需要全部行，单独按列块计算）
+    if isinstance(values, np.memmap):
+        if method == 'pca':
+            if length > min(values.shape):
+                raise ValueError(f"PCA最多只能得到 {min(values.shape)} 个主成分（文件数与样本数的较小值）")
+            reduced = pca_reduction_blockwise(values, length)
+        else:
+            reduced = np.empty((n_files, length), dtype=values.dtype)
+            for block in out_of_core.row_blocks(n_files, n):
+                part = HeatDataset(np.asarray(values[block]), dataset.records[block])
+                reduced[block] = reduce_dataset(part, length, method).values
+        return dataset.replace(reduced.astype(values.dtype, copy=False))
+
+    if method == 'standard':
+        # 与process_data一致：等分为length份取均值，不足length个时用-1补齐
+        if n > length:
+            chunk_size = n // length
+            blocks = values[:, :chunk_size * length].reshape(n_files, length, chunk_size)
+            reduced = blocks.mean(axis=2, dtype=np.float64)
+        else:
+            reduced = np.full((n_files, length), -1, dtype=np.float64)
+            reduced[:, :n] = values
+    elif method in ('rms', 'mean', 'max'):
+        if method == 'rms' and length >= n:
+            raise ValueError("目标数据点数必须小于原始数据长度")
+        if length <= 0:
+            raise ValueError("目标数据点数必须大于0")
+        if length > n:
+            raise ValueError("目标数据点数不能大于原始数据长度")
+        starts, sizes = _block_bounds(n, length)
+        source = values.astype(np.float64)
+        if method == 'rms':
+            reduced = np.sqrt(np.add.reduceat(source ** 2, starts, axis=1) / sizes)
+        elif method == 'max':
+            reduced = np.maximum.reduceat(source, starts, axis=1)
+        else:
+            reduced = np.add.reduceat(source, starts, axis=1) / sizes
+    elif method in ROW_SMOOTHERS:
+        reduced = ROW_SMOOTHERS[method](values, length)
+    elif method == 'pca':
+        reduced = pca_reduction(values, length)
+    elif method == 'sampling':
+        # LTTB逐点比较面积，只能逐行处理
+        reduced = np.full((n_files, length), -1, dtype=np.float64)
+        for i in range(n_files):
+            sampled = np.asarray(data_sampling(values[i], length), dtype=np.float64)
+            if sampled.ndim == 2:
+                sampled = sampled[:, 1]
+            reduced[i, :len(sampled)] = sampled[:length]
+    else:
+        raise ValueError(f"未知的处理方法: {method}")
+
+    return dataset.replace(reduced.astype(values.dtype, copy=False))
+
+
+def _block_bounds(n, parts):
+    """与np.array_split一致的分组边界：前 n % parts 组多一个元素，返回 (各组起点, 各组大小)"""
+    base, remainder = divmod(n, parts)
+    sizes = np.array([base + 1] * remainder + [base] * (parts - remainder))
+    starts = np.concatenate(([0], np.cumsum(sizes[:-1]))).astype(np.intp)
+    return starts, sizes
+
+
+# 二维分块归约支持的方式
+BLOCK_METHODS = ('mean', 'max', 'rms')
+
+def block_reduce(values, shape, method):
+    """
+    把矩阵沿两个方向同时分块归约（如 (文件数, 样本数) -> (data_groups, length)），每个元素都参与计算
+
+    分块边界与np.array_split一致；NaN（如按时间分箱的空箱）不参与计算，整块都是NaN时结果为NaN。
+
+    参数:
+    values (np.ndarray): 二维矩阵
+    shape (tuple): 目标形状 (行数, 列数)，不能超过原矩阵
+    method (str): 'mean'、'max' 或 'rms'
+
+    返回:
+    np.ndarray: 目标形状的float64矩阵
+    """
+    if method not in BLOCK_METHODS:
+        raise ValueError(f"未知的分块归约方式: {method}")
+    values = np.asarray(values, dtype=np.float64)
+    rows, cols = shape
+    if rows <= 0 or cols <= 0:
+        raise ValueError("目标行数和列数必须大于0")
+    if rows > values.shape[0] or cols > values.shape[1]:
+        raise ValueError(f"目标形状 {tuple(shape)} 不能大于原矩阵 {values.shape}")
+    row_starts, _ = _block_bounds(values.shape[0], rows)
+    col_starts, _ = _block_bounds(values.shape[1], cols)
+
+    if method == 'max':
+        # fmax 忽略NaN
+        return np.fmax.reduceat(np.fmax.reduceat(values, col_starts, axis=1), row_starts, axis=0)
+
+    finite = np.isfinite(values)
+    filled = np.where(finite, values, 0.0)
+    if method == 'rms':
+        filled **= 2
+    totals = np.add.reduceat(np.add.reduceat(filled, col_starts, axis=1), row_starts, axis=0)
+    counts = np.add.reduceat(np.add.reduceat(finite.astype(np.float64), col_starts, axis=1), row_starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        reduced = totals / counts
+    return np.sqrt(reduced) if method == 'rms' else reduced
+
+
+# 按时间分箱支持的归约方式
+TIME_BIN_METHODS = ('mean', 'max', 'rms')
+
+def time_bin_dataset(dataset, times, length, method, align='cut', disk=False, span=None):
+    """
+    按时间列把每个文件的样本划分到 length 个等时间间隔的区间，每个区间取均值、最大值或均方根。
+    
+    采样间隔不均匀（自适应步长、暂停）时，按样本序号分组得到的各点对应的时间长度不同；
+    这里热图的每一点对应相同的时间间隔。所有文件的样本首尾相接，按区间编号一次性
+    用 searchsorted 找出区间边界、用 reduceat 归约。
+    
+    参数:
+    dataset (RaggedDataset): 数据列
+    times (RaggedDataset): 时间列，与 dataset 逐个文件、逐个样本对应
+    length (int): 时间区间数
+    method (str): 'mean'、'max' 或 'rms'
+    align (str): 'cut' 时所有文件使用相同的时长（最短文件的时长），较长文件超出的样本丢弃；
+                 'resample' 时每个文件按自身的时长划分区间
+    disk (bool): 为True时结果写入磁盘暂存数组（np.memmap），按文件块计算
+    span (float): align为'cut'时的公共时长，默认取最短文件的时长（只处理部分文件时传入）
     
-    # 计算平滑因子
-    smoothed = [data[0]]
-    for i in range(1, len(data)):
-        smoothed.append(alpha * data[i] + (1 - alpha) * smoothed[-1])
+    返回:
+    HeatDataset: 形状为 (文件数, length) 的数据集，没有样本落入的区间为 NaN
+    """
+    if method not in TIME_BIN_METHODS:
+        raise ValueError(f"按时间分箱不支持的方法: {method}")
+    if length <= 0:
+        raise ValueError("目标数据点数必须大于0")
+    lengths = dataset.lengths
+    if not np.array_equal(lengths, times.lengths):
+        raise ValueError("时间列与数据列的行数不一致")
+    if len(dataset) and lengths.min() <= 0:
+        raise ValueError("存在没有数据的文件，无法按时间分箱")
+
+    # 每个文件的起止时间（忽略非数值单元格）
+    starts = times.offsets[:-1]
+    first = np.fmin.reduceat(times.values, starts).astype(np.float64) if len(dataset) else np.empty(0)
+    last = np.fmax.reduceat(times.values, starts).astype(np.float64) if len(dataset) else np.empty(0)
+    duration = last - first
+    if align == 'cut' and len(dataset):
+        duration[:] = duration.min() if span is None else span
+    if not np.all(duration > 0):
+        raise ValueError("时间列中没有递增的时间值，无法按时间分箱")
+
+    records = list(dataset.records)
+    if disk:
+        binned = out_of_core.scratch_empty((len(dataset), length), dataset.values.dtype)
+        for block, view in out_of_core.ragged_blocks(dataset):
+            time_values = times.values[times.offsets[block.start]:times.offsets[block.stop]]
+            binned[block] = _bin_by_time(view.values, time_values, view.offsets,
+                                         first[block], duration[block], length, method)
+        return HeatDataset(binned, records)
+
+    binned = _bin_by_time(dataset.values, times.values, dataset.offsets, first, duration, length, method)
+    return HeatDataset(binned.astype(dataset.values.dtype, copy=False), records)
+
+def _bin_by_time(values, times, offsets, first, duration, length, method):
+    """对首尾相接的若干文件按时间分箱，返回 (文件数, length) 的float64矩阵"""
+    n_files = len(offsets) - 1
+    file_index = np.repeat(np.arange(n_files), np.diff(offsets))
+
+    # 样本在本文件时间轴上的区间位置；恰好落在终点的样本归入最后一个区间，
+    # 超出时长、时间或数值为NaN的样本丢弃（NaN参与比较的结果为False）
+    position = (np.asarray(times, dtype=np.float64) - first[file_index]) * (length / duration)[file_index]
+    samples = np.asarray(values, dtype=np.float64)
+    valid = (position >= 0) & (position <= length) & ~np.isnan(samples)
+    keys = file_index[valid] * length + np.minimum(position[valid].astype(np.int64), length - 1)
+    samples = samples[valid]
+
+    # 时间列递增时区间编号已有序；否则（如测量中途时间回绕）先稳定排序
+    if keys.size and np.any(keys[1:] < keys[:-1]):
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        samples = samples[order]
+
+    bounds = np.searchsorted(keys, np.arange(n_files * length + 1))
+    counts = np.diff(bounds)
+    filled = counts > 0
+    # 只对非空区间归约：相邻非空区间之间的空区间长度为0，不影响reduceat的分段
+    segment_starts = bounds[:-1][filled]
+    binned = np.full(n_files * length, np.nan)
+    if segment_starts.size:
+        if method == 'max':
+            binned[filled] = np.maximum.reduceat(samples, segment_starts)
+        elif method == 'rms':
+            binned[filled] = np.sqrt(np.add.reduceat(samples ** 2, segment_starts) / counts[filled])
+        else:
+            binned[filled] = np.add.reduceat(samples, segment_starts) / counts[filled]
+    return binned.reshape(n_files, length)
+
+
+# 新增方法
+# 以下方法同时接受一维序列和二维矩阵（每行一个文件），二维时所有行一次性批量处理；
+# 结果长度不足target_length时用-1补齐，与process_data一致
+
+def _as_rows(data):
+    """把输入转为二维float64矩阵，并返回输入是否为一维"""
+    values = np.asarray(data, dtype=np.float64)
+    return np.atleast_2d(values), values.ndim == 1
+
+def _from_rows(reduced, is_1d):
+    return reduced[0] if is_1d else reduced
+
+def _take_every_step(values, target_length):
+    """按固定步长抽取target_length个点，不足时用-1补齐"""
+    n = values.shape[1]
+    reduced = np.full((values.shape[0], target_length), -1, dtype=np.float64)
+    if n <= target_length:
+        reduced[:, :n] = values
+        return reduced
+    step = n // target_length
+    reduced[:] = values[:, ::step][:, :target_length]
+    return reduced
+
+def reduce_data_median(data, target_length):
+    """使用中值缩减数据长度（分块视图上一次求中值）"""
+    values, is_1d = _as_rows(data)
+    n = values.shape[1]
+    if n <= target_length:
+        return _from_rows(_take_every_step(values, target_length), is_1d)
+
+    # 每块step个点，reshape得到 (行数, target_length, step) 的视图，不拷贝数据
+    step = n // target_length
+    blocks = values[:, :step * target_length].reshape(values.shape[0], target_length, step)
+    return _from_rows(np.median(blocks, axis=2), is_1d)
+
+def exponential_moving_average(data, target_length, alpha=0.3):
+    """指数加权移动平均（对所有行批量执行一阶递推滤波）"""
+    values, is_1d = _as_rows(data)
+    if values.shape[1] <= target_length:
+        return _from_rows(_take_every_step(values, target_length), is_1d)
+
+    # y[n] = alpha * x[n] + (1 - alpha) * y[n-1]，初值 y[0] = x[0]
+    zi = (1 - alpha) * values[:, :1]
+    smoothed, _ = lfilter([alpha], [1, -(1 - alpha)], values, axis=1, zi=zi)
     
     # 降采样到目标长度
-    step = len(smoothed) // target_length
-    return [smoothed[i] for i in range(0, len(smoothed), step)][:target_length]
+    return _from_rows(_take_every_step(smoothed, target_length), is_1d)
 
 def wavelet_denoise(data, target_length, wavelet='db4', level=3):
-    """小波变换降噪"""
+    """小波变换降噪（所有行同时分解、阈值处理和重构）"""
+    if pywt is None:
+        raise ImportError("小波降噪需要安装 PyWavelets（pip install PyWavelets）")
+
+    values, is_1d = _as_rows(data)
+    n = values.shape[1]
+
     # 执行小波变换
-    coeffs = pywt.wavedec(data, wavelet, level=level)
+    coeffs = pywt.wavedec(values, wavelet, level=level, axis=1)
     
-    # 阈值处理（去噪）
-    threshold = np.std(coeffs[-level]) * np.sqrt(2 * np.log(len(data)))
+    # 阈值处理（去噪）：每行的阈值由 coeffs[-level] 估计，对所有系数（包括近似系数）做软阈值
+    threshold = np.std(coeffs[-level], axis=1, keepdims=True) * np.sqrt(2 * np.log(n))
     coeffs = [pywt.threshold(c, threshold, mode='soft') for c in coeffs]
     
-    # 重构信号
-    denoised = pywt.waverec(coeffs, wavelet)
-    
-    # 确保长度一致
-    denoised = denoised[:len(data)]
+    # 重构信号，确保长度一致
+    denoised = pywt.waverec(coeffs, wavelet, axis=1)[:, :n]
     
     # 降采样到目标长度
-    step = len(denoised) // target_length
-    return [denoised[i] for i in range(0, len(denoised), step)][:target_length]
+    return _from_rows(_take_every_step(denoised, target_length), is_1d)
 
 def savgol_smoothing(data, target_length, window_length=15, polyorder=2):
-    """Savitzky-Golay滤波"""
-    if len(data) < window_length:
-        window_length = len(data) // 2 or 1
+    """Savitzky-Golay滤波（沿每行批量滤波）"""
+    values, is_1d = _as_rows(data)
+    n = values.shape[1]
+    if n < window_length:
+        window_length = n // 2 or 1
+    polyorder = min(polyorder, window_length - 1)
     
-    smoothed = savgol_filter(data, window_length, polyorder)
+    smoothed = savgol_filter(values, window_length, polyorder, axis=1)
     
     # 降采样到目标长度
-    step = len(smoothed) // target_length
-    return [smoothed[i] for i in range(0, len(smoothed), step)][:target_length]
+    return _from_rows(_take_every_step(smoothed, target_length), is_1d)
 
 def pca_reduction(data, target_length):
-    """主成分分析降维"""
-    # 将数据转为2D数组
-    data_2d = np.array(data).reshape(-1, 1)
+    """主成分分析降维
+
+    把每个文件（行）视为一个样本、每个时间点视为一个特征，
+    将所有文件投影到前target_length个主成分上。
+    """
+    values = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    max_components = min(values.shape)
+    if target_length > max_components:
+        raise ValueError(f"PCA最多只能得到 {max_components} 个主成分（文件数与样本数的较小值）")
     
     # 应用PCA
-    pca = PCA(n_components=min(target_length, len(data_2d)))
-    transformed = pca.fit_transform(data_2d)
-    
-    # 取第一主成分
-    return transformed[:, 0].tolist()[:target_length]
+    pca = PCA(n_components=target_length)
+    return pca.fit_transform(values)
+
+def pca_reduction_blockwise(values, target_length):
+    """按列块计算的主成分分析，结果与 pca_reduction 一致（磁盘暂存数据使用）
+
+    文件数远小于样本数，因此按列块累加文件间的中心化内积矩阵 (文件数, 文件数)，
+    由其特征分解得到各文件在主成分上的投影；符号规则与sklearn相同（主成分向量中
+    绝对值最大的分量为正），需要再按列块读一遍数据。
+    """
+    n_files, n = values.shape
+    blocks = list(out_of_core.row_blocks(n, n_files))
+    mean = np.empty(n)
+    for block in blocks:
+        mean[block] = np.asarray(values[:, block], dtype=np.float64).mean(axis=0)
+    if not np.isfinite(mean).all():
+        raise ValueError("数据中包含NaN，无法进行PCA降维")
+
+    gram = np.zeros((n_files, n_files))
+    for block in blocks:
+        centered = np.asarray(values[:, block], dtype=np.float64) - mean[block]
+        gram += centered @ centered.T
+
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    order = np.argsort(eigenvalues)[::-1][:target_length]
+    singular = np.sqrt(np.clip(eigenvalues[order], 0, None))
+    scores = eigenvectors[:, order] * singular
+
+    # 主成分向量 v_k = Xc^T u_k / s_k，找出每个向量中绝对值最大的分量的符号
+    best = np.zeros(target_length)
+    sign = np.ones(target_length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for block in blocks:
+            centered = np.asarray(values[:, block], dtype=np.float64) - mean[block]
+            components = centered.T @ eigenvectors[:, order] / singular
+            index = np.argmax(np.abs(components), axis=0)
+            peak = components[index, np.arange(target_length)]
+            larger = np.abs(peak) > best
+            best[larger] = np.abs(peak[larger])
+            sign[larger] = np.sign(peak[larger])
+    sign[sign == 0] = 1
+    return scores * sign
+
+# 平滑类方法：名称 -> 批量处理函数
+ROW_SMOOTHERS = {
+    'median': reduce_data_median,
+    'ema': exponential_moving_average,
+    'wavelet': wavelet_denoise,
+    'savgol': savgol_smoothing,
+}
 
 def update_heatmap(data_matrix, new_data, length, data_groups):
     """
@@ -263,6 +624,38 @@ def update_heatmap(data_matrix, new_data, length, data_groups):
     return updated_matrix
 
 
+# 两组热图矩阵的对比
+def compare_matrices(matrix_a, matrix_b, mode):
+    """
+    逐元素比较两个热图矩阵
+    
+    Args:
+        matrix_a (np.array): 数据集A的热图矩阵
+        matrix_b (np.array): 数据集B的热图矩阵，形状须与A一致
+        mode (str): 'diff'（A-B）、'ratio'（A/B）或 'log_ratio'（log10(A/B)）
+    
+    Returns:
+        np.array: 对比矩阵，除零等无意义的位置为NaN
+    """
+    a = np.asarray(matrix_a, dtype=np.float64)
+    b = np.asarray(matrix_b, dtype=np.float64)
+    if a.shape != b.shape:
+        raise ValueError(f"两组热图矩阵形状不一致: {a.shape} 与 {b.shape}")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mode == 'diff':
+            result = a - b
+        elif mode == 'ratio':
+            result = a / b
+        elif mode == 'log_ratio':
+            result = np.log10(a / b)
+        else:
+            raise ValueError(f"未知的对比方式: {mode}")
+
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
 if __name__ == "__main__":
     Subtract_dark_current()
     process_data()
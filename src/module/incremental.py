@@ -0,0 +1,209 @@
+# module/incremental.py
+import numpy as np
+
+import src.module.data_cache as data_cache
+import src.module.handle_datas as handle_datas
+import src.module.out_of_core as out_of_core
+import src.module.pipeline as pipeline
+import src.module.quality as quality
+
+
+class _FileEntry:
+    """一个文件的统计量、决定公共参数的量（样本数或时长）以及处理后的热图行"""
+    __slots__ = ("path", "stats", "measure", "row")
+
+    def __init__(self, path, stats, measure):
+        self.path = path
+        self.stats = stats
+        self.measure = measure
+        self.row = None
+
+
+class IncrementalMatrix:
+    """按文件维护处理后的热图行，文件列表增删时只处理变化的文件
+
+    每个文件的对齐、归一化和降采样互不影响，只依赖一个所有文件共用的参数：
+    cut_data 的公共长度（最短文件）、resample_data 的统一长度（最长文件）或按时间分箱的
+    公共时长（最短文件）。处理参数不变时：
+        - 移除文件：删除对应的行；公共参数不变时不重新计算
+        - 加入文件：只读取和处理新文件
+        - 公共参数改变（如移除了最短的文件）或异常文件判定改变：所有行按新的公共参数重算，
+          整列数据在 data_cache 中，不需要重新解析文件
+    处理参数改变时全部重新计算。PCA 依赖所有文件，需要磁盘暂存的数据量按块处理，
+    这两种情况每次都调用 pipeline.run_pipeline 完整计算。
+
+    行以文件指纹（路径、大小、修改时间）为键，文件被改写后视为新文件。
+
+    Args:
+        cache (LRUCache): 整列数据所在的缓存，默认为进程内共享缓存
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._params = None
+        self._shared = None
+        self._entries = {}
+        # 读取失败的文件：文件指纹 -> 错误信息
+        self._failed = {}
+
+    def reset(self):
+        """丢弃所有已处理的行"""
+        self._params = None
+        self._shared = None
+        self._entries = {}
+        self._failed = {}
+
+    def update(self, file_paths, params, memory_limit=None):
+        """
+        按当前文件列表更新热图矩阵
+
+        Args:
+            file_paths (list): 文件路径列表
+            params (PipelineParams): 处理参数
+            memory_limit (int): 内存上限（字节），超过时改为完整计算
+
+        Returns:
+            PipelineResult: matrix、stats、excluded、paths、errors 与 run_pipeline 的结果相同
+        """
+        if not file_paths:
+            raise pipeline.PipelineError("数据缺失", "请先选择文件")
+        if params.end_row is not None and params.start_row >= params.end_row:
+            raise pipeline.PipelineError("参数错误", "起始行必须小于结束行")
+        by_time = params.time_column is not None
+        if by_time and params.method not in handle_datas.TIME_BIN_METHODS:
+            raise pipeline.PipelineError("参数错误", "按时间分箱只支持均值缩减、最大值缩减和RMS降采样")
+        pipeline.check_file_reduce(params)
+        if params.method == "pca" or out_of_core.needs_out_of_core(
+                file_paths, params.start_row, params.end_row, memory_limit):
+            self.reset()
+            return pipeline.run_pipeline(file_paths, params, memory_limit)
+
+        # 热图列数只决定由哪些行组成矩阵，不影响各行的计算
+        key = params._replace(data_groups=0)
+        if key != self._params:
+            self.reset()
+            self._params = key
+
+        fingerprints = []
+        errors = {}
+        for file_path in file_paths:
+            try:
+                fingerprints.append(data_cache.file_fingerprint(file_path))
+            except OSError:
+                errors[file_path] = "文件不存在"
+                fingerprints.append(None)
+
+        # 只保留当前列表中的文件，读取新加入的文件
+        current = set(fingerprints)
+        self._entries = {fp: entry for fp, entry in self._entries.items() if fp in current}
+        self._failed = {fp: error for fp, error in self._failed.items() if fp in current}
+        new = [(path, fp) for path, fp in zip(file_paths, fingerprints)
+               if fp is not None and fp not in self._entries and fp not in self._failed]
+        if new:
+            self._load(new, params)
+        for path, fp in zip(file_paths, fingerprints):
+            if fp in self._failed:
+                errors[path] = self._failed[fp]
+
+        loaded = [fp for fp in fingerprints if fp in self._entries]
+        if not loaded:
+            raise pipeline.PipelineError("数据错误", "未能从文件中读取有效数据")
+        entries = [self._entries[fp] for fp in loaded]
+        stats = np.array([entry.stats for entry in entries], dtype=quality.STAT_DTYPE)
+
+        excluded = {}
+        kept = entries
+        if params.exclude:
+            reasons = quality.find_outliers(stats)
+            excluded = {entry.path: r for entry, r in zip(entries, reasons) if r}
+            kept = [entry for entry, r in zip(entries, reasons) if not r]
+            if not kept:
+                raise pipeline.PipelineError("数据错误", "所有文件都被判定为异常文件")
+
+        if len(kept) < params.data_groups:
+            raise pipeline.PipelineError(
+                "数据不足",
+                f"需要 {params.data_groups} 组数据，但只有 {len(kept)} 组可用"
+            )
+
+        shared = self._shared_value(kept, params)
+        if shared != self._shared:
+            for entry in self._entries.values():
+                entry.row = None
+            self._shared = shared
+        pending = list({id(entry): entry for entry in kept if entry.row is None}.values())
+        if pending:
+            self._process(pending, params, shared)
+
+        used = kept[:params.data_groups] if params.file_reduce == "first" else kept
+        matrix = pipeline.heatmap_matrix(np.array([entry.row for entry in used], dtype=np.float64), params)
+        return pipeline.PipelineResult(None, None, None, matrix, stats, excluded,
+                                       [entry.path for entry in entries], errors)
+
+    def _load_raw(self, file_paths, params, errors=None):
+        """从缓存（未命中时解析文件）读取数据列，按时间分箱时同时读取时间列"""
+        raw = data_cache.load_dataset(file_paths, params.column_index, start_row=params.start_row,
+                                      end_row=params.end_row, cache=self.cache, errors=errors)
+        times = None
+        if params.time_column is not None:
+            times = data_cache.load_dataset(file_paths, params.time_column, start_row=params.start_row,
+                                            end_row=params.end_row, cache=self.cache, errors=errors)
+            raw, times = pipeline.common_files(raw, times)
+        return raw, times
+
+    def _load(self, new, params):
+        """读取新文件，记录统计量和决定公共参数的量"""
+        errors = {}
+        raw, times = self._load_raw([path for path, _ in new], params, errors)
+        stats = quality.file_statistics(raw)
+        if times is None:
+            measures = raw.lengths
+        else:
+            # 每个文件的时长（忽略非数值单元格）；没有样本的文件为NaN，在分箱时报错
+            measures = np.full(len(times), np.nan)
+            nonempty = times.lengths > 0
+            starts = times.offsets[:-1][nonempty]
+            if starts.size:
+                measures[nonempty] = (np.fmax.reduceat(times.values, starts).astype(np.float64)
+                                      - np.fmin.reduceat(times.values, starts))
+
+        index = {path: i for i, path in enumerate(raw.paths)}
+        for path, fp in new:
+            i = index.get(path)
+            if i is None:
+                self._failed[fp] = errors.get(path, "")
+            else:
+                self._entries[fp] = _FileEntry(path, stats[i], measures[i])
+
+    @staticmethod
+    def _shared_value(entries, params):
+        """所有文件共用的参数：公共长度、统一长度或公共时长；按时间分箱且各文件按自身时长划分时为None"""
+        measures = [entry.measure for entry in entries]
+        if params.time_column is not None:
+            return float(min(measures)) if params.align == "cut" else None
+        return int(max(measures)) if params.align == "resample" else int(min(measures))
+
+    def _process(self, entries, params, shared):
+        """按给定的公共参数处理部分文件，结果写入各文件的 row"""
+        raw, times = self._load_raw([entry.path for entry in entries], params)
+        if raw.paths != [entry.path for entry in entries]:
+            # 文件在两次读取之间被删除或改写
+            raise pipeline.PipelineError("数据错误", "部分文件读取失败，请重新扫描文件夹")
+
+        if times is not None:
+            try:
+                binned = handle_datas.time_bin_dataset(raw, times, params.length, params.method,
+                                                       params.align, span=shared)
+            except ValueError as e:
+                raise pipeline.PipelineError("数据错误", str(e)) from e
+            rows = handle_datas.Normalized_data(binned).values
+        else:
+            if params.align == "resample":
+                aligned = handle_datas.resample_data(raw, length=shared)
+            else:
+                aligned = handle_datas.cut_data(raw, length=shared)
+            aligned = handle_datas.Normalized_data(aligned)
+            rows = handle_datas.reduce_dataset(aligned, params.length, params.method).values
+
+        for entry, row in zip(entries, rows):
+            entry.row = row
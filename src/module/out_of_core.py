@@ -0,0 +1,168 @@
+# module/out_of_core.py
+"""磁盘暂存（out-of-core）支持
+
+数据量超过内存上限时，读取的样本和中间结果存放在 np.memmap 映射的临时文件中，
+各处理步骤按块读写，只有最终的热图矩阵常驻内存。临时文件是匿名的，
+对应的数组被释放后由操作系统自动删除。
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from src.module.dataset import RaggedDataset
+
+# 默认内存上限：2 GB，可通过环境变量 HOT_IMAGE_MEMORY_LIMIT_MB 或 set_memory_limit 修改
+DEFAULT_MEMORY_LIMIT = 2 * 1024 * 1024 * 1024
+
+# 按块处理时每块的大致字节数（按float64计算）；每块处理时还会产生数倍于此的临时数组
+BLOCK_BYTES = 16 * 1024 * 1024
+
+# 估算样本数时，xls中每个数值单元格至少占用的字节数（RK记录）
+MIN_CELL_BYTES = 10
+
+_memory_limit = None
+
+
+def memory_limit():
+    """当前的内存上限（字节）"""
+    if _memory_limit is not None:
+        return _memory_limit
+    env = os.environ.get("HOT_IMAGE_MEMORY_LIMIT_MB")
+    if env:
+        return int(float(env) * 1024 * 1024)
+    return DEFAULT_MEMORY_LIMIT
+
+
+def set_memory_limit(nbytes):
+    """设置内存上限（字节），None表示恢复默认值"""
+    global _memory_limit
+    _memory_limit = None if nbytes is None else int(nbytes)
+
+
+def scratch_dir():
+    """临时文件目录，可通过环境变量 HOT_IMAGE_SCRATCH_DIR 指定（默认为系统临时目录）"""
+    return os.environ.get("HOT_IMAGE_SCRATCH_DIR") or None
+
+
+def estimate_bytes(file_paths, start_row=1, end_row=None, itemsize=4):
+    """
+    估算处理这些文件需要的内存
+
+    每个文件的样本数取 (end_row - start_row) 与按文件大小推算的上限中的较小值；
+    每个样本计入读取、对齐、归一化各一份，以及降采样时的一份float64临时数据。
+
+    Args:
+        file_paths (list): 文件路径列表
+        start_row (int): 起始行索引
+        end_row (int): 结束行索引，None表示读到文件末尾
+        itemsize (int): 样本字节数
+
+    Returns:
+        int: 估算的字节数
+    """
+    samples = 0
+    for file_path in file_paths:
+        try:
+            bound = os.path.getsize(file_path) // MIN_CELL_BYTES
+        except OSError:
+            continue
+        if end_row is not None:
+            bound = min(bound, max(end_row - start_row, 0))
+        samples += bound
+    return samples * (3 * itemsize + 8)
+
+
+def needs_out_of_core(file_paths, start_row=1, end_row=None, limit=None):
+    """估算的内存超过上限时返回True"""
+    limit = memory_limit() if limit is None else limit
+    return estimate_bytes(file_paths, start_row, end_row) > limit
+
+
+def scratch_empty(shape, dtype):
+    """
+    在匿名临时文件上创建未初始化的 np.memmap
+
+    Args:
+        shape (tuple): 数组形状
+        dtype: 数据类型
+
+    Returns:
+        np.memmap: 可读写的映射数组（大小为0时返回普通数组）
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    if nbytes == 0:
+        return np.empty(shape, dtype=dtype)
+    with tempfile.TemporaryFile(dir=scratch_dir()) as f:
+        f.truncate(nbytes)
+        # mmap 持有自己的文件句柄，关闭 f 后映射仍然有效
+        return np.memmap(f, dtype=dtype, mode="w+", shape=shape)
+
+
+def scratch_from_chunks(chunks, dtype):
+    """
+    把若干一维数组依次写入临时文件，再映射为一个一维数组（总长度事先未知时使用）
+
+    Args:
+        chunks (iterable): 一维数组序列
+        dtype: 数据类型
+
+    Returns:
+        np.memmap: 拼接后的映射数组
+    """
+    dtype = np.dtype(dtype)
+    with tempfile.TemporaryFile(dir=scratch_dir()) as f:
+        total = 0
+        for chunk in chunks:
+            chunk = np.ascontiguousarray(chunk, dtype=dtype)
+            f.write(chunk.tobytes())
+            total += len(chunk)
+        f.flush()
+        if total == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(f, dtype=dtype, mode="r+", shape=(total,))
+
+
+def row_blocks(n_rows, row_length, block_bytes=None):
+    """
+    把行号范围划分为若干块，每块约 block_bytes 字节（按float64计算）
+
+    Yields:
+        slice: 每块的行切片
+    """
+    block_bytes = block_bytes or BLOCK_BYTES
+    step = max(1, block_bytes // max(row_length * 8, 1))
+    for start in range(0, n_rows, step):
+        yield slice(start, min(start + step, n_rows))
+
+
+def ragged_blocks(dataset, block_bytes=None):
+    """
+    把不等长数据集按文件划分为若干块，每块的样本总数约 block_bytes / 8
+
+    Yields:
+        tuple: (文件切片, 该块文件组成的 RaggedDataset 视图)
+    """
+    offsets = dataset.offsets
+    limit = max(1, (block_bytes or BLOCK_BYTES) // 8)
+    start = 0
+    while start < len(dataset):
+        # 至少包含一个文件，其余文件在样本总数不超过limit时并入本块
+        end = int(np.searchsorted(offsets, offsets[start] + limit, side="right")) - 1
+        end = min(max(end, start + 1), len(dataset))
+        base = offsets[start]
+        view = RaggedDataset(dataset.values[base:offsets[end]], offsets[start:end + 1] - base,
+                             dataset.records[start:end])
+        yield slice(start, end), view
+        start = end
+
+
+def take_files(dataset, indices):
+    """与 RaggedDataset.take 相同，但所选样本写入磁盘暂存数组"""
+    indices = np.asarray(indices, dtype=np.int64)
+    records = [dataset.records[i] for i in indices]
+    values = scratch_from_chunks((dataset.row(i) for i in indices), dataset.values.dtype)
+    offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(dataset.lengths[indices], out=offsets[1:])
+    return RaggedDataset(values, offsets, records)
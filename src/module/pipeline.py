@@ -0,0 +1,283 @@
+# module/pipeline.py
+from collections import namedtuple
+
+import numpy as np
+
+import src.module.data_cache as data_cache
+import src.module.handle_datas as handle_datas
+import src.module.out_of_core as out_of_core
+import src.module.pixel_map as pixel_map
+import src.module.quality as quality
+
+# 控制面板上决定热图矩阵的全部参数（可哈希，可直接作为缓存键）
+PipelineParams = namedtuple("PipelineParams", [
+    "column_index",  # 数据列号（0-based）
+    "start_row",     # 数据起始行
+    "end_row",       # 数据结束行（不包括此行），None表示读到文件末尾
+    "length",        # 热图行数：每个文件降采样后的点数
+    "data_groups",   # 热图列数：使用的文件数
+    "method",        # 数据处理方法，见 handle_datas.reduce_dataset
+    "align",         # 长度对齐方式：'cut' 或 'resample'
+    "exclude",       # 是否在对齐前自动排除异常文件（见 quality.find_outliers）
+    "time_column",   # 时间列号：给定时按等时间间隔分箱（见 handle_datas.time_bin_dataset），None表示按样本序号
+    "file_reduce",   # 文件数多于热图列数时：'first' 只取前data_groups个文件；'mean'、'max'、'rms' 把所有文件
+                     # 依次分为data_groups组分块归约（见 handle_datas.block_reduce）
+], defaults=[False, None, "first"])
+
+# 探测器阵列模式的参数：每个文件归约为一个像素
+PixelMapParams = namedtuple("PixelMapParams", [
+    "column_index",  # 数据列号（0-based）
+    "start_row",     # 数据起始行
+    "end_row",       # 数据结束行（不包括此行）
+    "reduce",        # 归约方式：'mean'、'peak' 或 'value'
+    "value_row",     # reduce为'value'时取值的行号
+    "layout",        # 像素布局来源：'name'、'order' 或 'csv'
+    "grid_cols",     # layout为'order'时每行像素数
+    "layout_csv",    # layout为'csv'时的布局文件路径
+])
+
+# 一次处理的各阶段结果；stats 与 paths（读取成功的文件，排除前）逐个对应，excluded 为 {被排除的文件路径: 原因列表}，
+# errors 为 {读取失败的文件路径: 错误信息}；增量更新（见 incremental.IncrementalMatrix）不保留中间结果，
+# raw、aligned、processed 为None
+PipelineResult = namedtuple("PipelineResult", ["raw", "aligned", "processed", "matrix", "stats", "excluded", "paths",
+                                               "errors"],
+                            defaults=[None, None, None, None])
+
+
+class PipelineError(Exception):
+    """参数或数据不满足处理要求
+
+    Args:
+        title (str): 提示框标题
+        message (str): 提示内容
+    """
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+def process_dataset(raw, params, disk=False, times=None):
+    """对已读取的数据做对齐、归一化和降采样
+
+    Args:
+        raw (RaggedDataset): 读取得到的数据集
+        params (PipelineParams): 处理参数
+        disk (bool): 为True时中间结果存放在磁盘暂存数组中并按块处理
+        times (RaggedDataset): 与 raw 逐个文件对应的时间列，params.time_column 不为None时必须提供
+
+    Returns:
+        PipelineResult: 各阶段结果，matrix 的形状为 (data_groups, length)
+    """
+    if not len(raw):
+        raise PipelineError("数据错误", "未能从文件中读取有效数据")
+    by_time = params.time_column is not None
+    if by_time and params.method not in handle_datas.TIME_BIN_METHODS:
+        raise PipelineError("参数错误", "按时间分箱只支持均值缩减、最大值缩减和RMS降采样")
+    check_file_reduce(params)
+
+    # 读取后统计每个文件，按需在对齐前排除异常文件（过短的文件会拖短cut_data的公共长度）
+    stats = quality.file_statistics(raw)
+    excluded = {}
+    selected = raw
+    if params.exclude:
+        reasons = quality.find_outliers(stats)
+        excluded = {path: r for path, r in zip(raw.paths, reasons) if r}
+        if excluded:
+            keep = [i for i, r in enumerate(reasons) if not r]
+            if not keep:
+                raise PipelineError("数据错误", "所有文件都被判定为异常文件")
+            selected = out_of_core.take_files(raw, keep) if disk else raw.take(keep)
+            if by_time:
+                times = out_of_core.take_files(times, keep) if disk else times.take(keep)
+
+    if by_time:
+        # 每个文件直接分箱为等时间间隔的length个点，再按文件归一化
+        try:
+            binned = handle_datas.time_bin_dataset(selected, times, params.length, params.method,
+                                                   params.align, disk=disk)
+        except ValueError as e:
+            raise PipelineError("数据错误", str(e)) from e
+        aligned = handle_datas.Normalized_data(binned, disk=disk)
+        processed = aligned
+    else:
+        if params.align == "resample":
+            aligned = handle_datas.resample_data(selected, disk=disk)
+        else:
+            aligned = handle_datas.cut_data(selected, disk=disk)
+        aligned = handle_datas.Normalized_data(aligned, disk=disk)
+
+    # 检查数据组数是否足够
+    if len(aligned) < params.data_groups:
+        raise PipelineError(
+            "数据不足",
+            f"需要 {params.data_groups} 组数据，但只有 {len(aligned)} 组可用"
+        )
+
+    if not by_time:
+        max_components = min(aligned.values.shape)
+        if params.method == "pca" and params.length > max_components:
+            raise PipelineError(
+                "参数错误",
+                f"PCA降维的热图行数不能超过 {max_components}（文件数与样本数的较小值）"
+            )
+
+        processed = handle_datas.reduce_dataset(aligned, params.length, params.method)
+
+    matrix = heatmap_matrix(processed.values, params)
+    return PipelineResult(raw, aligned, processed, matrix, stats, excluded, raw.paths)
+
+
+def check_file_reduce(params):
+    """检查多余文件的处理方式"""
+    if params.file_reduce != "first" and params.file_reduce not in handle_datas.BLOCK_METHODS:
+        raise PipelineError("参数错误", f"未知的多余文件处理方式: {params.file_reduce}")
+
+
+def heatmap_matrix(rows, params):
+    """由逐文件处理后的行组成热图矩阵
+
+    Args:
+        rows (np.ndarray): 逐文件处理结果 (文件数, length)，文件数不少于 data_groups
+        params (PipelineParams): 处理参数
+
+    Returns:
+        np.ndarray: 形状为 (data_groups, length) 的热图矩阵
+    """
+    if params.file_reduce == "first":
+        # 只取前data_groups个文件
+        return np.asarray(rows[:params.data_groups], dtype=np.float64)
+    # 所有文件依次分为data_groups组，每组归约为热图的一列
+    rows = np.asarray(rows)
+    return handle_datas.block_reduce(rows, (params.data_groups, rows.shape[1]), params.file_reduce)
+
+
+def common_files(raw, times, disk=False):
+    """只保留数据列和时间列都读取成功的文件（按 raw 的顺序）"""
+    if raw.paths == times.paths:
+        return raw, times
+    time_index = {path: i for i, path in enumerate(times.paths)}
+    keep = [i for i, path in enumerate(raw.paths) if path in time_index]
+    time_keep = [time_index[raw.paths[i]] for i in keep]
+    if disk:
+        return out_of_core.take_files(raw, keep), out_of_core.take_files(times, time_keep)
+    return raw.take(keep), times.take(time_keep)
+
+
+def run_pipeline(file_paths, params, memory_limit=None):
+    """读取文件并生成热图矩阵（不依赖界面，可在后台线程或服务中调用）
+
+    估算的内存超过上限时自动改用磁盘暂存模式，只有最终的热图矩阵常驻内存。
+
+    Args:
+        file_paths (list): 文件路径列表
+        params (PipelineParams): 处理参数
+        memory_limit (int): 内存上限（字节），默认见 out_of_core.memory_limit
+
+    Returns:
+        PipelineResult: 各阶段结果
+    """
+    if not file_paths:
+        raise PipelineError("数据缺失", "请先选择文件")
+    if params.end_row is not None and params.start_row >= params.end_row:
+        raise PipelineError("参数错误", "起始行必须小于结束行")
+
+    disk = out_of_core.needs_out_of_core(file_paths, params.start_row, params.end_row, memory_limit)
+    errors = {}
+    raw = data_cache.load_dataset(
+        file_paths,
+        params.column_index,
+        start_row=params.start_row,
+        end_row=params.end_row,
+        disk=disk,
+        errors=errors
+    )
+    times = None
+    if params.time_column is not None:
+        times = data_cache.load_dataset(
+            file_paths,
+            params.time_column,
+            start_row=params.start_row,
+            end_row=params.end_row,
+            disk=disk,
+            errors=errors
+        )
+        raw, times = common_files(raw, times, disk)
+    return process_dataset(raw, params, disk=disk, times=times)._replace(errors=errors)
+
+
+def build_matrix(file_paths, params, memory_limit=None):
+    """按参数类型选择普通热图或探测器阵列模式
+
+    Args:
+        file_paths (list): 文件路径列表
+        params (PipelineParams 或 PixelMapParams): 处理参数
+        memory_limit (int): 内存上限（字节）
+
+    Returns:
+        PipelineResult: 各阶段结果
+    """
+    if isinstance(params, PixelMapParams):
+        return run_pixel_map(file_paths, params, memory_limit)
+    return run_pipeline(file_paths, params, memory_limit)
+
+
+def run_pixel_map(file_paths, params, memory_limit=None):
+    """探测器阵列模式：每个文件归约为一个标量，按布局放到像素网格上
+
+    Args:
+        file_paths (list): 文件路径列表（每个像素一个文件）
+        params (PixelMapParams): 阵列模式参数
+        memory_limit (int): 内存上限（字节），超过时样本存放在磁盘暂存数组中
+
+    Returns:
+        PipelineResult: processed 为每个文件的标量值，matrix 为像素网格
+    """
+    if not file_paths:
+        raise PipelineError("数据缺失", "请先选择文件")
+    if params.end_row is not None and params.start_row >= params.end_row:
+        raise PipelineError("参数错误", "起始行必须小于结束行")
+
+    errors = {}
+    raw = data_cache.load_dataset(
+        file_paths,
+        params.column_index,
+        start_row=params.start_row,
+        end_row=params.end_row,
+        disk=out_of_core.needs_out_of_core(file_paths, params.start_row, params.end_row, memory_limit),
+        errors=errors
+    )
+    if not len(raw):
+        raise PipelineError("数据错误", "未能从文件中读取有效数据")
+
+    # 布局按输入的全部文件计算，读取失败的文件在网格中留下空位，不会挤占后面文件的像素
+    if params.layout == "csv":
+        if not params.layout_csv:
+            raise PipelineError("参数错误", "请先选择布局CSV文件")
+        try:
+            all_rows, all_cols = pixel_map.layout_from_csv(file_paths, params.layout_csv)
+        except OSError as e:
+            raise PipelineError("布局错误", f"无法打开布局CSV: {e.strerror}") from e
+        except ValueError as e:
+            raise PipelineError("布局错误", str(e)) from e
+    elif params.layout == "order":
+        all_rows, all_cols = pixel_map.layout_from_order(file_paths, params.grid_cols)
+    else:
+        all_rows, all_cols = pixel_map.layout_from_names(file_paths)
+
+    if not np.any(all_rows >= 0):
+        raise PipelineError("布局错误", "没有文件能对应到像素坐标，请检查文件名或布局CSV")
+    placed = (all_rows >= 0) & (all_cols >= 0)
+    shape = (int(all_rows[placed].max()) + 1, int(all_cols[placed].max()) + 1) if placed.any() else (0, 0)
+
+    paths = raw.paths
+    position = {file_path: i for i, file_path in enumerate(file_paths)}
+    loaded = np.array([position[file_path] for file_path in paths], dtype=np.int64)
+    rows, cols = all_rows[loaded], all_cols[loaded]
+
+    scalars = pixel_map.reduce_to_scalar(raw, params.reduce, params.value_row)
+    grid = pixel_map.build_pixel_grid(scalars, rows, cols, shape)
+    if np.isnan(grid).all():
+        raise PipelineError("数据错误", "所有像素都没有有效数据，请检查数据列号和行范围")
+    return PipelineResult(raw, raw, scalars, grid, quality.file_statistics(raw), {}, paths, errors)
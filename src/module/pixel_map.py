@@ -0,0 +1,162 @@
+# module/pixel_map.py
+import csv
+import os
+import re
+
+import numpy as np
+
+import src.module.out_of_core as out_of_core
+
+# 默认的文件名规则：如 R3C12.xls、r3_c12.xls、pixel_R03-C12.xls
+DEFAULT_NAME_PATTERN = r"[Rr](?P<row>\d+)[_\-]?[Cc](?P<col>\d+)"
+
+
+def reduce_to_scalar(dataset, mode, row=None):
+    """
+    把每个文件的数据归约为一个标量（按文件分块，每块一次向量化计算）
+
+    Args:
+        dataset (RaggedDataset): 读取得到的数据集
+        mode (str): 'mean'（均值）、'peak'（峰值）或 'value'（指定行的值）
+        row (int): mode为'value'时使用的行索引（0-based，与表格行号一致）
+
+    Returns:
+        np.ndarray: 每个文件一个值，没有有效数据的文件为NaN
+    """
+    result = np.full(len(dataset), np.nan)
+    for files, block in out_of_core.ragged_blocks(dataset):
+        result[files] = _reduce_block(block, mode, row)
+    return result
+
+
+def _reduce_block(dataset, mode, row):
+    lengths = dataset.lengths
+    starts = dataset.offsets[:-1]
+    values = dataset.values.astype(np.float64)
+    result = np.full(len(dataset), np.nan)
+    valid = lengths > 0
+    if not valid.any():
+        return result
+
+    if mode == 'value':
+        if row is None:
+            raise ValueError("指定行取值时必须给出行号")
+        position = row - np.array([rec.start_row for rec in dataset.records])
+        inside = valid & (position >= 0) & (position < lengths)
+        result[inside] = values[starts[inside] + position[inside]]
+        return result
+
+    # reduceat 要求起点严格有效，只对非空文件计算
+    valid_starts = starts[valid]
+    if mode == 'mean':
+        finite = np.isfinite(values)
+        sums = np.add.reduceat(np.where(finite, values, 0), valid_starts)
+        counts = np.add.reduceat(finite.astype(np.int64), valid_starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[valid] = sums / counts
+    elif mode == 'peak':
+        result[valid] = np.fmax.reduceat(values, valid_starts)
+    else:
+        raise ValueError(f"未知的归约方式: {mode}")
+    return result
+
+
+def layout_from_names(file_paths, pattern=DEFAULT_NAME_PATTERN):
+    """
+    从文件名中解析像素坐标，坐标以出现的最小编号为起点（R1C1 与 R0C0 均对应左上角）
+
+    Args:
+        file_paths (list): 文件路径列表
+        pattern (str): 正则表达式，需包含命名分组 row 和 col
+
+    Returns:
+        tuple: (rows, cols) 两个整数数组，无法解析的文件坐标为 -1
+    """
+    regex = re.compile(pattern)
+    rows = np.full(len(file_paths), -1, dtype=np.int64)
+    cols = np.full(len(file_paths), -1, dtype=np.int64)
+    for i, file_path in enumerate(file_paths):
+        match = regex.search(os.path.basename(file_path))
+        if match:
+            rows[i] = int(match.group("row"))
+            cols[i] = int(match.group("col"))
+
+    placed = rows >= 0
+    if placed.any():
+        rows[placed] -= rows[placed].min()
+        cols[placed] -= cols[placed].min()
+    return rows, cols
+
+
+def layout_from_order(file_paths, grid_cols):
+    """
+    按文件顺序逐行排布像素（第k个文件位于 k // grid_cols 行、k % grid_cols 列）
+
+    Args:
+        file_paths (list): 文件路径列表（已排序）
+        grid_cols (int): 每行像素数
+
+    Returns:
+        tuple: (rows, cols) 两个整数数组
+    """
+    if grid_cols <= 0:
+        raise ValueError("阵列列数必须大于0")
+    index = np.arange(len(file_paths))
+    return index // grid_cols, index % grid_cols
+
+
+def layout_from_csv(file_paths, csv_path):
+    """
+    从布局CSV中查找像素坐标
+
+    CSV需包含表头 file,row,col；file 为文件名（不含路径）。
+
+    Args:
+        file_paths (list): 文件路径列表
+        csv_path (str): 布局CSV路径
+
+    Returns:
+        tuple: (rows, cols) 两个整数数组，CSV中没有的文件坐标为 -1
+
+    Raises:
+        ValueError: CSV格式错误（提示中只给出行号，不引用文件内容）
+    """
+    layout = {}
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        try:
+            for line in reader:
+                layout[line["file"].strip()] = (int(line["row"]), int(line["col"]))
+        except (KeyError, AttributeError, TypeError, ValueError, csv.Error):
+            raise ValueError(f"布局CSV第 {reader.line_num} 行格式错误：需包含表头 file,row,col，"
+                             f"行列号为整数") from None
+
+    rows = np.full(len(file_paths), -1, dtype=np.int64)
+    cols = np.full(len(file_paths), -1, dtype=np.int64)
+    for i, file_path in enumerate(file_paths):
+        position = layout.get(os.path.basename(file_path))
+        if position is not None:
+            rows[i], cols[i] = position
+    return rows, cols
+
+
+def build_pixel_grid(values, rows, cols, shape=None):
+    """
+    把每个像素的标量值放到二维网格上
+
+    Args:
+        values (np.ndarray): 每个文件的标量值
+        rows (np.ndarray): 每个文件的行坐标，-1 表示不放置
+        cols (np.ndarray): 每个文件的列坐标，-1 表示不放置
+        shape (tuple): 网格形状，默认由最大坐标决定
+
+    Returns:
+        np.ndarray: 像素网格，没有数据的像素为NaN
+    """
+    placed = (rows >= 0) & (cols >= 0)
+    if shape is None:
+        shape = (int(rows[placed].max()) + 1, int(cols[placed].max()) + 1) if placed.any() else (0, 0)
+    placed &= (rows < shape[0]) & (cols < shape[1])
+    grid = np.full(shape, np.nan)
+    grid[rows[placed], cols[placed]] = values[placed]
+    return grid
@@ -0,0 +1,148 @@
+# module/quality.py
+from collections import namedtuple
+
+import numpy as np
+
+import src.module.out_of_core as out_of_core
+
+# 每个文件的统计量（结构化数组的字段）
+STAT_DTYPE = np.dtype([
+    ("length", np.int64),       # 样本数（包括非数值单元格）
+    ("min", np.float64),        # 最小值
+    ("max", np.float64),        # 最大值
+    ("mean", np.float64),       # 均值
+    ("noise", np.float64),      # 噪声标准差：二阶差分绝对值的中位数估计，不受信号变化、台阶和尖峰影响
+    ("saturated", np.int64),    # 处于峰值平台（|x| 与最大绝对值相差不到1e-6）的样本数
+    ("non_numeric", np.int64),  # 非数值（文本、空白）单元格数
+])
+
+# 异常文件判定规则
+QualityRules = namedtuple("QualityRules", [
+    "min_length_ratio",       # 长度低于中位长度的该比例视为中途中止
+    "max_non_numeric_ratio",  # 非数值单元格占比上限（少量空白、文本单元格不算异常）
+    "max_saturated_ratio",    # 峰值平台样本占比上限（限流饱和）
+    "min_saturated",          # 判定饱和至少需要的平台样本数
+    "noise_z",                # 噪声的稳健z分数上限
+], defaults=[0.9, 0.01, 0.02, 3, 5.0])
+
+
+def file_statistics(dataset):
+    """
+    对不等长数据集计算每个文件的统计量（按文件分块，每块一次向量化计算）
+
+    data_cache.load_dataset 读取时已为每个文件计算并缓存统计量（见 FileRecord.stats），此时直接取出。
+
+    Args:
+        dataset (RaggedDataset): 读取得到的数据集
+
+    Returns:
+        np.ndarray: 结构化数组（字段见 STAT_DTYPE），没有数据的文件统计量为NaN
+    """
+    if len(dataset) and all(rec.stats is not None for rec in dataset.records):
+        return np.array([rec.stats for rec in dataset.records], dtype=STAT_DTYPE)
+    stats = np.zeros(len(dataset), dtype=STAT_DTYPE)
+    for files, block in out_of_core.ragged_blocks(dataset):
+        stats[files] = _block_statistics(block)
+    return stats
+
+
+def _block_statistics(dataset):
+    lengths = dataset.lengths
+    stats = np.zeros(len(dataset), dtype=STAT_DTYPE)
+    stats["length"] = lengths
+    for name in ("min", "max", "mean", "noise"):
+        stats[name] = np.nan
+
+    valid = lengths > 0
+    if not valid.any():
+        return stats
+
+    values = dataset.values.astype(np.float64)
+    starts = dataset.offsets[:-1][valid]
+    finite = np.isfinite(values)
+    clean = np.where(finite, values, 0.0)
+
+    non_numeric = np.add.reduceat(~finite, starts).astype(np.int64)
+    counts = lengths[valid] - non_numeric
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stats["non_numeric"][valid] = non_numeric
+        stats["mean"][valid] = np.add.reduceat(clean, starts) / counts
+        stats["min"][valid] = np.fmin.reduceat(values, starts)
+        stats["max"][valid] = np.fmax.reduceat(values, starts)
+
+        # 二阶差分 x[i-1] - 2x[i] + x[i+1] 滤掉平缓变化的信号（白噪声时标准差为 sqrt(6)σ），
+        # 取中位数后信号台阶和尖峰只影响少数差分；每个文件首尾样本处跨越文件边界，不计入
+        step = np.full_like(values, np.nan)
+        step[1:-1] = np.abs(values[:-2] - 2 * values[1:-1] + values[2:])
+        step[starts] = np.nan
+        step[dataset.offsets[1:][valid] - 1] = np.nan
+        stats["noise"][valid] = 1.4826 * _segment_medians(step, starts, lengths[valid]) / np.sqrt(6)
+
+        # 峰值平台：绝对值与文件最大绝对值相差不到1e-6的样本数
+        peak = np.fmax.reduceat(np.abs(values), starts)
+        peak_per_sample = np.repeat(peak, lengths[valid])
+        at_peak = finite & (np.abs(values) >= peak_per_sample * (1 - 1e-6)) & (peak_per_sample > 0)
+        stats["saturated"][valid] = np.add.reduceat(at_peak, starts)
+
+    return stats
+
+
+def _segment_medians(values, starts, lengths):
+    """每个文件中有限值的中位数：等长的文件组成二维数组按行排序，没有有限值的文件为NaN"""
+    result = np.full(len(starts), np.nan)
+    for length in np.unique(lengths):
+        group = np.flatnonzero(lengths == length)
+        # NaN 排在每行末尾，前 count 个为有限值
+        rows = np.sort(values[starts[group, None] + np.arange(length)], axis=1)
+        counts = np.isfinite(rows).sum(axis=1)
+        has = np.flatnonzero(counts > 0)
+        lower = rows[has, (counts[has] - 1) // 2]
+        upper = rows[has, counts[has] // 2]
+        result[group[has]] = (lower + upper) / 2
+    return result
+
+
+def find_outliers(stats, rules=QualityRules()):
+    """
+    按规则找出异常文件
+
+    Args:
+        stats (np.ndarray): file_statistics 的结果
+        rules (QualityRules): 判定规则
+
+    Returns:
+        list: 每个文件的异常原因列表，正常文件为空列表
+    """
+    reasons = [[] for _ in range(len(stats))]
+    if not len(stats):
+        return reasons
+
+    lengths = stats["length"]
+    short = lengths < rules.min_length_ratio * np.median(lengths)
+    non_numeric = stats["non_numeric"] > rules.max_non_numeric_ratio * lengths
+    saturated = ((stats["saturated"] >= rules.min_saturated)
+                 & (stats["saturated"] > rules.max_saturated_ratio * lengths))
+
+    # 噪声的稳健z分数（中位数 / 中位绝对偏差），只标记噪声偏大的文件；噪声估计已滤掉信号本身，
+    # 信号强的文件不会因此被误判；恒定不变的文件全部样本都在峰值平台上，会被判定为饱和
+    noise = stats["noise"]
+    finite = np.isfinite(noise)
+    noisy = np.zeros(len(stats), dtype=bool)
+    if finite.sum() >= 3:
+        median = np.median(noise[finite])
+        mad = np.median(np.abs(noise[finite] - median)) * 1.4826
+        if mad > 0:
+            noisy[finite] = (noise[finite] - median) / mad > rules.noise_z
+
+    for mask, reason in ((short, "过短"), (non_numeric, "非数值"), (saturated, "饱和"), (noisy, "噪声")):
+        for i in np.flatnonzero(mask):
+            reasons[i].append(reason)
+    return reasons
+
+
+def describe(stat):
+    """单个文件统计量的文字说明（用于文件列表的提示）"""
+    return (f"样本数: {stat['length']}  非数值: {stat['non_numeric']}\n"
+            f"最小: {stat['min']:.4g}  最大: {stat['max']:.4g}  均值: {stat['mean']:.4g}\n"
+            f"噪声: {stat['noise']:.4g}  峰值平台样本: {stat['saturated']}")
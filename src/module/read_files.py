@@ -2,22 +2,27 @@
 
 # module/read_files.py
 import os
+import numpy as np
 import xlrd
 
+import src.module.biff_reader as biff_reader
+from src.module.dataset import DEFAULT_DTYPE, FileRecord, RaggedDataset
+
+# 按数值读取的单元格类型
+NUMERIC_CELL_TYPES = (xlrd.XL_CELL_NUMBER, xlrd.XL_CELL_DATE, xlrd.XL_CELL_BOOLEAN)
 
-def get_excel_files_info(folder_path):
-    """获取文件夹中Excel文件的信息（文件名、路径、行数）
+
+def list_excel_files(folder_path):
+    """列出文件夹中的xls文件路径（按文件名中的数字排序，不打开文件）
 
     Args:
         folder_path (str): 文件夹路径
 
     Returns:
-        list: 包含文件信息的元组列表 (file_name, file_path, row_count)
+        list: 文件路径列表
     """
-    files_info = []
-
     if not os.path.isdir(folder_path):
-        return files_info
+        return []
 
     # 获取所有xls文件
     all_files = [f for f in os.listdir(folder_path) if f.endswith('.xls')]
@@ -25,23 +30,47 @@ def get_excel_files_info(folder_path):
     # 按照文件名中的数字顺序排序
     all_files.sort(key=lambda x: int(''.join(filter(str.isdigit, x))))
 
-    for file in all_files:
-        file_path = os.path.join(folder_path, file)
-        row_count = 0
+    return [os.path.join(folder_path, f) for f in all_files]
 
-        try:
-            workbook = xlrd.open_workbook(file_path)
-            sheet = workbook.sheet_by_index(0)
-            row_count = sheet.nrows
-        except Exception:
-            row_count = 0
 
-        files_info.append((file, file_path, row_count))
+def get_excel_files_info(folder_path):
+    """获取文件夹中Excel文件的信息（文件名、路径、行数）
+
+    Args:
+        folder_path (str): 文件夹路径
+
+    Returns:
+        list: 包含文件信息的元组列表 (file_name, file_path, row_count)
+    """
+    files_info = []
+
+    for file_path in list_excel_files(folder_path):
+        file = os.path.basename(file_path)
+        files_info.append((file, file_path, count_rows(file_path)))
 
     return files_info
 
 
-def read_column_from_xls(file_paths, column_index, start_row=1, end_row=None):
+def count_rows(file_path):
+    """Excel文件第一个工作表的行数（无法读取时为0）
+
+    Args:
+        file_path (str): 文件路径
+
+    Returns:
+        int: 行数
+    """
+    try:
+        try:
+            return biff_reader.count_rows(file_path)
+        except biff_reader.UnsupportedFormat:
+            workbook = xlrd.open_workbook(file_path)
+            return workbook.sheet_by_index(0).nrows
+    except Exception:
+        return 0
+
+
+def read_column_from_xls(file_paths, column_index, start_row=1, end_row=None, errors=None):
     """从指定的Excel文件中读取指定列的数据
 
     Args:
@@ -49,15 +78,17 @@ def read_column_from_xls(file_paths, column_index, start_row=1, end_row=None):
         column_index (int): 要读取的列索引（0-based）
         start_row (int): 起始行索引（0-based）
         end_row (int): 结束行索引（0-based，不包括此行）
+        errors (dict): 给定时记录读取失败的文件 {文件路径: 错误信息}
 
     Returns:
         list: 包含每个文件数据的列表
     """
+    errors = {} if errors is None else errors
     all_data = []
     for file_path in file_paths:
         # 确保文件存在
         if not os.path.isfile(file_path):
-            print(f"文件不存在: {file_path}")
+            errors[file_path] = "文件不存在"
             continue
 
         try:
@@ -84,10 +115,115 @@ def read_column_from_xls(file_paths, column_index, start_row=1, end_row=None):
             all_data.append(column_data)
 
         except Exception as e:
-            print(f"读取文件 {os.path.basename(file_path)} 时出错: {str(e)}")
+            errors[file_path] = str(e)
     return all_data
 
 
+def _sheet_column_array(sheet, column_index, start_row, end_row, dtype=DEFAULT_DTYPE):
+    """把工作表中一列的数值单元格转换为一维数组（日期、时间为序列值，布尔值为0/1），文本等其他单元格记为 NaN"""
+    if column_index >= sheet.ncols or start_row >= end_row:
+        return np.empty(0, dtype=dtype)
+
+    types = np.asarray(sheet.col_types(column_index, start_row, end_row))
+    values = np.asarray(sheet.col_values(column_index, start_row, end_row), dtype=object)
+    column = np.full(len(values), np.nan, dtype=dtype)
+    # 与原来的 cell_value 一致：日期、时间格式的单元格和布尔值也是数值
+    numeric = np.isin(types, NUMERIC_CELL_TYPES)
+    column[numeric] = values[numeric].astype(np.float64)
+    return column
+
+
+def read_full_column(file_path, column_index, dtype=DEFAULT_DTYPE):
+    """读取第一个工作表中某一列的全部行（供缓存使用，按需再截取行范围）
+
+    Args:
+        file_path (str): 文件路径
+        column_index (int): 要读取的列索引（0-based）
+        dtype: 样本精度
+
+    Returns:
+        np.ndarray: 该列从第0行开始的全部数据，非数值单元格为 NaN
+    """
+    return _read_column_array(file_path, column_index, 0, None, dtype)
+
+
+def read_full_sheet(file_path, dtype=DEFAULT_DTYPE):
+    """读取第一个工作表所有列的全部行（同一文件以不同列号打开时只需解析一次）
+
+    Args:
+        file_path (str): 文件路径
+        dtype: 样本精度
+
+    Returns:
+        np.ndarray: 形状为 (列数, 行数) 的数组，第 i 行为第 i 列的数据，非数值单元格为 NaN
+    """
+    try:
+        return biff_reader.read_sheet(file_path, dtype)
+    except biff_reader.UnsupportedFormat:
+        pass
+
+    workbook = xlrd.open_workbook(file_path)
+    sheet = workbook.sheet_by_index(0)
+    result = np.empty((sheet.ncols, sheet.nrows), dtype=dtype)
+    for column_index in range(sheet.ncols):
+        result[column_index] = _sheet_column_array(sheet, column_index, 0, sheet.nrows, dtype)
+    return result
+
+
+def _read_column_array(file_path, column_index, start_row, end_row, dtype):
+    """读取一列的 [start_row, min(end_row, 行数)) 部分：优先使用快速解析，不支持的文件改用 xlrd"""
+    try:
+        return biff_reader.read_column(file_path, column_index, start_row, end_row, dtype)[0]
+    except biff_reader.UnsupportedFormat:
+        pass
+
+    workbook = xlrd.open_workbook(file_path)
+    sheet = workbook.sheet_by_index(0)
+
+    # 确定结束行
+    nrows = sheet.nrows
+    if end_row is None or end_row > nrows:
+        use_end_row = nrows
+    else:
+        use_end_row = end_row
+
+    return _sheet_column_array(sheet, column_index, start_row, use_end_row, dtype)
+
+
+def read_dataset_from_xls(file_paths, column_index, start_row=1, end_row=None, dtype=DEFAULT_DTYPE, errors=None):
+    """从指定的Excel文件中读取指定列，直接存入连续的样本缓冲区
+
+    Args:
+        file_paths (list): 文件路径列表
+        column_index (int): 要读取的列索引（0-based）
+        start_row (int): 起始行索引（0-based）
+        end_row (int): 结束行索引（0-based，不包括此行）
+        dtype: 样本精度，默认 float32
+        errors (dict): 给定时记录读取失败的文件 {文件路径: 错误信息}
+
+    Returns:
+        RaggedDataset: 每个成功读取的文件按完整长度保存
+    """
+    errors = {} if errors is None else errors
+    arrays = []
+    records = []
+    for file_path in file_paths:
+        # 确保文件存在
+        if not os.path.isfile(file_path):
+            errors[file_path] = "文件不存在"
+            continue
+
+        try:
+            column = _read_column_array(file_path, column_index, start_row, end_row, dtype)
+            arrays.append(column)
+            records.append(FileRecord(file_path, start_row, start_row + len(column), column_index))
+
+        except Exception as e:
+            errors[file_path] = str(e)
+
+    return RaggedDataset.from_arrays(arrays, records, dtype=dtype)
+
+
 if __name__ == "__main__":
     get_excel_files_info()
     read_column_from_xls()
\ No newline at end of file
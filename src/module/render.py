@@ -0,0 +1,129 @@
+# module/render.py
+import io
+import threading
+
+import numpy as np
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# matplotlib/seaborn 并非完全线程安全，无界面渲染时串行执行
+_render_lock = threading.Lock()
+
+
+def render_heatmap_png(data, cmap="viridis", center=None, cbar_title="Normalized Current",
+                       show_ticks=False, figsize=(10, 8), dpi=100):
+    """不依赖界面，把热图矩阵渲染为PNG
+
+    Args:
+        data (np.ndarray): 热图矩阵
+        cmap (str): 颜色条名称
+        center (float): 发散型颜色条的中心值，None表示不居中
+        cbar_title (str): 颜色条标题
+        show_ticks (bool): 是否显示刻度标签
+        figsize (tuple): 图像尺寸（英寸）
+        dpi (int): 分辨率
+
+    Returns:
+        bytes: PNG图像数据
+    """
+    with _render_lock:
+        figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(figure)
+        ax = figure.add_subplot(111)
+
+        heatmap = sns.heatmap(
+            data,
+            ax=ax,
+            cmap=cmap,
+            center=center,
+            annot=False,
+            xticklabels=show_ticks,
+            yticklabels=show_ticks,
+            cbar_kws={"location": "right", "pad": 0.05, "aspect": 20}
+        )
+        colorbar = heatmap.collections[0].colorbar
+        if colorbar is not None:
+            colorbar.set_label('')
+            colorbar.ax.set_title(cbar_title, pad=20, fontweight='bold')
+
+        figure.tight_layout(pad=2.0)
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png")
+        return buffer.getvalue()
+
+
+def draw_heatmap_grid(figure, matrices, titles, cmap="viridis", shared_scale=True,
+                      cbar_title="Normalized Current", ncols=None, font_size=8):
+    """
+    在一个图中以小图网格的形式绘制多个热图（imshow，比seaborn轻量得多）
+
+    Args:
+        figure (Figure): 目标图形（会被清空）
+        matrices (list): 热图矩阵列表，None表示该面板没有数据
+        titles (list): 每个面板的标题；没有数据的面板在图中显示该文字
+        cmap (str): 颜色条名称
+        shared_scale (bool): 所有面板使用相同的颜色范围和一个共用的颜色条
+        cbar_title (str): 颜色条标题
+        ncols (int): 每行面板数，默认接近正方形排布
+        font_size (float): 面板标题字号
+
+    Returns:
+        list: 与 matrices 对应的 axes
+    """
+    figure.clear()
+    n = len(matrices)
+    if not n:
+        return []
+    ncols = ncols or int(np.ceil(np.sqrt(n)))
+    nrows = int(np.ceil(n / ncols))
+    axes = figure.subplots(nrows, ncols, squeeze=False).ravel()
+
+    vmin = vmax = None
+    if shared_scale:
+        finite = [m[np.isfinite(m)] for m in matrices if m is not None]
+        finite = [f for f in finite if f.size]
+        if finite:
+            vmin = min(float(f.min()) for f in finite)
+            vmax = max(float(f.max()) for f in finite)
+
+    image = None
+    for ax, matrix, title in zip(axes, matrices, titles):
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.set_title(title, fontsize=font_size, pad=2)
+        if matrix is None:
+            ax.text(0.5, 0.5, "N/A", ha="center", va="center", transform=ax.transAxes,
+                    fontsize=font_size, color="gray")
+            continue
+        panel_image = ax.imshow(matrix, cmap=cmap, vmin=vmin, vmax=vmax,
+                                interpolation="nearest", aspect="auto")
+        if shared_scale:
+            image = panel_image
+        else:
+            colorbar = figure.colorbar(panel_image, ax=ax, fraction=0.08, pad=0.02)
+            colorbar.ax.tick_params(labelsize=font_size * 0.8)
+    for ax in axes[n:]:
+        ax.set_visible(False)
+
+    if image is not None:
+        colorbar = figure.colorbar(image, ax=list(axes), location="right", pad=0.02, aspect=30)
+        colorbar.ax.set_title(cbar_title, pad=10, fontweight='bold', fontsize=font_size + 2)
+    return list(axes[:n])
+
+
+def render_grid_png(matrices, titles, cmap="viridis", shared_scale=True,
+                    cbar_title="Normalized Current", ncols=None, figsize=(12, 10), dpi=100):
+    """不依赖界面，把多个热图以网格形式渲染为PNG（参数见 draw_heatmap_grid）
+
+    Returns:
+        bytes: PNG图像数据
+    """
+    with _render_lock:
+        figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(figure)
+        draw_heatmap_grid(figure, matrices, titles, cmap=cmap, shared_scale=shared_scale,
+                          cbar_title=cbar_title, ncols=ncols)
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="png")
+        return buffer.getvalue()
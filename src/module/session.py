@@ -0,0 +1,155 @@
+# module/session.py
+"""会话文件：保存文件列表、控制面板参数、文件指纹，以及可选的已读取数据和热图矩阵
+
+文件格式为 npz（zip）：键 "meta" 保存UTF-8编码的JSON元数据，其余键为二进制数组：
+    matrix_<名称>   热图矩阵（如 matrix_a、matrix_b）
+    column_values   所有文件的整列数据首尾相接（float32）
+    column_offsets  每个文件在 column_values 中的起始偏移量，长度为文件数 + 1
+    column_present  每个文件是否嵌入了整列数据
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+import src.module.data_cache as data_cache
+from src.module.dataset import DEFAULT_DTYPE
+
+SESSION_VERSION = 1
+
+# 读取会话的结果
+Session = namedtuple("Session", [
+    "state",          # 控件状态（界面自行解释）
+    "files",          # 仍然存在的文件路径（A组，保持原顺序）
+    "row_counts",     # 对应的行数（改动过的文件为None，需重新统计）
+    "compare_files",  # 仍然存在的B组文件路径
+    "matrices",       # {名称: 热图矩阵}，有文件改动或缺失时为空
+    "changed",        # 指纹改变的文件路径
+    "missing",        # 已不存在的文件路径
+])
+
+
+class SessionError(Exception):
+    """会话文件无法读取或版本不兼容"""
+
+
+def _fingerprint_entry(file_path):
+    _, size, mtime_ns = data_cache.file_fingerprint(file_path)
+    return {"path": os.path.abspath(file_path), "size": size, "mtime_ns": mtime_ns}
+
+
+def save_session(session_path, state, files, row_counts=None, compare_files=(), column_index=None,
+                 matrices=None, embed_columns=False, cache=None):
+    """
+    保存会话
+
+    Args:
+        session_path (str): 会话文件路径
+        state (dict): 控件状态（需可JSON序列化）
+        files (list): A组文件路径
+        row_counts (list): 对应的行数
+        compare_files (list): B组文件路径
+        column_index (int): 嵌入整列数据时使用的列号
+        matrices (dict): {名称: 热图矩阵}，需要打开后立即显示时提供
+        embed_columns (bool): 是否嵌入缓存中已有的整列数据（打开时这些文件无需重新解析）
+        cache (LRUCache): 整列数据所在的缓存，默认为进程内共享缓存
+    """
+    files = list(files)
+    compare_files = list(compare_files)
+    meta = {
+        "version": SESSION_VERSION,
+        "state": state,
+        "files": [_fingerprint_entry(f) for f in files],
+        "row_counts": None if row_counts is None else [int(n) for n in row_counts],
+        "compare_files": [_fingerprint_entry(f) for f in compare_files],
+        "column_index": column_index,
+        "matrices": sorted(matrices or {}),
+    }
+
+    arrays = {"meta": np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)}
+    for name, matrix in (matrices or {}).items():
+        arrays[f"matrix_{name}"] = np.asarray(matrix)
+
+    if embed_columns and column_index is not None:
+        cache = data_cache.DEFAULT_CACHE if cache is None else cache
+        all_files = files + compare_files
+        columns = []
+        for file_path in all_files:
+            columns.append(cache.get((data_cache.file_fingerprint(file_path), column_index)))
+        present = np.array([c is not None for c in columns], dtype=bool)
+        offsets = np.zeros(len(all_files) + 1, dtype=np.int64)
+        np.cumsum([0 if c is None else len(c) for c in columns], out=offsets[1:])
+        values = np.empty(offsets[-1], dtype=DEFAULT_DTYPE)
+        for i, column in enumerate(columns):
+            if column is not None:
+                values[offsets[i]:offsets[i + 1]] = column
+        arrays.update(column_values=values, column_offsets=offsets, column_present=present)
+
+    # 传入文件对象，避免 numpy 自动追加 .npz 扩展名
+    with open(session_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+
+def load_session(session_path, cache=None):
+    """
+    读取会话；指纹未改变的文件的嵌入数据直接放入缓存，之后处理时只需解析改动过的文件
+
+    Args:
+        session_path (str): 会话文件路径
+        cache (LRUCache): 放入整列数据的缓存，默认为进程内共享缓存
+
+    Returns:
+        Session: 会话内容
+    """
+    try:
+        archive = np.load(session_path, allow_pickle=False)
+        meta = json.loads(archive["meta"].tobytes().decode("utf-8"))
+    except Exception as e:
+        raise SessionError(f"无法读取会话文件: {e}") from e
+    if meta.get("version") != SESSION_VERSION:
+        raise SessionError(f"不支持的会话文件版本: {meta.get('version')}")
+
+    cache = data_cache.DEFAULT_CACHE if cache is None else cache
+    entries = meta["files"] + meta["compare_files"]
+    changed, missing, unchanged = [], [], []
+    for i, entry in enumerate(entries):
+        path = entry["path"]
+        try:
+            current = data_cache.file_fingerprint(path)
+        except OSError:
+            missing.append(path)
+            continue
+        if current == (path, entry["size"], entry["mtime_ns"]):
+            unchanged.append((i, current))
+        else:
+            changed.append(path)
+
+    column_index = meta["column_index"]
+    if "column_values" in archive.files and column_index is not None:
+        values = archive["column_values"]
+        offsets = archive["column_offsets"]
+        present = archive["column_present"]
+        for i, fingerprint in unchanged:
+            if present[i]:
+                cache.put((fingerprint, column_index), values[offsets[i]:offsets[i + 1]].copy())
+
+    lost = set(missing)
+    stale = lost | set(changed)
+    row_counts = meta["row_counts"]
+    files, counts = [], []
+    for i, entry in enumerate(meta["files"]):
+        if entry["path"] in lost:
+            continue
+        files.append(entry["path"])
+        if row_counts is not None and entry["path"] not in stale:
+            counts.append(row_counts[i])
+        else:
+            counts.append(None)
+    compare_files = [e["path"] for e in meta["compare_files"] if e["path"] not in lost]
+
+    matrices = {}
+    if not stale:
+        matrices = {name: archive[f"matrix_{name}"] for name in meta["matrices"]}
+    archive.close()
+    return Session(meta["state"], files, counts, compare_files, matrices, changed, missing)
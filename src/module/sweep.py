@@ -0,0 +1,188 @@
+# module/sweep.py
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import src.module.data_cache as data_cache
+import src.module.pipeline as pipeline
+
+
+class SweepResult:
+    """参数扫描中的一组参数及其热图矩阵和评价指标
+
+    Args:
+        length (int): 热图行数（每个文件降采样后的点数）
+        data_groups (int): 热图列数（使用的文件数）
+        method (str): 数据处理方法
+    """
+    __slots__ = ("length", "data_groups", "method", "matrix", "contrast", "dynamic_range",
+                 "info_kept", "error")
+
+    def __init__(self, length, data_groups, method):
+        self.length = length
+        self.data_groups = data_groups
+        self.method = method
+        self.matrix = None
+        self.contrast = None
+        self.dynamic_range = None
+        self.info_kept = None
+        self.error = None
+
+    @property
+    def label(self):
+        return f"{self.length}x{self.data_groups} {self.method}"
+
+
+def contrast(matrix):
+    """RMS对比度：矩阵元素的标准差（归一化数据的取值范围为0~1）"""
+    finite = matrix[np.isfinite(matrix)]
+    return float(finite.std()) if finite.size else float("nan")
+
+
+def dynamic_range(matrix):
+    """
+    动态范围（dB）：信号幅度（第99与第1百分位数之差）与噪声的比值
+
+    噪声由每行相邻点之差的中位绝对偏差估计（相邻点之差的标准差为噪声的 sqrt(2) 倍），
+    不受平缓变化的信号影响；没有可估计的噪声时为inf。
+    """
+    finite = matrix[np.isfinite(matrix)]
+    if finite.size == 0:
+        return float("nan")
+    low, high = np.percentile(finite, [1, 99])
+    steps = np.diff(matrix, axis=1)
+    steps = steps[np.isfinite(steps)]
+    if steps.size == 0:
+        return float("inf")
+    noise = 1.4826 * np.median(np.abs(steps - np.median(steps))) / np.sqrt(2)
+    if noise == 0:
+        return float("inf")
+    return float(20 * np.log10(max(high - low, np.finfo(float).tiny) / noise))
+
+
+def information_kept(aligned, reduced, method):
+    """
+    降采样保留的信息：对齐后数据的方差中能由降采样结果解释的比例（0~1）
+
+    PCA为前 length 个主成分的解释方差比；其他方法把每行的 length 个点按等间距位置线性插值
+    还原到原长度，取还原数据与对齐数据（均按行去均值）的相关系数平方。
+
+    Args:
+        aligned (np.ndarray): 对齐并归一化后的数据 (文件数, 样本数)
+        reduced (np.ndarray): 降采样结果 (文件数, length)，与 aligned 逐行对应
+        method (str): 数据处理方法
+
+    Returns:
+        float: 保留的方差比例
+    """
+    aligned = np.asarray(aligned, dtype=np.float64)
+    reduced = np.asarray(reduced, dtype=np.float64)
+    if method == 'pca':
+        total = aligned.var(axis=0).sum()
+        return float(reduced.var(axis=0).sum() / total) if total > 0 else 1.0
+
+    n = aligned.shape[1]
+    length = reduced.shape[1]
+    # 第 j 个点代表第 j 段的中心；所有行的插值位置相同，只计算一次下标和权重
+    centers = (np.arange(length) + 0.5) * n / length - 0.5
+    x = np.clip(np.arange(n, dtype=np.float64), centers[0], centers[-1])
+    upper = np.clip(np.searchsorted(centers, x, side="right"), 1, max(length - 1, 1))
+    lower = upper - 1
+    if length > 1:
+        weight = (x - centers[lower]) / (centers[upper] - centers[lower])
+    else:
+        upper = lower
+        weight = np.zeros(n)
+    restored = reduced[:, lower] * (1 - weight) + reduced[:, upper] * weight
+
+    # 按行去均值后的相关系数平方：不受最大值、RMS等方法整体偏高的影响
+    aligned = aligned - aligned.mean(axis=1, keepdims=True)
+    restored = restored - restored.mean(axis=1, keepdims=True)
+    total = (aligned ** 2).sum()
+    if total == 0:
+        return 1.0
+    explained = (restored ** 2).sum()
+    if explained == 0:
+        return 0.0
+    return float((aligned * restored).sum() ** 2 / (total * explained))
+
+
+def _evaluate(raw, times, params, data_groups, method):
+    """用一个 (length, method) 处理共享的数据集，再按各个热图列数组成热图矩阵"""
+    results = [SweepResult(params.length, groups, method) for groups in data_groups]
+    try:
+        # 只需逐文件的处理结果，热图矩阵按各个热图列数分别组成
+        result = pipeline.process_dataset(raw, params._replace(method=method, data_groups=0, file_reduce="first"),
+                                          times=times)
+    except pipeline.PipelineError as e:
+        for r in results:
+            r.error = f"{e.title}: {e.message}"
+        return results
+    except Exception as e:
+        for r in results:
+            r.error = str(e)
+        return results
+
+    processed = result.processed.values
+    aligned = result.aligned.values
+    by_time = params.time_column is not None
+    for r in results:
+        if len(processed) < r.data_groups:
+            r.error = f"数据不足: 需要 {r.data_groups} 组数据，但只有 {len(processed)} 组可用"
+            continue
+        r.matrix = pipeline.heatmap_matrix(processed, params._replace(data_groups=r.data_groups))
+        r.contrast = contrast(r.matrix)
+        r.dynamic_range = dynamic_range(r.matrix)
+        # 按时间分箱直接由原始数据得到，没有可比较的对齐数据
+        if not by_time:
+            rows = len(processed) if method == 'pca' or params.file_reduce != "first" else r.data_groups
+            r.info_kept = information_kept(aligned[:rows], processed[:rows], method)
+    return results
+
+
+def run_sweep(file_paths, params, lengths, data_groups, methods, workers=None, cache=None):
+    """
+    数据只读取一次，并行计算所有 (热图行数, 热图列数, 处理方法) 组合
+
+    数据集（及时间列）读入后由所有线程共享，只读不写；每个 (热图行数, 处理方法) 处理一次，
+    不同的热图列数只是由同一组逐文件结果组成矩阵（取前若干行或分组归约）。
+
+    Args:
+        file_paths (list): 文件路径列表
+        params (PipelineParams): 其余处理参数（列号、行范围、对齐方式等）
+        lengths (list): 热图行数
+        data_groups (list): 热图列数
+        methods (list): 数据处理方法
+        workers (int): 并行线程数，默认为CPU核数
+        cache (LRUCache): 整列数据所在的缓存，默认为进程内共享缓存
+
+    Returns:
+        list: SweepResult 列表，按 (热图行数, 热图列数, 处理方法) 的顺序排列
+    """
+    if not file_paths:
+        raise pipeline.PipelineError("数据缺失", "请先选择文件")
+    if params.end_row is not None and params.start_row >= params.end_row:
+        raise pipeline.PipelineError("参数错误", "起始行必须小于结束行")
+
+    raw = data_cache.load_dataset(file_paths, params.column_index, start_row=params.start_row,
+                                  end_row=params.end_row, cache=cache)
+    times = None
+    if params.time_column is not None:
+        times = data_cache.load_dataset(file_paths, params.time_column, start_row=params.start_row,
+                                        end_row=params.end_row, cache=cache)
+        raw, times = pipeline.common_files(raw, times)
+    if not len(raw):
+        raise pipeline.PipelineError("数据错误", "未能从文件中读取有效数据")
+
+    data_groups = list(data_groups)
+    tasks = list(itertools.product(lengths, methods))
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        evaluated = list(executor.map(
+            lambda task: _evaluate(raw, times, params._replace(length=task[0]), data_groups, task[1]),
+            tasks))
+
+    by_key = {(r.length, r.data_groups, r.method): r for results in evaluated for r in results}
+    return [by_key[key] for key in itertools.product(lengths, data_groups, methods)]
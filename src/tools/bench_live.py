@@ -0,0 +1,185 @@
+# tools/bench_live.py
+"""实时测量的端到端负载测试：模拟器写入文件 -> 界面扫描文件夹 -> 热图矩阵更新 -> 画面刷新
+
+模拟器在独立进程中按设定速率写入4200格式的xls文件（见 simulate_4200），主进程中的
+HeatmapApp 轮询文件夹，发现新文件后按界面的流程重新扫描（read_files）、增量处理
+（handle_datas）并刷新显示，每个热图行对应一个文件。对每个新文件记录：
+    矩阵延迟  文件写入完成（修改时间）到包含该文件的热图矩阵算出
+    画面延迟  文件写入完成到画面绘制完成
+以及持续吞吐量（文件/秒）。界面处理落后于写入时，一次更新会同时处理积压的多个文件。
+
+用法（在仓库根目录执行）:
+    python -m src.tools.bench_live --files 100 --rows 500 --rate 5 --render fast
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import src.module.read_files as read_files
+import src.tools.simulate_4200 as simulate_4200
+
+
+def modified_time(file_path):
+    """文件写入完成的时刻（与 time.time() 同一时钟，秒）"""
+    return os.stat(file_path).st_mtime_ns / 1e9
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=np.float64) * 1e3
+    if values.size == 0:
+        return "    -"
+    p50, p95 = np.percentile(values, [50, 95])
+    return f"{p50:10.1f}{p95:10.1f}{values.max():10.1f}"
+
+
+def create_app(args):
+    """创建无界面的 HeatmapApp；消息框在无显示环境下会阻塞，改为打印"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    qt_app = QApplication.instance() or QApplication([])
+    from src.main.MainImage import HeatmapApp
+
+    def report(parent, title, message, *rest):
+        print(f"[{title}] {message}")
+
+    QMessageBox.warning = staticmethod(report)
+    QMessageBox.critical = staticmethod(report)
+
+    window = HeatmapApp()
+    window.resize(1200, 800)
+    window.show()
+    window.row_edit.setText(str(args.length))
+    window.column_edit.setText(str(args.column))
+    index = window.process_combo.findData(args.method)
+    if index < 0:
+        raise SystemExit(f"未知的处理方法: {args.method}")
+    window.process_combo.setCurrentIndex(index)
+    window.fast_view_cb.setChecked(args.render == "fast")
+    return qt_app, window
+
+
+def update_view(qt_app, window, folder, render):
+    """
+    按界面流程处理文件夹的当前内容
+
+    Returns:
+        tuple: (扫描结束时刻, 矩阵算出时刻, 画面绘制完成时刻)，矩阵处理失败时为None
+    """
+    window.selected_folder = folder
+    window.scan_excel_files()
+    # 每个文件一行热图
+    window.col_edit.setText(str(window.file_model.file_count()))
+    scanned = time.time()
+
+    if window.prepare_data() is None:
+        return None
+    computed = time.time()
+
+    window.show_current_view()
+    if render == "fast":
+        window.live_view.repaint()
+    # 完整绘制在 show_current_view 中已同步绘制画布
+    qt_app.processEvents()
+    return scanned, computed, time.time()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="实时测量端到端延迟与吞吐量测试")
+    parser.add_argument("--files", type=int, default=100, help="测试期间写入的文件数")
+    parser.add_argument("--initial", type=int, default=10, help="测试开始前已有的文件数")
+    parser.add_argument("--rows", type=int, default=500, help="每个文件的采样点数")
+    parser.add_argument("--channels", type=int, default=2, help="电流通道数")
+    parser.add_argument("--noise", type=float, default=0.02, help="噪声标准差（相对于光电流幅值）")
+    parser.add_argument("--rate", type=float, default=5.0, help="写入速率（文件/秒），0 表示尽快写入")
+    parser.add_argument("--column", type=int, default=3, help="数据列号")
+    parser.add_argument("--length", type=int, default=20, help="每行数据点数")
+    parser.add_argument("--method", default="sampling", help="处理方法（处理方法下拉框的数据值）")
+    parser.add_argument("--render", choices=["fast", "full"], default="fast",
+                        help="fast: 颜色查找表快速显示；full: seaborn完整绘制")
+    parser.add_argument("--poll", type=float, default=0.02, help="轮询文件夹的间隔（秒）")
+    parser.add_argument("--timeout", type=float, default=600.0, help="最长测试时间（秒）")
+    parser.add_argument("--folder", help="输出文件夹（需为空），默认使用临时文件夹")
+    args = parser.parse_args()
+
+    temp_dir = None
+    folder = args.folder
+    if folder is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="hot_image_live_")
+        folder = temp_dir.name
+    elif read_files.list_excel_files(folder):
+        raise SystemExit(f"输出文件夹不为空: {folder}")
+
+    params = simulate_4200.SimulatorParams(rows=args.rows, channels=args.channels, noise=args.noise)
+    simulate_4200.simulate(folder, args.initial, params)
+
+    qt_app, window = create_app(args)
+    # 预热：首次导入、字体加载和缓存填充不计入测试
+    if update_view(qt_app, window, folder, args.render) is None:
+        raise SystemExit("初始文件处理失败")
+    seen = set(read_files.list_excel_files(folder))
+
+    # 独立进程写入，与仪器一样不和界面争用解释器
+    context = multiprocessing.get_context("spawn")
+    writer = context.Process(target=simulate_4200.simulate,
+                             args=(folder, args.files, params, args.rate, args.initial + 1))
+    start = time.time()
+    writer.start()
+
+    matrix_latency, frame_latency = [], []
+    scan_times, compute_times, render_times, batch_sizes = [], [], [], []
+    written = {}
+    deadline = start + args.timeout
+    while len(written) < args.files and time.time() < deadline:
+        writer_done = not writer.is_alive()
+        new = [f for f in read_files.list_excel_files(folder) if f not in seen]
+        if not new:
+            if writer_done:
+                break
+            time.sleep(args.poll)
+            continue
+
+        begin = time.time()
+        times = update_view(qt_app, window, folder, args.render)
+        if times is None:
+            break
+        scanned, computed, drawn = times
+        for f in new:
+            written[f] = modified_time(f)
+            matrix_latency.append(computed - written[f])
+            frame_latency.append(drawn - written[f])
+        seen.update(new)
+        scan_times.append(scanned - begin)
+        compute_times.append(computed - scanned)
+        render_times.append(drawn - computed)
+        batch_sizes.append(len(new))
+
+    writer.join()
+    end = time.time()
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+    if not written:
+        print("未处理任何文件")
+        return
+
+    write_times = sorted(written.values())
+    write_rate = (len(write_times) - 1) / (write_times[-1] - write_times[0]) if len(write_times) > 1 else 0.0
+    print(f"{args.initial} + {len(written)} 个文件 x {args.rows} 行，{args.channels} 个通道，"
+          f"方法={args.method}，显示={args.render}")
+    print(f"写入速率: {write_rate:.1f} 文件/秒（设定 {args.rate or '尽快'}）")
+    print(f"持续吞吐量: {len(written) / (end - start):.1f} 文件/秒，"
+          f"共 {len(batch_sizes)} 次更新，单次最多 {max(batch_sizes)} 个新文件")
+    print(f"{'':<12}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}")
+    print(f"{'矩阵延迟':<12}{percentiles(matrix_latency)}")
+    print(f"{'画面延迟':<12}{percentiles(frame_latency)}")
+    print(f"{'扫描文件夹':<12}{percentiles(scan_times)}")
+    print(f"{'计算矩阵':<12}{percentiles(compute_times)}")
+    print(f"{'绘制画面':<12}{percentiles(render_times)}")
+
+
+if __name__ == "__main__":
+    main()
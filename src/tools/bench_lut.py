@@ -0,0 +1,60 @@
+# tools/bench_lut.py
+"""热图显示的帧率对比：seaborn完整绘制 vs 颜色查找表直接着色
+
+用法（在仓库根目录执行）:
+    python -m src.tools.bench_lut --rows 1000 --cols 1000 --frames 30
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+import src.module.colormap_lut as colormap_lut
+import src.module.render as render
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热图显示帧率对比")
+    parser.add_argument("--rows", type=int, default=1000, help="矩阵行数")
+    parser.add_argument("--cols", type=int, default=1000, help="矩阵列数")
+    parser.add_argument("--frames", type=int, default=30, help="查找表着色的帧数")
+    parser.add_argument("--cmap", default="viridis", help="颜色条名称")
+    args = parser.parse_args()
+
+    # 无显示环境下也能创建QImage
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from src.main.live_view import LiveHeatmapView
+    app = QApplication.instance() or QApplication([])
+
+    rng = np.random.default_rng(0)
+    frames = [rng.random((args.rows, args.cols)) for _ in range(4)]
+
+    start = time.perf_counter()
+    render.render_heatmap_png(frames[0], cmap=args.cmap)
+    seaborn_time = time.perf_counter() - start
+
+    view = LiveHeatmapView()
+    view.resize(800, 600)
+    start = time.perf_counter()
+    for i in range(args.frames):
+        view.set_data(frames[i % len(frames)], cmap=args.cmap)
+        view.repaint()
+    lut_time = (time.perf_counter() - start) / args.frames
+
+    lut = colormap_lut.build_lut(args.cmap)
+    start = time.perf_counter()
+    for i in range(args.frames):
+        colormap_lut.apply_lut(frames[i % len(frames)], lut, 0.0, 1.0)
+    color_time = (time.perf_counter() - start) / args.frames
+
+    print(f"矩阵 {args.rows} x {args.cols}")
+    print(f"seaborn绘制并编码PNG: {seaborn_time * 1e3:10.1f} ms/帧 ({1 / seaborn_time:6.1f} 帧/秒)")
+    print(f"查找表着色:           {color_time * 1e3:10.1f} ms/帧 ({1 / color_time:6.1f} 帧/秒)")
+    print(f"着色并绘制到窗口:     {lut_time * 1e3:10.1f} ms/帧 ({1 / lut_time:6.1f} 帧/秒)")
+    del app
+
+
+if __name__ == "__main__":
+    main()
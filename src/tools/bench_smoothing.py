@@ -0,0 +1,100 @@
+# tools/bench_smoothing.py
+"""平滑类处理方法的性能对比：逐行Python循环 vs 批量向量化实现
+
+循环实现均为改写前的原始代码，最后一列为两者结果的最大差异（只有浮点舍入误差）。
+
+用法（在仓库根目录执行）:
+    python -m src.tools.bench_smoothing --files 200 --samples 5000 --length 20
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.signal import savgol_filter
+
+import src.module.handle_datas as handle_datas
+
+
+# 旧实现：每个文件单独调用，逐点循环
+def loop_median(data, target_length):
+    step = max(1, len(data) // target_length)
+    reduced = []
+    for i in range(0, len(data), step):
+        segment = data[i:i + step]
+        if len(segment):
+            reduced.append(np.median(segment))
+    return reduced[:target_length]
+
+
+def loop_ema(data, target_length, alpha=0.3):
+    smoothed = [data[0]]
+    for i in range(1, len(data)):
+        smoothed.append(alpha * data[i] + (1 - alpha) * smoothed[-1])
+    step = len(smoothed) // target_length
+    return [smoothed[i] for i in range(0, len(smoothed), step)][:target_length]
+
+
+def loop_savgol(data, target_length, window_length=15, polyorder=2):
+    smoothed = savgol_filter(data, window_length, polyorder)
+    step = len(smoothed) // target_length
+    return [smoothed[i] for i in range(0, len(smoothed), step)][:target_length]
+
+
+def loop_wavelet(data, target_length, wavelet='db4', level=3):
+    pywt = handle_datas.pywt
+    coeffs = pywt.wavedec(data, wavelet, level=level)
+    threshold = np.std(coeffs[-level]) * np.sqrt(2 * np.log(len(data)))
+    coeffs = [pywt.threshold(c, threshold, mode='soft') for c in coeffs]
+    denoised = pywt.waverec(coeffs, wavelet)[:len(data)]
+    step = len(denoised) // target_length
+    return [denoised[i] for i in range(0, len(denoised), step)][:target_length]
+
+
+LOOP_METHODS = {
+    'median': loop_median,
+    'ema': loop_ema,
+    'savgol': loop_savgol,
+    'wavelet': loop_wavelet,
+}
+
+
+def best_of(func, repeat):
+    """重复执行取最短耗时（秒）"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="平滑方法性能对比")
+    parser.add_argument("--files", type=int, default=200, help="文件数（矩阵行数）")
+    parser.add_argument("--samples", type=int, default=5000, help="每个文件的样本数")
+    parser.add_argument("--length", type=int, default=20, help="目标数据点数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 10, args.samples)
+    values = np.sin(t)[None, :] + rng.normal(0, 0.1, (args.files, args.samples))
+
+    print(f"{args.files} 个文件 x {args.samples} 个样本 -> {args.length} 点")
+    print(f"{'方法':<10}{'循环(ms)':>12}{'批量(ms)':>12}{'加速比':>10}{'最大差异':>14}")
+    for name, loop_func in LOOP_METHODS.items():
+        if name == 'wavelet' and handle_datas.pywt is None:
+            print(f"{name:<10}  未安装 PyWavelets，跳过")
+            continue
+        batched_func = handle_datas.ROW_SMOOTHERS[name]
+        loop_time, loop_result = best_of(
+            lambda: np.array([loop_func(row, args.length) for row in values]), args.repeat)
+        batch_time, batch_result = best_of(lambda: batched_func(values, args.length), args.repeat)
+        difference = np.max(np.abs(loop_result - batch_result))
+        print(f"{name:<10}{loop_time * 1e3:>12.1f}{batch_time * 1e3:>12.1f}"
+              f"{loop_time / batch_time:>10.1f}{difference:>14.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# tools/simulate_4200.py
+"""4200源表采集模拟器：按设定的速率向文件夹写入与仪器导出格式相同的xls文件
+
+每个文件对应一次测量（一个像素位置）：第一个工作表为数据表，首行为表头
+（Time、V、I1 … In），之后每行一个采样点；第二个工作表为测量设置。
+光电流按文件序号随光斑位置起伏，叠加暗电流和高斯噪声。文件先写入临时文件再改名，
+文件夹中不会出现写了一半的xls文件，文件的修改时间即为写入完成的时刻。
+
+用法（在仓库根目录执行）:
+    python -m src.tools.simulate_4200 输出文件夹 --files 100 --rows 500 --channels 2 --rate 5
+"""
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+import xlwt
+
+# 模拟参数
+SimulatorParams = namedtuple("SimulatorParams", [
+    "rows",      # 每个文件的采样点数
+    "channels",  # 电流通道数
+    "noise",     # 噪声标准差（相对于光电流幅值）
+    "interval",  # 采样间隔（秒）
+    "period",    # 光斑扫过一个周期的文件数
+    "prefix",    # 文件名前缀，文件名为 前缀 + 序号 + .xls
+], defaults=[500, 2, 0.02, 0.01, 20, "Run"])
+
+DARK_CURRENT = 1e-11
+PHOTO_CURRENT = 1e-9
+
+
+def measurement_columns(index, params, rng):
+    """
+    生成一次测量的各列数据
+
+    Args:
+        index (int): 文件序号（决定光斑位置）
+        params (SimulatorParams): 模拟参数
+        rng (np.random.Generator): 随机数发生器
+
+    Returns:
+        tuple: (表头列表, 二维数组 (采样点数, 列数))
+    """
+    rows = params.rows
+    # 采样时刻带少量抖动，与仪器的实际采样间隔一致
+    times = np.cumsum(rng.uniform(0.9, 1.1, rows) * params.interval)
+    bias = np.linspace(0.0, 1.0, rows)
+    columns = [times, bias]
+    for channel in range(params.channels):
+        # 各通道的光斑相位错开，响应随偏压和时间常数上升
+        phase = 2 * np.pi * (index / params.period + channel / max(params.channels, 1))
+        intensity = 0.5 + 0.5 * np.sin(phase)
+        response = 1 - np.exp(-times / (times[-1] * 0.2))
+        current = DARK_CURRENT + PHOTO_CURRENT * intensity * response * bias
+        current += rng.normal(0.0, params.noise * PHOTO_CURRENT, rows)
+        columns.append(current)
+
+    header = ["Time", "V"] + [f"I{channel + 1}" for channel in range(params.channels)]
+    return header, np.column_stack(columns)
+
+
+def write_measurement(file_path, header, values, settings=None):
+    """
+    按仪器导出格式写出一个xls文件（先写临时文件再改名）
+
+    Args:
+        file_path (str): 目标文件路径
+        header (list): 表头
+        values (np.ndarray): 二维数据 (采样点数, 列数)
+        settings (dict): 写入设置工作表的参数
+    """
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet("Run1")
+    for col, name in enumerate(header):
+        sheet.write(0, col, name)
+    for row, record in enumerate(values.tolist(), start=1):
+        for col, value in enumerate(record):
+            sheet.write(row, col, value)
+
+    settings_sheet = workbook.add_sheet("Settings")
+    for row, (key, value) in enumerate((settings or {}).items()):
+        settings_sheet.write(row, 0, key)
+        settings_sheet.write(row, 1, value)
+
+    temp_path = file_path + ".part"
+    workbook.save(temp_path)
+    os.replace(temp_path, file_path)
+
+
+def simulate(folder, count, params=SimulatorParams(), rate=0.0, start_index=1, seed=0):
+    """
+    向文件夹依次写入测量文件
+
+    Args:
+        folder (str): 输出文件夹
+        count (int): 文件数
+        params (SimulatorParams): 模拟参数
+        rate (float): 写入速率（文件/秒），0 表示尽快写入
+        start_index (int): 第一个文件的序号
+        seed (int): 随机种子
+
+    Returns:
+        list: 写入的文件路径
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed + start_index)
+    settings = {"Test": "Photocurrent", "Samples": params.rows,
+                "Interval (s)": params.interval, "Channels": params.channels}
+    paths = []
+    start = time.perf_counter()
+    for i in range(count):
+        index = start_index + i
+        if rate > 0:
+            # 按固定节拍写入；落后时不补等待，立即写下一个
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        header, values = measurement_columns(index, params, rng)
+        file_path = os.path.join(folder, f"{params.prefix}{index}.xls")
+        write_measurement(file_path, header, values, settings)
+        paths.append(file_path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="4200源表采集模拟器")
+    parser.add_argument("folder", help="输出文件夹")
+    parser.add_argument("--files", type=int, default=100, help="文件数")
+    parser.add_argument("--rows", type=int, default=500, help="每个文件的采样点数")
+    parser.add_argument("--channels", type=int, default=2, help="电流通道数")
+    parser.add_argument("--noise", type=float, default=0.02, help="噪声标准差（相对于光电流幅值）")
+    parser.add_argument("--rate", type=float, default=5.0, help="写入速率（文件/秒），0 表示尽快写入")
+    parser.add_argument("--start", type=int, default=1, help="第一个文件的序号")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    params = SimulatorParams(rows=args.rows, channels=args.channels, noise=args.noise)
+    start = time.perf_counter()
+    paths = simulate(args.folder, args.files, params, args.rate, args.start, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"已写入 {len(paths)} 个文件到 {args.folder}，用时 {elapsed:.2f} 秒"
+          f"（{len(paths) / elapsed:.1f} 文件/秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# tools/sweep.py
+"""热图参数扫描：数据只读取一次，并行计算多组 (热图行数, 热图列数, 处理方法)，
+输出缩略图总览和评价指标（对比度、动态范围、降采样保留的信息）
+
+用法（在仓库根目录执行）:
+    python -m src.tools.sweep 数据文件夹 --lengths 10,20,40 --groups 10,20 --methods mean,rms,sampling
+"""
+import argparse
+import csv
+import time
+
+import src.module.pipeline as pipeline
+import src.module.read_files as read_files
+import src.module.render as render
+import src.module.sweep as sweep
+
+DEFAULT_METHODS = "standard,sampling,rms,mean,max,median,ema,savgol"
+
+
+def int_list(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def format_metric(value, fmt):
+    return "" if value is None else format(value, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热图参数扫描")
+    parser.add_argument("folder", help="数据文件夹")
+    parser.add_argument("--column", type=int, default=3, help="数据列号")
+    parser.add_argument("--start-row", type=int, default=1, help="数据起始行")
+    parser.add_argument("--end-row", type=int, help="数据结束行（不包括此行），默认读到文件末尾")
+    parser.add_argument("--align", choices=["cut", "resample"], default="cut", help="长度对齐方式")
+    parser.add_argument("--time-column", type=int, help="时间列号，给定时按时间分箱")
+    parser.add_argument("--exclude", action="store_true", help="自动排除异常文件")
+    parser.add_argument("--file-reduce", choices=["first", "mean", "max", "rms"], default="first",
+                        help="文件数多于热图列数时：只取前N个文件，或把所有文件分组归约")
+    parser.add_argument("--lengths", type=int_list, default=[10, 20, 40], help="热图行数，逗号分隔")
+    parser.add_argument("--groups", type=int_list, default=[10], help="热图列数，逗号分隔")
+    parser.add_argument("--methods", default=DEFAULT_METHODS, help="处理方法，逗号分隔")
+    parser.add_argument("--workers", type=int, help="并行线程数，默认为CPU核数")
+    parser.add_argument("--cmap", default="viridis", help="颜色条名称")
+    parser.add_argument("--output", default="sweep.png", help="缩略图总览PNG路径")
+    parser.add_argument("--csv", help="评价指标CSV路径")
+    args = parser.parse_args()
+
+    files = read_files.list_excel_files(args.folder)
+    if not files:
+        raise SystemExit(f"未找到Excel文件: {args.folder}")
+    methods = [m.strip() for m in args.methods.split(",") if m.strip()]
+    params = pipeline.PipelineParams(
+        column_index=args.column,
+        start_row=args.start_row,
+        end_row=args.end_row,
+        length=args.lengths[0],
+        data_groups=args.groups[0],
+        method=methods[0],
+        align=args.align,
+        exclude=args.exclude,
+        time_column=args.time_column,
+        file_reduce=args.file_reduce
+    )
+
+    start = time.perf_counter()
+    try:
+        results = sweep.run_sweep(files, params, args.lengths, args.groups, methods, args.workers)
+    except pipeline.PipelineError as e:
+        raise SystemExit(f"{e.title}: {e.message}")
+    elapsed = time.perf_counter() - start
+
+    titles = []
+    for r in results:
+        if r.error:
+            titles.append(f"{r.label}\n{r.error}")
+        else:
+            titles.append(f"{r.label}\nC={r.contrast:.2f} DR={r.dynamic_range:.0f}dB"
+                          + ("" if r.info_kept is None else f" I={r.info_kept:.0%}"))
+    # 每行排列同一组 (热图行数, 热图列数) 的各种方法；各面板的数值范围不同（如PCA），分别着色
+    png = render.render_grid_png([r.matrix for r in results], titles, cmap=args.cmap, shared_scale=False,
+                                 ncols=len(methods), figsize=(3 * len(methods), 2.4 * len(results) / len(methods)))
+    with open(args.output, "wb") as f:
+        f.write(png)
+
+    print(f"{len(files)} 个文件，{len(results)} 组参数，用时 {elapsed:.2f} 秒，总览已保存到 {args.output}")
+    print(f"{'行数':>6}{'列数':>6}  {'方法':<10}{'对比度':>8}{'动态范围(dB)':>14}{'保留信息':>10}")
+    for r in results:
+        if r.error:
+            print(f"{r.length:>6}{r.data_groups:>6}  {r.method:<10}  {r.error}")
+            continue
+        info = "-" if r.info_kept is None else f"{r.info_kept:.1%}"
+        print(f"{r.length:>6}{r.data_groups:>6}  {r.method:<10}{r.contrast:>8.3f}"
+              f"{r.dynamic_range:>14.1f}{info:>10}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["length", "data_groups", "method", "contrast", "dynamic_range_db", "info_kept", "error"])
+            for r in results:
+                writer.writerow([r.length, r.data_groups, r.method, format_metric(r.contrast, ".6g"),
+                                 format_metric(r.dynamic_range, ".6g"), format_metric(r.info_kept, ".6g"),
+                                 r.error or ""])
+
+
+if __name__ == "__main__":
+    main()
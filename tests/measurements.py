@@ -0,0 +1,16 @@
+# tests/measurements.py
+"""按仪器导出格式写出测量文件（见 tools/simulate_4200）"""
+import os
+
+import numpy as np
+
+import src.tools.simulate_4200 as simulate_4200
+
+
+def write_file(folder, name, rows, seed, noise=0.02):
+    """写出一个测量文件：表头加 rows 个采样点（Time、V、I1、I2 四列）"""
+    params = simulate_4200.SimulatorParams(rows=rows, noise=noise)
+    header, values = simulate_4200.measurement_columns(seed, params, np.random.default_rng(seed))
+    path = os.path.join(str(folder), name)
+    simulate_4200.write_measurement(path, header, values)
+    return path
@@ -0,0 +1,220 @@
+# tests/test_biff_reader.py
+"""快速解析（biff_reader）与 xlrd 的结果对比"""
+import datetime
+import random
+import struct
+
+import numpy as np
+import pytest
+import xlrd
+import xlwt
+
+import src.module.biff_reader as biff_reader
+import src.module.read_files as read_files
+from tests import xls_builder as xb
+
+ROW_RANGES = [(0, None), (1, None), (3, 40), (5, 100000), (250, None), (2, 2)]
+
+
+def xlrd_column(file_path, column_index, start_row=0, end_row=None):
+    """xlrd 读取的参考结果：(该列数据, 行数)"""
+    sheet = xlrd.open_workbook(file_path).sheet_by_index(0)
+    stop = sheet.nrows if end_row is None else min(end_row, sheet.nrows)
+    return read_files._sheet_column_array(sheet, column_index, start_row, stop), sheet.nrows
+
+
+def assert_same_as_xlrd(file_path, columns, row_ranges=ROW_RANGES):
+    for column_index in columns:
+        for start_row, end_row in row_ranges:
+            expected, nrows = xlrd_column(file_path, column_index, start_row, end_row)
+            column, count = biff_reader.read_column(file_path, column_index, start_row, end_row)
+            assert count == nrows
+            assert column.dtype == expected.dtype
+            np.testing.assert_array_equal(column, expected)
+
+    sheet = xlrd.open_workbook(file_path).sheet_by_index(0)
+    expected = np.array([read_files._sheet_column_array(sheet, c, 0, sheet.nrows) for c in range(sheet.ncols)])
+    np.testing.assert_array_equal(biff_reader.read_sheet(file_path), expected.reshape(sheet.ncols, sheet.nrows))
+    assert biff_reader.count_rows(file_path) == sheet.nrows
+
+
+@pytest.fixture
+def xlwt_file(tmp_path):
+    """xlwt 写出的典型测量文件：表头、NUMBER/RK 列、夹杂文本、日期和布尔值的列，以及第二个工作表"""
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet("Run1")
+    date_style = xlwt.easyxf(num_format_str="yyyy-mm-dd")
+    time_style = xlwt.easyxf(num_format_str="hh:mm:ss")
+    for col, name in enumerate(["Time", "V", "I", "Mixed"]):
+        sheet.write(0, col, name)
+    rng = np.random.default_rng(0)
+    for row in range(1, 300):
+        sheet.write(row, 0, row * 0.01, time_style)
+        sheet.write(row, 1, row)
+        sheet.write(row, 2, float(rng.normal()))
+        kind = row % 6
+        if kind == 0:
+            sheet.write(row, 3, "text")
+        elif kind == 1:
+            sheet.write(row, 3, datetime.date(2020, 1, 1) + datetime.timedelta(days=row), date_style)
+        elif kind == 2:
+            sheet.write(row, 3, row % 4 == 0)
+        elif kind == 3:
+            sheet.write(row, 3, None, date_style)
+        else:
+            sheet.write(row, 3, -row / 8)
+    workbook.add_sheet("Settings").write(500, 9, 1.0)
+    path = tmp_path / "run1.xls"
+    workbook.save(str(path))
+    return str(path)
+
+
+def test_xlwt_file_matches_xlrd(xlwt_file):
+    assert_same_as_xlrd(xlwt_file, range(6))
+
+
+def test_date_time_and_boolean_cells_are_numbers(xlwt_file):
+    column, _ = biff_reader.read_column(xlwt_file, 3, 1, 8, dtype=np.float64)
+    date = (datetime.date(2020, 1, 1) + datetime.timedelta(days=1) - datetime.date(1899, 12, 30)).days
+    # 第1行日期，第2行布尔值，第3行空白（带格式），第4、5行数值，第6行文本，第7行日期
+    np.testing.assert_array_equal(column, [date, 0.0, np.nan, -0.5, -0.625, np.nan, date + 6])
+    times, _ = biff_reader.read_column(xlwt_file, 0, 1, 4, dtype=np.float64)
+    np.testing.assert_array_equal(times, [0.01, 0.02, 0.03])
+
+
+def test_only_first_sheet_is_read(xlwt_file):
+    # 第二个工作表有第500行，第一个工作表只有300行
+    assert biff_reader.count_rows(xlwt_file) == 300
+    assert biff_reader.read_sheet(xlwt_file).shape == (4, 300)
+
+
+def test_shared_strings_with_continue(tmp_path):
+    """SST 超过单条记录的长度时由 xlwt 拆到 CONTINUE 记录中"""
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet("Run1")
+    for row in range(400):
+        sheet.write(row, 0, f"label {row} " + "x" * 40)
+        sheet.write(row, 1, row / 4)
+    path = str(tmp_path / "sst.xls")
+    workbook.save(path)
+    assert_same_as_xlrd(path, range(3))
+
+
+def hand_built_cells():
+    """各种单元格记录，返回 (记录字节串, 第0列的期望值)"""
+    cells = [
+        (xb.number(0, 0, 0.1), 0.1),
+        (xb.rk(1, 0, 5), 5.0),
+        (xb.rk(2, 0, 1.5), 1.5),
+        (xb.mulrk(3, 0, [1, 2, 3.5]), 1.0),
+        (xb.formula_number(4, 0, 2.25), 2.25),
+        (xb.formula_bool(5, 0, True), 1.0),
+        (xb.formula_error(6, 0), np.nan),
+        (xb.formula_string(7, 0, "abc"), np.nan),
+        (xb.boolerr(8, 0, 1), 1.0),
+        (xb.boolerr(9, 0, 0x07, is_error=True), np.nan),
+        (xb.label(10, 0, "hi"), np.nan),
+        (xb.label_sst(11, 0, 1), np.nan),
+        (xb.number(12, 0, 43831.0, xf_index=1), 43831.0),
+        (xb.mulrk(13, 1, [4, 5]), np.nan),
+        # 空白单元格不计入行数
+        (xb.blank(15, 0), None),
+    ]
+    return b"".join(c for c, _ in cells), [v for _, v in cells if v is not None]
+
+
+@pytest.fixture
+def hand_built_file(tmp_path):
+    cells, _ = hand_built_cells()
+    # SST 在第一个字符串之后拆到 CONTINUE 记录中
+    shared_strings = xb.sst(["first", "second"], split=8 + 3 + 2 * len("first"))
+    stream = xb.workbook([("Data", cells), ("Other", xb.number(0, 0, 9.0) + xb.number(20, 5, 1.0))],
+                         xf_formats=(0, xb.DATE_FORMAT), shared_strings=shared_strings)
+    return str(xb.save(tmp_path / "records.xls", stream))
+
+
+def test_record_types(hand_built_file):
+    _, expected = hand_built_cells()
+    column, nrows = biff_reader.read_column(hand_built_file, 0, dtype=np.float64)
+    assert nrows == 14
+    np.testing.assert_array_equal(column, expected)
+    mulrk_row = biff_reader.read_sheet(hand_built_file, dtype=np.float64)[:, 3]
+    np.testing.assert_array_equal(mulrk_row, [1.0, 2.0, 3.5])
+    assert_same_as_xlrd(hand_built_file, range(4), [(0, None), (3, 9), (13, None)])
+
+
+def test_repeating_rows_match_xlrd(tmp_path):
+    """逐行重复的记录段走向量化路径，其中混有日期格式的XF和文本"""
+    rows = []
+    for row in range(200):
+        rows.append(xb.number(row, 0, row * 0.1) + xb.rk(row, 1, row, xf_index=row % 2)
+                    + xb.label_sst(row, 2, 0) + xb.number(row, 3, -row / 3))
+    # 中途改变记录结构，再回到重复结构
+    rows.insert(100, xb.mulrk(100, 5, [1, 2]) + xb.formula_number(100, 6, 7.5))
+    stream = xb.workbook([("Data", b"".join(rows))], xf_formats=(0, xb.DATE_FORMAT),
+                         shared_strings=xb.sst(["text"]))
+    path = str(xb.save(tmp_path / "blocks.xls", stream))
+    assert_same_as_xlrd(path, range(8))
+
+
+def test_truncated_record_stream(tmp_path):
+    stream = xb.workbook([("Data", xb.number(0, 0, 1.0) + xb.number(1, 0, 2.0))])
+    # 去掉最后一个单元格的部分数据和工作表的 EOF
+    path = str(xb.save(tmp_path / "truncated.xls", stream[:-4 - 10]))
+    with pytest.raises(biff_reader.UnsupportedFormat):
+        biff_reader.read_column(path, 0)
+    with pytest.raises(Exception):
+        xlrd.open_workbook(path)
+    with pytest.raises(Exception):
+        read_files.read_full_column(path, 0)
+
+
+def test_truncated_file(xlwt_file, tmp_path):
+    with open(xlwt_file, "rb") as f:
+        data = f.read()
+    path = tmp_path / "cut.xls"
+    path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(biff_reader.UnsupportedFormat):
+        biff_reader.read_column(str(path), 0)
+    with pytest.raises(Exception):
+        read_files.read_full_column(str(path), 0)
+    assert read_files.count_rows(str(path)) == 0
+
+
+def test_not_an_xls_file(tmp_path):
+    path = tmp_path / "text.xls"
+    path.write_bytes(b"not an excel file")
+    with pytest.raises(biff_reader.UnsupportedFormat):
+        biff_reader.read_sheet(str(path))
+
+
+def test_unsupported_format_falls_back_to_xlrd(tmp_path):
+    """工作表中嵌有图表子流时快速解析放弃，改由 xlrd 读取"""
+    cells = xb.number(0, 0, 1.0) + xb.chart_substream() + xb.number(1, 0, 2.0) + xb.rk(1, 1, 3)
+    path = str(xb.save(tmp_path / "chart.xls", xb.workbook([("Data", cells)])))
+    with pytest.raises(biff_reader.UnsupportedFormat):
+        biff_reader.read_column(path, 0)
+    np.testing.assert_array_equal(read_files.read_full_column(path, 0), [1.0, 2.0])
+    np.testing.assert_array_equal(read_files.read_full_sheet(path), [[1.0, 2.0], [np.nan, 3.0]])
+    assert read_files.count_rows(path) == 2
+
+
+def test_undefined_xf_falls_back_to_xlrd(tmp_path):
+    """XF索引越界时与 xlrd 一样报错，而不是给出结果"""
+    path = str(xb.save(tmp_path / "bad_xf.xls", xb.workbook([("Data", xb.number(0, 0, 1.0, xf_index=5))])))
+    with pytest.raises(biff_reader.UnsupportedFormat):
+        biff_reader.read_column(path, 0)
+    with pytest.raises(Exception):
+        read_files.read_full_column(path, 0)
+
+
+# 随机编码中包含 NaN 的位模式，向量化除法时会给出警告
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_rk_decoding_matches_xlrd():
+    rng = random.Random(0)
+    codes = [rng.getrandbits(32) - 2 ** 31 for _ in range(20000)] + [0, 1, 2, 3, -1, -2, -4]
+    vectorized = biff_reader._rk_values(np.array(codes, dtype=np.int32))
+    for code, value in zip(codes, vectorized):
+        expected = xlrd.sheet.unpack_RK(struct.pack('<i', code))
+        np.testing.assert_equal(biff_reader._rk_value(code), expected)
+        np.testing.assert_equal(value, expected)
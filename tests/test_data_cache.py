@@ -0,0 +1,60 @@
+# tests/test_data_cache.py
+"""data_cache 读取时记录的统计量和错误信息"""
+import numpy as np
+import pytest
+
+import src.module.data_cache as data_cache
+import src.module.quality as quality
+from src.module.dataset import FileRecord, RaggedDataset
+from tests.measurements import write_file
+
+
+@pytest.fixture
+def files(tmp_path):
+    return [write_file(tmp_path, f"Run{i}.xls", 80 + 10 * i, i, noise=0.3 if i == 2 else 0.02) for i in range(5)]
+
+
+def recomputed_statistics(dataset):
+    """不使用读取时记录的统计量，重新遍历样本计算"""
+    records = [FileRecord(rec.path, rec.start_row, rec.end_row, rec.column) for rec in dataset.records]
+    return quality.file_statistics(RaggedDataset(np.asarray(dataset.values), dataset.offsets, records))
+
+
+def assert_same_statistics(stats, expected):
+    for name in quality.STAT_DTYPE.names:
+        np.testing.assert_array_equal(stats[name], expected[name])
+
+
+@pytest.mark.parametrize("disk", [False, True])
+@pytest.mark.parametrize("start_row, end_row", [(1, None), (0, None), (5, 60)])
+def test_statistics_recorded_while_loading(files, disk, start_row, end_row):
+    cache = data_cache.LRUCache()
+    # 部分文件的统计量已在缓存中
+    data_cache.load_dataset(files[::2], 2, start_row, end_row, cache=cache)
+    dataset = data_cache.load_dataset(files, 2, start_row, end_row, cache=cache, disk=disk)
+    assert all(rec.stats is not None for rec in dataset.records)
+    assert_same_statistics(quality.file_statistics(dataset), recomputed_statistics(dataset))
+
+
+def test_statistics_not_recomputed(files, monkeypatch):
+    data_cache.load_dataset(files, 3, 1, None)
+
+    def fail(dataset):
+        raise AssertionError("统计量被重新计算")
+
+    monkeypatch.setattr(quality, "_block_statistics", fail)
+    dataset = data_cache.load_dataset(files, 3, 1, None)
+    assert len(quality.file_statistics(dataset)) == len(files)
+    # 只截取部分文件时也不重新计算
+    quality.file_statistics(dataset.take([4, 1]))
+
+
+def test_read_errors_are_collected(files, tmp_path):
+    broken = tmp_path / "broken.xls"
+    broken.write_bytes(b"not an excel file")
+    missing = str(tmp_path / "missing.xls")
+    errors = {}
+    dataset = data_cache.load_dataset(files + [str(broken), missing], 2, errors=errors)
+    assert dataset.paths == files
+    assert set(errors) == {str(broken), missing}
+    assert errors[missing] == "文件不存在"
@@ -0,0 +1,207 @@
+# tests/test_incremental.py
+"""增量更新（IncrementalMatrix.update）与完整计算（pipeline.run_pipeline）的结果对比"""
+import os
+import random
+
+import numpy as np
+import pytest
+
+import src.module.incremental as incremental
+import src.module.pipeline as pipeline
+from tests.measurements import write_file
+
+METHODS = ["standard", "sampling", "rms", "mean", "max", "median", "ema", "wavelet", "savgol"]
+
+
+@pytest.fixture(scope="module")
+def files(tmp_path_factory):
+    """长度不同的16个文件；Run3 明显偏短，Run7 噪声偏大，开启异常文件排除时二者被排除"""
+    folder = tmp_path_factory.mktemp("runs")
+    paths = []
+    for i in range(16):
+        rows = 60 if i == 3 else 160 + i
+        paths.append(write_file(folder, f"Run{i}.xls", rows, i, noise=0.5 if i == 7 else 0.02))
+    return paths
+
+
+def make_params(method="mean", align="cut", exclude=False, time_column=None, data_groups=6, file_reduce="first"):
+    return pipeline.PipelineParams(2, 1, None, 8, data_groups, method, align, exclude, time_column, file_reduce)
+
+
+def assert_matches_pipeline(matrix, file_paths, params, memory_limit=None):
+    """增量更新一次，结果应与在同一文件列表上完整计算的结果相同"""
+    result = matrix.update(file_paths, params, memory_limit)
+    expected = pipeline.run_pipeline(file_paths, params)
+    np.testing.assert_array_equal(result.matrix, expected.matrix)
+    np.testing.assert_array_equal(result.stats, expected.stats)
+    assert result.excluded == expected.excluded
+    assert result.paths == expected.paths
+    assert result.errors == expected.errors
+    return result
+
+
+@pytest.mark.parametrize("align", ["cut", "resample"])
+@pytest.mark.parametrize("method", METHODS)
+def test_add_files(files, method, align):
+    matrix = incremental.IncrementalMatrix()
+    params = make_params(method, align)
+    current = files[4:10]
+    assert_matches_pipeline(matrix, current, params)
+    # 加入更长的文件（统一长度变化）、更短的文件（公共长度变化）以及不改变公共参数的文件
+    for path in [files[12], files[0], files[10], files[15], files[3]]:
+        current = current + [path]
+        assert_matches_pipeline(matrix, current, params)
+    # 加入的文件插在列表中间
+    current = current[:2] + [files[1]] + current[2:]
+    assert_matches_pipeline(matrix, current, params)
+
+
+@pytest.mark.parametrize("align", ["cut", "resample"])
+@pytest.mark.parametrize("method", METHODS)
+def test_remove_files(files, method, align):
+    matrix = incremental.IncrementalMatrix()
+    params = make_params(method, align)
+    current = list(files)
+    assert_matches_pipeline(matrix, current, params)
+    # 移除最短的文件、最长的文件和不改变公共参数的文件
+    for path in [files[3], files[15], files[8], files[0]]:
+        current.remove(path)
+        assert_matches_pipeline(matrix, current, params)
+
+
+@pytest.mark.parametrize("method", ["mean", "max", "rms"])
+@pytest.mark.parametrize("align", ["cut", "resample"])
+def test_time_binning(files, method, align):
+    matrix = incremental.IncrementalMatrix()
+    params = make_params(method, align, time_column=0)
+    current = files[2:9]
+    assert_matches_pipeline(matrix, current, params)
+    for path in [files[0], files[14]]:
+        current = current + [path]
+        assert_matches_pipeline(matrix, current, params)
+    current.remove(files[3])
+    assert_matches_pipeline(matrix, current, params)
+
+
+def test_random_add_and_remove(files):
+    """随机增删文件并切换参数"""
+    rnd = random.Random(0)
+    matrix = incremental.IncrementalMatrix()
+    current = files[:8]
+    for step in range(30):
+        if rnd.random() < 0.5 and len(current) > 6:
+            del current[rnd.randrange(len(current))]
+        else:
+            extra = [path for path in files if path not in current]
+            if extra:
+                current.insert(rnd.randrange(len(current) + 1), rnd.choice(extra))
+        params = make_params(rnd.choice(METHODS[:6]), rnd.choice(["cut", "resample"]), rnd.random() < 0.3)
+        assert_matches_pipeline(matrix, current, params)
+
+
+def test_file_rewritten_in_place(files, tmp_path):
+    """同一路径的文件被改写（修改时间改变）后按新内容重新读取"""
+    current = [write_file(tmp_path, f"Copy{i}.xls", 100 + 5 * i, i) for i in range(6)]
+    matrix = incremental.IncrementalMatrix()
+    for align in ["cut", "resample"]:
+        params = make_params("rms", align)
+        assert_matches_pipeline(matrix, current, params)
+
+        # 改写成更短的文件：数据和公共参数都改变
+        stat = os.stat(current[2])
+        write_file(tmp_path, "Copy2.xls", 70, 40)
+        os.utime(current[2], (stat.st_atime + 10, stat.st_mtime + 10))
+        result = assert_matches_pipeline(matrix, current, params)
+        assert result.stats["length"][2] == 70
+
+        # 改写成长度相同、内容不同的文件：公共参数不变，只有这一行改变
+        before = result.matrix.copy()
+        stat = os.stat(current[4])
+        write_file(tmp_path, "Copy4.xls", 120, 41)
+        os.utime(current[4], (stat.st_atime + 10, stat.st_mtime + 10))
+        result = assert_matches_pipeline(matrix, current, params)
+        assert not np.array_equal(result.matrix[4], before[4])
+        np.testing.assert_array_equal(result.matrix[:4], before[:4])
+
+        # 恢复原来的文件，供另一种对齐方式使用
+        for i in (2, 4):
+            stat = os.stat(current[i])
+            write_file(tmp_path, f"Copy{i}.xls", 100 + 5 * i, i)
+            os.utime(current[i], (stat.st_atime + 10, stat.st_mtime + 10))
+
+
+def test_changed_parameters(files):
+    """处理参数改变时全部重新计算，热图列数改变时只重新组成矩阵"""
+    matrix = incremental.IncrementalMatrix()
+    current = files[:10]
+    for params in [make_params("mean"), make_params("mean", "resample"), make_params("median", "resample"),
+                   make_params("median", "resample", data_groups=9), make_params("median", "resample", data_groups=3),
+                   make_params("mean", file_reduce="rms"), make_params("max", file_reduce="mean", data_groups=4),
+                   make_params("max", time_column=0), make_params("max", "resample", time_column=0),
+                   make_params("max")._replace(start_row=20, end_row=90),
+                   make_params("max")._replace(column_index=3), make_params("max")]:
+        assert_matches_pipeline(matrix, current, params)
+        current = current[1:] + current[:1]
+
+
+def test_pca_uses_full_pipeline(files):
+    matrix = incremental.IncrementalMatrix()
+    params = make_params("pca")
+    current = files[:8]
+    assert_matches_pipeline(matrix, current, params)
+    current = current + [files[12]]
+    assert_matches_pipeline(matrix, current, params)
+    current.remove(files[0])
+    assert_matches_pipeline(matrix, current, params)
+    # 切换回逐文件的方法后增量更新从头开始
+    assert_matches_pipeline(matrix, current, make_params("mean"))
+
+
+def test_out_of_core_fallback(files):
+    """超过内存上限时改为完整计算（磁盘暂存），结果与内存中完整计算相同"""
+    matrix = incremental.IncrementalMatrix()
+    params = make_params("mean", "resample")
+    current = files[:8]
+    assert_matches_pipeline(matrix, current, params)
+    current = current + [files[10]]
+    assert_matches_pipeline(matrix, current, params, memory_limit=1)
+    current.remove(files[1])
+    assert_matches_pipeline(matrix, current, params, memory_limit=1)
+    # 回到内存中的增量更新
+    current = current + [files[11]]
+    assert_matches_pipeline(matrix, current, params)
+
+
+@pytest.mark.parametrize("align", ["cut", "resample"])
+def test_exclude_outliers(files, align):
+    matrix = incremental.IncrementalMatrix()
+    params = make_params("rms", align, exclude=True, data_groups=4)
+    current = [path for path in files if path not in (files[3], files[7])]
+    result = assert_matches_pipeline(matrix, current, params)
+    assert result.excluded == {}
+    # 加入异常文件：被排除，其余行不变
+    current = current + [files[3], files[7]]
+    result = assert_matches_pipeline(matrix, current, params)
+    assert set(result.excluded) == {files[3], files[7]}
+    # 移除异常文件后的判定基准改变
+    current = current[:5] + current[-2:]
+    assert_matches_pipeline(matrix, current, params)
+    # 关闭排除：异常文件回到矩阵中
+    assert_matches_pipeline(matrix, current, params._replace(exclude=False))
+
+
+def test_unreadable_files_are_reported(files, tmp_path):
+    """不存在或无法解析的文件被跳过，错误信息随结果返回"""
+    broken = tmp_path / "broken.xls"
+    broken.write_bytes(b"not an excel file")
+    missing = str(tmp_path / "missing.xls")
+    matrix = incremental.IncrementalMatrix()
+    params = make_params("mean")
+    current = files[:7] + [str(broken), missing]
+    result = assert_matches_pipeline(matrix, current, params)
+    assert set(result.errors) == {str(broken), missing}
+    assert result.errors[missing] == "文件不存在"
+    # 再次更新时不重新读取失败的文件，错误信息仍然返回
+    current = current + [files[8]]
+    result = assert_matches_pipeline(matrix, current, params)
+    assert set(result.errors) == {str(broken), missing}
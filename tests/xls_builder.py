@@ -0,0 +1,160 @@
+# tests/xls_builder.py
+"""按记录手工拼出 BIFF8 工作簿，用于生成 xlwt 写不出的记录（MULRK、带缓存结果的 FORMULA 等）
+
+每个单元格函数返回一条完整记录（记录头 + 数据），workbook() 把各工作表的记录流拼成工作簿流，
+save() 用 xlwt 的复合文档写出为 .xls 文件。
+"""
+import struct
+
+from xlwt.CompoundDoc import XlsDoc
+
+BOF = 0x0809
+EOF = 0x000A
+XF = 0x00E0
+FORMAT = 0x041E
+SST = 0x00FC
+BOUNDSHEET = 0x0085
+CONTINUE = 0x003C
+NUMBER = 0x0203
+RK = 0x027E
+MULRK = 0x00BD
+FORMULA = 0x0006
+STRING = 0x0207
+LABEL = 0x0204
+LABELSST = 0x00FD
+BOOLERR = 0x0205
+BLANK = 0x0201
+
+BOF_GLOBALS = 0x0005
+BOF_WORKSHEET = 0x0010
+BOF_CHART = 0x0020
+
+# 内置日期格式 yyyy-mm-dd 对应的格式号
+DATE_FORMAT = 14
+
+
+def record(rc, data=b''):
+    return struct.pack('<HH', rc, len(data)) + data
+
+
+def bof(kind):
+    return record(BOF, struct.pack('<HHHHII', 0x0600, kind, 0x0DBB, 0x07CC, 0, 0x06))
+
+
+def unicode_string(text, length_bytes=2):
+    """BIFF8 不压缩的 Unicode 字符串（UTF-16LE）"""
+    return struct.pack('<H' if length_bytes == 2 else '<B', len(text)) + b'\x01' + text.encode('utf-16-le')
+
+
+def xf(format_key=0):
+    return record(XF, struct.pack('<HHHBBBBIiH', 0, format_key, 0x0001, 0x20, 0, 0, 0, 0, 0, 0x20C0))
+
+
+def format_record(key, text):
+    return record(FORMAT, struct.pack('<H', key) + unicode_string(text))
+
+
+def rk_encode(value):
+    """RK编码：整数直接编码，其余取双精度数的高30位（调用方保证可精确表示）"""
+    if float(value).is_integer() and -2 ** 29 <= value < 2 ** 29:
+        return (int(value) << 2) | 2
+    bits = struct.unpack('<Q', struct.pack('<d', value))[0] >> 32
+    if bits & 3:
+        raise ValueError(f"{value} 不能用RK精确表示")
+    return struct.unpack('<i', struct.pack('<I', bits))[0]
+
+
+def number(row, col, value, xf_index=0):
+    return record(NUMBER, struct.pack('<HHHd', row, col, xf_index, value))
+
+
+def rk(row, col, value, xf_index=0):
+    return record(RK, struct.pack('<HHHi', row, col, xf_index, rk_encode(value)))
+
+
+def mulrk(row, first_col, values, xf_index=0):
+    cells = b''.join(struct.pack('<Hi', xf_index, rk_encode(v)) for v in values)
+    return record(MULRK, struct.pack('<HH', row, first_col) + cells + struct.pack('<H', first_col + len(values) - 1))
+
+
+def _formula(row, col, result, xf_index):
+    # 公式本身为 tInt 1，读取时只使用缓存结果
+    return record(FORMULA, struct.pack('<HHH', row, col, xf_index) + result
+                  + struct.pack('<HIH', 0, 0, 3) + b'\x1e\x01\x00')
+
+
+def formula_number(row, col, value, xf_index=0):
+    return _formula(row, col, struct.pack('<d', value), xf_index)
+
+
+def formula_bool(row, col, value, xf_index=0):
+    return _formula(row, col, struct.pack('<BBBBBBH', 1, 0, int(value), 0, 0, 0, 0xFFFF), xf_index)
+
+
+def formula_error(row, col, code=0x07, xf_index=0):
+    return _formula(row, col, struct.pack('<BBBBBBH', 2, 0, code, 0, 0, 0, 0xFFFF), xf_index)
+
+
+def formula_string(row, col, text, xf_index=0):
+    """缓存结果为文本的公式，之后紧跟 STRING 记录"""
+    return (_formula(row, col, struct.pack('<BBBBBBH', 0, 0, 0, 0, 0, 0, 0xFFFF), xf_index)
+            + record(STRING, unicode_string(text)))
+
+
+def boolerr(row, col, value, is_error=False, xf_index=0):
+    return record(BOOLERR, struct.pack('<HHHBB', row, col, xf_index, int(value), int(is_error)))
+
+
+def label(row, col, text, xf_index=0):
+    return record(LABEL, struct.pack('<HHH', row, col, xf_index) + unicode_string(text))
+
+
+def label_sst(row, col, index, xf_index=0):
+    return record(LABELSST, struct.pack('<HHHI', row, col, xf_index, index))
+
+
+def blank(row, col, xf_index=0):
+    return record(BLANK, struct.pack('<HHH', row, col, xf_index))
+
+
+def sst(strings, split=None):
+    """共享字符串表；split 给出时在该字节处把数据拆到 CONTINUE 记录中（须落在两个字符串之间）"""
+    data = struct.pack('<II', len(strings), len(strings)) + b''.join(unicode_string(s) for s in strings)
+    if split is None:
+        return record(SST, data)
+    return record(SST, data[:split]) + record(CONTINUE, data[split:])
+
+
+def chart_substream():
+    """嵌入在工作表中的图表子流（只有 BOF/EOF）"""
+    return bof(BOF_CHART) + record(EOF)
+
+
+def workbook(sheets, formats=(), xf_formats=(0,), shared_strings=b''):
+    """
+    拼出工作簿流
+
+    Args:
+        sheets (list): [(工作表名, 单元格记录字节串)]
+        formats (iterable): FORMAT 记录字节串
+        xf_formats (iterable): 每个XF记录的格式号
+        shared_strings (bytes): SST（及 CONTINUE）记录
+
+    Returns:
+        bytes: 工作簿流
+    """
+    boundsheet_sizes = [4 + 6 + 2 + 2 * len(name) for name, _ in sheets]
+    head = bof(BOF_GLOBALS) + b''.join(formats) + b''.join(xf(key) for key in xf_formats) + shared_strings
+    offset = len(head) + sum(boundsheet_sizes) + 4
+    boundsheets = b''
+    bodies = b''
+    for name, cells in sheets:
+        boundsheets += record(BOUNDSHEET, struct.pack('<IBB', offset + len(bodies), 0, 0)
+                              + unicode_string(name, length_bytes=1))
+        bodies += bof(BOF_WORKSHEET) + cells + record(EOF)
+    return head + boundsheets + record(EOF) + bodies
+
+
+def save(path, stream):
+    XlsDoc().save(str(path), stream)
+    return path